@@ -4,6 +4,10 @@
 Package of
 =======================================
 
+Job generation (:func:`run_all`, :func:`run1`, :func:`jobscript`) only needs the standard library
+and click. Post-processing lives in :mod:`of.post` and needs numpy and matplotlib, which are
+imported only when a post-processing function is first accessed, e.g. ``of.postprocess``.
+
 On hortense need
 
     module load SciPy-bundle
@@ -15,22 +19,22 @@ On Vaughan
 """
 __version__ = "0.7.5"
 
-import os, sys, re, subprocess, shutil, math, pprint
+import os, subprocess, shutil
 from typing import Union
 from pathlib import Path
 from collections import namedtuple
-import io
-
-try:
-    import numpy as np
-    from matplotlib import pyplot
-except ModuleNotFoundError as x:
-    print(x)
-    print("Modules Numpy and matplotlib are needed for post-processing only.")
-    print("On dodrio, run `module load SciPy-bundle` and `module load matplotlib`")
 
 import click
 
+from of.status import RunStatus, run_status
+from of.staging import stage_case, remove_artefacts
+from of.decomposition import cached_decomposition, method_commands
+from of.profiling import profiling_commands
+from of.counters import counter_commands, COUNTER_WRAPPER
+from of.weak import find_block_mesh_dict, weak_commands
+# of.launch, of.sweep, of.estimate, of.store (sqlite3) and of.tracker (asyncio) are imported where they
+# are used, to keep 'import of' fast (see tests/of/test_startup.py).
+
 
 #===================================================================================================
 NCORESPERNODE = {
@@ -57,6 +61,54 @@ if VSC_INSTITUTE_CLUSTER not in NCORESPERNODE:
     raise NotImplementedError(f"Unknown cluster: VSC_INSTITUTE_CLUSTER = '{VSC_INSTITUTE_CLUSTER}'")
 
 
+#===================================================================================================
+RunOptions = namedtuple( 'RunOptions'
+                       , [ 'staging', 'decomposition_cache'
+                         , 'timesteps', 'warmup', 'seconds_per_step'
+                         , 'early_stop', 'profile', 'counters'
+                         , 'cells_per_core', 'block_mesh_dict'
+                         , 'walltimes'
+                         ]
+                       , defaults=[ 'copy', ''
+                                  , 0, 0, 0.
+                                  , 0., False, ''
+                                  , 0, ''
+                                  , None
+                                  ]
+                       )
+RunOptions.__doc__ = """Options of a scaling test that apply to all its run cases.
+
+:param staging: how the case is staged in a run case directory, 'copy', 'symlink' or 'hardlink'
+    (see :mod:`of.staging`).
+:param decomposition_cache: absolute path of a directory where decomposed meshes are cached and
+    reused (see :mod:`of.decomposition`). If empty, every run case decomposes its mesh.
+:param timesteps: if > 0, benchmark mode: every run case stops after ``warmup + timesteps`` timesteps and
+    writes no fields (see :func:`benchmark_commands`). If 0, the run cases run as specified by the case's
+    controlDict.
+:param warmup: number of extra timesteps in benchmark mode, to be excluded from the timings.
+:param seconds_per_step: in benchmark mode, an estimate of the walltime per timestep of the serial run.
+    If > 0, the walltime requested for each run case is computed from it (see :func:`benchmark_walltime`).
+:param early_stop: if > 0, a watcher stops the run as soon as the relative width of the confidence interval of
+    the walltime per timestep is below ``early_stop`` (see :mod:`of.watcher`). The ``warmup`` timesteps are
+    ignored.
+:param profile: switch OpenFOAM's profiling on (see :mod:`of.profiling`). The run cases then write their
+    fields at the end of the run (also in benchmark mode), because that is when the profiling is written.
+:param counters: if not empty, measure hardware performance counters of every rank of the solver with
+    this tool, one of :data:`of.counters.COUNTER_TOOLS` (see :mod:`of.counters`).
+:param cells_per_core: if > 0, weak scaling: every run case generates its own mesh with ``blockMesh``, with
+    this number of cells per core (see :mod:`of.weak`).
+:param block_mesh_dict: in weak scaling mode, the absolute path of the blockMeshDict of the original case.
+:param walltimes: dict mapping numbers of cores to the walltime (in hours) estimated from earlier sweeps
+    (see :mod:`of.estimate`), or None.
+"""
+
+BENCHMARK_OVERHEAD = 0.25
+"""Walltime (in hours) reserved for loading modules, decomposing, renumbering and starting the solver."""
+
+BENCHMARK_SAFETY = 2.0
+"""Safety factor on the estimated processing time in benchmark mode. 2 covers a parallel efficiency down to 50%."""
+
+
 #===================================================================================================
 def walltime_fmtd(value: Union[int,float,str]):
     """Convert hours to slurm wall time format HH:MM:SS
@@ -75,6 +127,211 @@ def walltime_fmtd(value: Union[int,float,str]):
         return s
 
 
+def walltime_hours(value: Union[int,float,str]):
+    """Convert a walltime, either a number of hours or a slurm wall time 'HH:MM:SS', to hours."""
+    if isinstance(value, str):
+        hours = 0.
+        for i, field in enumerate(reversed(value.split(':'))):
+            hours += float(field) * 60**i / 3600
+        return hours
+    else:
+        return value
+
+
+#===================================================================================================
+def sbatch_header(n_nodes: int, walltime, job_name: str, output: str = '%x'):
+    """The #SBATCH lines of a job script.
+
+    :param output: name (without extension) of the slurm .stdout and .stderr files.
+    """
+    lines = [ "#!/bin/bash"
+            ,f"#SBATCH --nodes={n_nodes} --exclusive"
+            ,f"#SBATCH --time={walltime_fmtd(walltime)}"
+            ,f"#SBATCH --job-name={job_name}"
+            ,f"#SBATCH -o {output}.stdout"
+            ,f"#SBATCH -e {output}.stderr"
+            ]
+    if VSC_INSTITUTE_CLUSTER == 'dodrio':
+        lines += [
+                "#SBATCH --account=astaff"
+              , ""
+              , "unset SLURM_EXPORT_ENV"
+              ]
+    return lines
+
+
+def environment():
+    """The job script lines that load the modules and prepare the OpenFOAM environment."""
+    lines = ['module --force purge']
+    # specify which modules to load
+    for m in MODULES[VSC_INSTITUTE_CLUSTER]:
+        lines.append(f'module load {m}')
+        
+    lines += [ "module list"
+             , ""
+             , "# Prepare OpenFOAM environment"
+             , "source $FOAM_BASH"
+             , ""
+             ]
+    return lines
+
+
+def mpi_driver(n_tasks: int, max_tasks_per_node: int):
+    """The command that starts n_tasks MPI tasks, with at most max_tasks_per_node tasks per node."""
+    # is this job using the rquested nodes partially (i.e. less tasks per node than cores available per node)?
+    partial_nodes = max_tasks_per_node != NCORESPERNODE[VSC_INSTITUTE_CLUSTER] \
+                 or n_tasks < NCORESPERNODE[VSC_INSTITUTE_CLUSTER]
+    
+    if VSC_INSTITUTE_CLUSTER == 'dodrio':
+        # --hybrid is way faster than --universe for partial nodes. --hybrid implies 'spread' pinning on a node,
+        # i.e. processes are as far away from each other as possible, whereas --universe implies 'compact' pinning,
+        # i.e. processes are as close together as possible.
+        # the difference is large: for 1x16 cores --universe 16 takes 93.1s per timestep as opposed o 2.87s for 
+        # --hybrid 16 (case = hpc/microbenchmarks/cavity-3d/8M/fixedIter)
+        if partial_nodes:
+            return f"mympirun --hybrid {min(max_tasks_per_node, n_tasks)}"
+        else:
+            return f"mympirun --universe {n_tasks}"
+    else:
+        if partial_nodes:
+            return f"srun --ntasks {n_tasks} --distribution block:cyclic:cyclic"
+        else:
+            return f"srun --ntasks {n_tasks}"
+
+
+def tasks_per_node(n_nodes: int, n_tasks: int, max_tasks_per_node: int):
+    """The number of tasks per node of a run case with n_tasks tasks on n_nodes nodes.
+
+    This is less than max_tasks_per_node if the tasks do not fill the nodes, e.g. 100 tasks on 2 nodes
+    with 64 cores (see :func:`of.sweep.configuration`).
+    """
+    return min(max_tasks_per_node, -(-n_tasks // n_nodes))
+
+
+def run_commands( n_tasks: int, max_tasks_per_node: int, case_name: str, openfoam_solver: str, driver: str = ''
+                , options=RunOptions(), strategy: str = ''
+    ):
+    """The job script lines for pre-processing and processing a run case (in the current directory).
+
+    :param driver: command that starts the MPI tasks. If empty, :func:`mpi_driver` is used. For a serial
+        run case, ``driver`` is used as a prefix of the solver command (e.g. ``taskset -c 3``).
+    :param options: :class:`RunOptions`.
+    :param strategy: launch strategy (see :mod:`of.launch`), '' for the default. Ignored if ``driver`` is given.
+    """
+    lines = ["# Preprocessing"]
+    if options.timesteps:
+        lines += benchmark_commands(options.warmup + options.timesteps, write_last=options.profile)
+    if options.profile:
+        lines += profiling_commands()
+    solver = openfoam_solver
+    if options.counters:
+        lines += counter_commands(options.counters)
+        solver = f"{COUNTER_WRAPPER} {openfoam_solver}"
+    if options.cells_per_core:
+        # weak scaling: the mesh depends on the number of cores, and is generated in the job
+        lines += weak_commands(options.block_mesh_dict, n_tasks, options.cells_per_core)
+    else:
+        if VSC_INSTITUTE_CLUSTER == 'dodrio':
+            # blockMesh couldn't run in a single process on dodrio and should be run beforehand
+            blockMesh = "# blockMesh # (pre-processing already done)"
+        else:
+            blockMesh = "# blockMesh"
+        lines.append(f"{blockMesh}")
+
+    if n_tasks == 1:
+        prefix = f"{driver} " if driver else ""
+        lines += [f"{prefix}renumberMesh -overwrite"
+                 , "# Processing"
+                 ]
+        lines += watched(f"{prefix}{solver} >& {case_name}.log", case_name, options)
+    else:
+        from of.launch import launch, parse_strategy
+        if not driver:
+            how = launch(strategy, n_tasks, max_tasks_per_node)
+            n_tasks = how.n_ranks
+            driver = how.driver or mpi_driver(n_tasks, max_tasks_per_node)
+            lines += how.environment
+        lines += [f"foamDictionary -entry numberOfSubdomains -set {n_tasks} system/decomposeParDict"]
+        method = parse_strategy(strategy)['method']
+        if method:
+            lines += method_commands(method, n_tasks)
+        lines += ["rm -rf processor*"]
+        decompose = [ "decomposePar"
+                    ,f"{driver} renumberMesh -parallel -overwrite"
+                    ]
+        if options.decomposition_cache:
+            lines += cached_decomposition(options.decomposition_cache, n_tasks, decompose)
+        else:
+            lines += decompose
+        lines += ["# Processing"]
+        lines += watched(f"{driver} {solver} -parallel >& {case_name}.log", case_name, options)
+    return lines
+
+
+def watched(solver_command: str, case_name: str, options=RunOptions()):
+    """The job script lines running solver_command, with a watcher for early stopping if options.early_stop > 0.
+
+    The watcher (:mod:`of.watcher`) is a stand-alone script, it runs in the background, and is killed
+    when the solver has finished (if it has not already exited).
+    """
+    if not options.early_stop:
+        return [solver_command]
+    watcher = Path(__file__).resolve().parent / 'watcher.py'
+    return [ "foamDictionary -entry runTimeModifiable -set yes system/controlDict"
+           ,f"python3 {watcher} {case_name}.log --rel-width {options.early_stop} --warmup {options.warmup}"
+            f"{' --write' if options.profile else ''} &"
+           , "WATCHER_PID=$!"
+           , solver_command
+           , "kill $WATCHER_PID 2>/dev/null"
+           ]
+
+
+def benchmark_commands(n_steps: int, write_last: bool = False):
+    """Job script lines that modify system/controlDict to stop after n_steps timesteps and write no fields.
+
+    The endTime is computed from the deltaT and startTime in the controlDict. Adjustable timestepping is
+    switched off, so that every timestep is the same amount of work.
+
+    :param write_last: write the fields after the last timestep (needed for the profiling output).
+    """
+    control_dict = "system/controlDict"
+    return [f"# Benchmark mode: stop after {n_steps} timesteps, write no fields"
+           ,f"DELTA_T=$(foamDictionary -entry deltaT -value {control_dict})"
+           ,f"START_TIME=$(foamDictionary -entry startTime -value {control_dict})"
+           ,f"foamDictionary -entry startFrom -set startTime {control_dict}"
+           ,f"foamDictionary -entry stopAt -set endTime {control_dict}"
+           ,f'foamDictionary -entry endTime -set $(awk "BEGIN {{printf \\"%.12g\\", $START_TIME + {n_steps} * $DELTA_T}}") {control_dict}'
+           ,f"foamDictionary -entry adjustTimeStep -set no {control_dict}"
+           ,f"foamDictionary -entry writeControl -set timeStep {control_dict}"
+           ,f"foamDictionary -entry writeInterval -set {n_steps if write_last else n_steps + 1} {control_dict}"
+           ]
+
+
+def benchmark_walltime(n_steps: int, seconds_per_step: float, n_tasks: int):
+    """Walltime (in hours) to request for a run case in benchmark mode.
+
+    :param n_steps: number of timesteps.
+    :param seconds_per_step: estimate of the walltime per timestep of the serial run.
+    :param n_tasks: number of MPI tasks.
+    """
+    return BENCHMARK_OVERHEAD + BENCHMARK_SAFETY * n_steps * seconds_per_step / n_tasks / 3600
+
+
+def run_case_walltime(walltime, n_tasks: int, options=RunOptions()):
+    """The walltime to request for a run case with n_tasks MPI tasks.
+
+    This is ``walltime``, unless the walltime can be estimated: from earlier sweeps (``options.walltimes``),
+    or in benchmark mode with ``seconds_per_step``. In weak scaling mode, the work per core, and hence the
+    estimated walltime, is the same for all run cases.
+    """
+    if options.walltimes and n_tasks in options.walltimes:
+        return options.walltimes[n_tasks]
+    if options.timesteps and options.seconds_per_step:
+        n_cores = 1 if options.cells_per_core else n_tasks
+        return benchmark_walltime(options.warmup + options.timesteps, options.seconds_per_step, n_cores)
+    return walltime
+
+
 #===================================================================================================
 def jobscript(
       n_nodes: int
@@ -84,87 +341,193 @@ def jobscript(
     , case_name: str
     , openfoam_solver: str
     , verbosity: int
+    , options=RunOptions()
+    , strategy: str = ''
     ):
-    
-    # is this job using the rquested nodes partially (i.e. less tasks per node than cores available per node)?
-    partial_nodes = max_tasks_per_node != NCORESPERNODE[VSC_INSTITUTE_CLUSTER] \
-                 or n_tasks < NCORESPERNODE[VSC_INSTITUTE_CLUSTER]
-    
-    script =  [ "#!/bin/bash"
-              ,f"#SBATCH --nodes={n_nodes} --exclusive"
-              ,f"#SBATCH --time={walltime_fmtd(walltime)}"
-              ,f"#SBATCH --job-name={case_name}"
-              , "#SBATCH -o %x.stdout"
-              , "#SBATCH -e %x.stderr"
-              ]
-    if VSC_INSTITUTE_CLUSTER == 'dodrio':
-        script += [
-                "#SBATCH --account=astaff"
-              , ""
-              , "unset SLURM_EXPORT_ENV"
-              ]
+    """Job script for running a single run case on n_nodes nodes with n_tasks MPI tasks.
+
+    :param strategy: launch strategy (see :mod:`of.launch`), '' for the default.
+    """
+    script = sbatch_header(n_nodes, walltime, job_name=case_name)
     script += [ ''
               , 'echo "JOB ID = $SLURM_JOB_ID"'
               , ''
-              , 'module --force purge'
-    ]
-    # specify which modules to load
-    for m in MODULES[VSC_INSTITUTE_CLUSTER]:
-        script.append(f'module load {m}')
+              ]
+    script += environment()
+    script += run_commands( n_tasks, tasks_per_node(n_nodes, n_tasks, max_tasks_per_node), case_name, openfoam_solver
+                          , options=options, strategy=strategy
+                          )
+
+    script = '\n'.join(script)
+    
+    if verbosity > 3:
+        print(80*'<')
+        print(script)
+        print(80*'>')
         
-    script += [ "module list"
-              , ""
-              , "# Prepare OpenFOAM environment"
-              , "source $FOAM_BASH"
-              , ""
+    return script
+
+
+#===================================================================================================
+def array_jobscript(
+      n_nodes: int
+    , n_tasks: list
+    , max_tasks_per_node: int
+    , walltime: float
+    , case_names: list
+    , openfoam_solver: str
+    , job_name: str
+    , throttle: int = 0
+    , verbosity: int = 0
+    , options=RunOptions()
+    , strategies: list = None
+    ):
+    """Slurm array job script running several run cases, which all use n_nodes nodes.
+
+    Array task i runs run case ``case_names[i]`` with ``n_tasks[i]`` MPI tasks. The script must be
+    submitted from the directory containing the run case directories. Every array task changes to
+    its run case directory and redirects its output to ``<run case>.stdout``, so that the run case
+    directories look exactly as if they were submitted with :func:`jobscript`. The slurm .stderr
+    file of the array task, which also receives the messages of slurm itself, is linked as
+    ``<run case>.stderr``.
+
+    :param throttle: maximum number of array tasks running simultaneously. 0 means no limit.
+    :param strategies: launch strategy of every run case (see :mod:`of.launch`). None for the default.
+    """
+    if strategies is None:
+        strategies = len(case_names) * ['']
+    array = f"0-{len(case_names) - 1}"
+    if throttle:
+        array += f"%{throttle}"
+    script = sbatch_header(n_nodes, walltime, job_name=job_name, output='%x.%a')
+    script.insert(4, f"#SBATCH --array={array}")
+    script += [ ''
+              , 'RUN_CASES=(' + ' '.join(case_names) + ')'
+              , 'RUN_CASE=${RUN_CASES[$SLURM_ARRAY_TASK_ID]}'
+              , 'cd $RUN_CASE'
+              , 'ln -sf ../$SLURM_JOB_NAME.$SLURM_ARRAY_TASK_ID.stderr $RUN_CASE.stderr'
+              , 'exec > $RUN_CASE.stdout'
+              , ''
+              , 'echo "JOB ID = $SLURM_JOB_ID"'
+              , 'echo "ARRAY JOB ID = ${SLURM_ARRAY_JOB_ID}_$SLURM_ARRAY_TASK_ID"'
+              , ''
               ]
+    script += environment()
+    script.append('case $SLURM_ARRAY_TASK_ID in')
+    for i, (nt, case_name, strategy) in enumerate(zip(n_tasks, case_names, strategies)):
+        script.append(f'{i})')
+        script += ['    ' + line for line in run_commands( nt, tasks_per_node(n_nodes, nt, max_tasks_per_node), case_name
+                                                         , openfoam_solver, options=options, strategy=strategy
+                                                         )]
+        script.append('    ;;')
+    script.append('esac')
 
-    script.append("# Preprocessing")
-    if VSC_INSTITUTE_CLUSTER == 'dodrio':
-        # blockMesh couldn't run in a single process on dodrio and should be run beforehand
-        blockMesh = "# blockMesh # (pre-processing already done)"
-    else:
-        blockMesh = "# blockMesh"
-    script.append(f"{blockMesh}")
+    script = '\n'.join(script)
+
+    if verbosity > 3:
+        print(80*'<')
+        print(script)
+        print(80*'>')
+
+    return script
+
+
+#===================================================================================================
+def pack(n_tasks: list, n_cores: int):
+    """Distribute run cases over groups that fit on a node with n_cores cores (first fit decreasing).
+
+    :param n_tasks: number of tasks of each run case.
+    :return: list of groups. A group is a list of ``(i, first_core)`` tuples, where i is the index of the
+        run case in n_tasks, and its tasks are pinned to cores ``first_core, ..., first_core + n_tasks[i] - 1``.
+    """
+    groups = []
+    free = []
+    for i in sorted(range(len(n_tasks)), key=lambda i: -n_tasks[i]):
+        for g, group in enumerate(groups):
+            if n_tasks[i] <= free[g]:
+                break
+        else:
+            groups.append([])
+            free.append(n_cores)
+            g = -1
+        groups[g].append((i, n_cores - free[g]))
+        free[g] -= n_tasks[i]
+    return groups
 
+
+def pinned_driver(n_tasks: int, first_core: int):
+    """Command that starts n_tasks tasks, pinned to cores first_core, ..., first_core + n_tasks - 1.
+
+    This is used for running several run cases concurrently on a single node. The tasks are started
+    with srun, so this is not available on clusters that start MPI tasks with mympirun (dodrio).
+
+    :raises ValueError: on dodrio.
+    """
+    if VSC_INSTITUTE_CLUSTER == 'dodrio':
+        raise ValueError("Concurrent packed jobs pin the run cases with srun, which cannot be combined with mympirun on dodrio.")
+    cores = range(first_core, first_core + n_tasks)
     if n_tasks == 1:
-        script += [ "renumberMesh -overwrite"
-                  , "# Processing"
-                  ,f"{openfoam_solver} >& {case_name}.log"
-                  ]
+        return f"taskset -c {first_core}"
+    return f"srun --exact --ntasks {n_tasks} --cpu-bind=map_cpu:{','.join(map(str, cores))}"
+
+
+def packed_jobscript(
+      n_tasks: list
+    , max_tasks_per_node: int
+    , walltime: float
+    , case_names: list
+    , openfoam_solver: str
+    , job_name: str
+    , concurrent: bool = False
+    , verbosity: int = 0
+    , options=RunOptions()
+    ):
+    """Job script running several single node run cases inside a single (exclusive) node allocation.
+
+    The script must be submitted from the directory containing the run case directories. Each run
+    case runs in its own directory and writes ``<run case>.stdout`` and ``<run case>.stderr``, so the
+    run case directories look exactly as if they were submitted with :func:`jobscript`.
+
+    :param concurrent: if False, the run cases are run one after the other. If True, they are packed
+        in groups that fit on the node (see :func:`pack`). The run cases of a group run simultaneously,
+        on non-overlapping sets of cores, and the groups run one after the other. This saves time, at
+        the expense of interference between run cases (memory bandwidth, shared caches). The run cases
+        of a group are pinned with :func:`pinned_driver`, which is not available on dodrio. Run cases
+        run one after the other use the launcher of the cluster (see :func:`mpi_driver`).
+    :param walltime: walltime of a single run case. The walltime requested is the sum of the walltimes
+        of the run cases (or groups) run one after the other (see :func:`run_case_walltime`).
+    """
+    if concurrent:
+        groups = pack(n_tasks, NCORESPERNODE[VSC_INSTITUTE_CLUSTER])
     else:
-        if VSC_INSTITUTE_CLUSTER == 'dodrio':
-            # --hybrid is way faster than --universe for partial nodes. --hybrid implies 'spread' pinning on a node,
-            # i.e. processes are as far away from each other as possible, whereas --universe implies 'compact' pinning,
-            # i.e. processes are as close together as possible.
-            # the difference is large: for 1x16 cores --universe 16 takes 93.1s per timestep as opposed o 2.87s for 
-            # --hybrid 16 (case = hpc/microbenchmarks/cavity-3d/8M/fixedIter)
-            if partial_nodes:
-                mpi_driver = f"mympirun --hybrid {min(max_tasks_per_node, n_tasks)}"
-            else:
-                mpi_driver = f"mympirun --universe {n_tasks}"
-        else:
-            if partial_nodes:
-                mpi_driver = f"srun --ntasks {n_tasks} --distribution block:cyclic:cyclic"
-            else:
-                mpi_driver = f"srun --ntasks {n_tasks}"
-                
-            
-        script += [f"foamDictionary -entry numberOfSubdomains -set {n_tasks} system/decomposeParDict"
-                  , "rm -rf processor*"
-                  , "decomposePar"
-                  ,f"{mpi_driver} renumberMesh -parallel -overwrite"
-                  , "# Processing"
-                  ,f"{mpi_driver} {openfoam_solver} -parallel >& {case_name}.log"
-                  ]
+        groups = [[(i, None)] for i in range(len(n_tasks))]
+
+    hours = sum(max(walltime_hours(run_case_walltime(walltime, n_tasks[i], options)) for i, _ in group) for group in groups)
+    script = sbatch_header(1, hours, job_name=job_name)
+    script += [ ''
+              , 'echo "JOB ID = $SLURM_JOB_ID"'
+              , ''
+              ]
+    script += environment()
+    for g, group in enumerate(groups):
+        script.append(f"# Group {g}" if concurrent else f"# Run case {case_names[group[0][0]]}")
+        for i, first_core in group:
+            name = case_names[i]
+            driver = '' if first_core is None else pinned_driver(n_tasks[i], first_core)
+            script.append(f"( cd {name}")
+            script += ['  ' + line for line in run_commands(n_tasks[i], max_tasks_per_node, name, openfoam_solver, driver, options)]
+            script.append(f") > {name}/{name}.stdout 2> {name}/{name}.stderr" + (" &" if concurrent else ""))
+        if concurrent:
+            script.append("wait")
+        script.append("")
 
     script = '\n'.join(script)
-    
+
     if verbosity > 3:
         print(80*'<')
         print(script)
         print(80*'>')
-        
+
     return script
 
 
@@ -178,8 +541,73 @@ def run_all( case:str
         , walltime: float = 1
         , overwrite:bool = False
         , submit: bool = False
+        , array: bool = False
+        , throttle: int = 0
+        , packed: str = ''
+        , staging: str = 'copy'
+        , decomposition_cache: bool = False
+        , timesteps: int = 0
+        , warmup: int = 0
+        , seconds_per_step: float = 0.
+        , early_stop: float = 0.
+        , profile: bool = False
+        , counters: str = ''
+        , strategies: tuple = ()
+        , decomposition_methods: tuple = ()
+        , cells_per_core: int = 0
+        , sweep_spec: str = 'powers'
+        , estimate_walltime: bool = False
         , verbosity:bool = 0
     ):
+    """Stage and submit a strong (or weak) scaling test of an OpenFOAM case.
+
+    By default, run cases are created for 1, 2, 4, ... max_cores_per_node cores on a single node, and for
+    2, 4, ... max_nodes nodes, using max_cores_per_node cores per node (see ``sweep_spec``).
+    The cluster, the modules and the solver are recorded in the destination, to tag the results in the
+    results store (see :mod:`of.store`).
+
+    :param array: submit the run cases as slurm array jobs (see :func:`run_array`), rather than as
+        a separate job per run case.
+    :param throttle: maximum number of array tasks running simultaneously. 0 means no limit.
+    :param packed: if 'sequential' or 'concurrent', all single node run cases are run inside a single
+        node allocation, one after the other, or simultaneously on non-overlapping sets of cores
+        (see :func:`run_packed`).
+    :param staging: 'copy' (default), 'symlink' or 'hardlink'. With 'symlink' and 'hardlink' the read-only
+        parts of the case (the mesh, the *Properties files) are linked rather than copied (see :mod:`of.staging`).
+        With --overwrite only the per-run artefacts are removed.
+    :param decomposition_cache: reuse decomposed meshes across run cases with the same mesh and number of
+        subdomains. The cache is the directory ``.decomposition-cache`` next to the case (see :mod:`of.decomposition`).
+    :param timesteps: if > 0, benchmark mode: the controlDict of every run case is modified to stop after
+        ``warmup + timesteps`` timesteps and write no fields.
+    :param warmup: number of extra timesteps in benchmark mode.
+    :param seconds_per_step: estimate of the walltime per timestep of the serial run. In benchmark mode,
+        the walltime of each run case is computed from it, rather than using ``walltime``.
+    :param early_stop: if > 0, stop every run as soon as the relative width of the 95% confidence interval
+        of its walltime per timestep is below this value (see :mod:`of.watcher`).
+    :param profile: switch OpenFOAM's profiling on in every run case (see :mod:`of.profiling`).
+    :param counters: measure hardware performance counters of the solver with 'perf' (per rank), 'likwid'
+        (per node), or 'auto' (likwid if available, perf otherwise). Empty: no counters (see :mod:`of.counters`).
+    :param strategies: list of launch strategies (see :mod:`of.launch`). Every configuration is run with
+        every strategy that applies to it, in a run case directory ``<case>-NxMcores-<strategy>``. ''
+        is the default strategy, and the serial run case always uses it. If empty, only the default
+        strategy is used.
+    :param decomposition_methods: list of decomposition methods (see :mod:`of.decomposition`). Every parallel
+        configuration is run with every method (and every launch strategy). The method is appended to the
+        strategy in the run case directory name, e.g. ``<case>-NxMcores-scotch``, ``<case>-NxMcores-cyclic.scotch``.
+        If empty, the method of the case is used.
+    :param cells_per_core: if > 0, weak scaling test: the block counts of the case's blockMeshDict are scaled
+        so that every run case has this number of cells per core, and every run case runs blockMesh in its
+        job (see :mod:`of.weak`). The default destination is then ``<case>-weak-scaling-test-...``.
+    :param sweep_spec: the configurations (number of nodes, number of cores) of the scaling test, e.g.
+        ``'powers'`` (the default), ``'geometric:1.5'``, ``'aligned'``, ``'list:1,2,4,7,14,28'``, or ``'adaptive:4'``
+        for extra configurations refining a previous sweep in the destination (see :mod:`of.sweep`).
+    :param estimate_walltime: estimate the walltime of every run case from the timings of earlier (post-processed)
+        sweeps of the case, rather than using ``walltime`` (see :mod:`of.estimate`). Run cases without an
+        estimate use ``walltime``.
+
+    See :func:`run1` for the other parameters.
+    """
+
     if not case:
         case = Path('.').resolve()
     else:
@@ -187,14 +615,29 @@ def run_all( case:str
     if not case.exists():
         raise FileNotFoundError(f"Missing OpenFOAM case folder '{case}'.")
     case_name = case.name
+    if cells_per_core:
+        block_mesh_dict = str(case.resolve() / find_block_mesh_dict(case))
+    else:
+        block_mesh_dict = ''
+    options = RunOptions( staging=staging
+                        , decomposition_cache=str(case.resolve().parent / '.decomposition-cache') if decomposition_cache else ''
+                        , timesteps=timesteps
+                        , warmup=warmup
+                        , seconds_per_step=seconds_per_step
+                        , early_stop=early_stop
+                        , profile=profile
+                        , counters=counters or ''
+                        , cells_per_core=cells_per_core
+                        , block_mesh_dict=block_mesh_dict
+                        )
      
     if not destination:
-        destination = Path(case).parent / f"{case_name}-strong-scaling-test-{NCORESPERNODE[VSC_INSTITUTE_CLUSTER]}.{max_cores_per_node}"
+        scaling = 'weak' if cells_per_core else 'strong'
+        destination = Path(case).parent / f"{case_name}-{scaling}-scaling-test-{NCORESPERNODE[VSC_INSTITUTE_CLUSTER]}.{max_cores_per_node}"
         os.makedirs(destination, exist_ok=True) # just in case this didn't already exist
     else:
         destination = Path(destination)
-        if not case_path.exists():
-            raise FileNotFoundError(f"Missing OpenFOAM case folder '{case}'.")
+        os.makedirs(destination, exist_ok=True)
         
     if verbosity>2:
         print(f"{case=}\n{destination=}\n{openfoam_solver=}\n{max_nodes=}\n{max_cores_per_node=}\n{walltime=}\n{overwrite=}\n{submit=}\n{verbosity=}")
@@ -202,22 +645,80 @@ def run_all( case:str
             print("\nexiting because verbosity >= 5.")
             return
 
-    n_nodes = [1]
-    n_tasks = [ max_cores_per_node ]
-    # single node jobs
-    while n_tasks[0] != 1:
-        n_tasks.insert(0, n_tasks[0] // 2)
-        n_nodes.insert(0, 1)
-    # multi-node jobs
-    while n_nodes[-1] < max_nodes:
-        n_nodes.append(n_nodes[-1] * 2)
-        n_tasks.append(n_tasks[-1] * 2)
+    from of.store import save_sweep_info
+    from of.sweep import sweep
+    from of.estimate import estimate_walltimes
+    from of.launch import parse_strategy, applies, combine
+    save_sweep_info(destination, VSC_INSTITUTE_CLUSTER, MODULES[VSC_INSTITUTE_CLUSTER], openfoam_solver)
+
+    sweep_configurations = sweep( sweep_spec, max_nodes, max_cores_per_node, VSC_INSTITUTE_CLUSTER
+                                , results=destination, case_name=case_name
+                                )
+    n_nodes = [nn for nn, _ in sweep_configurations]
+    n_tasks = [nt for _, nt in sweep_configurations]
+
+    if estimate_walltime:
+        walltimes = estimate_walltimes(case, destination, n_tasks, options)
+        for nt in n_tasks:
+            if nt in walltimes:
+                click.echo(f"Estimated walltime for {nt} cores: {walltime_fmtd(walltimes[nt])}")
+            else:
+                click.secho(f"No timings to estimate the walltime for {nt} cores, using {walltime_fmtd(walltime)}.", fg='blue')
+        options = options._replace(walltimes=walltimes)
         
     if verbosity >= 4:
         print(f"{n_nodes=}")
         print(f"{n_tasks=}")
         
-    for nn, nt in zip(n_nodes, n_tasks):
+    strategies = combine(list(strategies) or [''], list(decomposition_methods) or [''])
+    for strategy in strategies:
+        parse_strategy(strategy) # fail early
+    if packed == 'concurrent':
+        pinned_driver(2, 0) # fail early on clusters without srun pinning
+    configurations = [ (nn, nt, strategy)
+                       for nn, nt in zip(n_nodes, n_tasks)
+                       for strategy in ([''] if nt == 1 else strategies)
+                       if applies(strategy, nt)
+                     ]
+
+    if packed:
+        run_packed(
+            case=case
+          , openfoam_solver=openfoam_solver
+          , destination=destination
+          , n_tasks = [nt for nn, nt, strategy in configurations if nn == 1 and not strategy]
+          , max_tasks_per_node = max_cores_per_node
+          , walltime = walltime
+          , overwrite = overwrite
+          , submit = submit
+          , concurrent = packed == 'concurrent'
+          , verbosity = verbosity
+          , options = options
+        )
+        # packed jobs use their own pinning, other strategies run in jobs of their own
+        configurations = [c for c in configurations if c[0] > 1 or c[2]]
+
+    if array:
+        if not configurations:
+            return
+        run_array(
+            case=case
+          , openfoam_solver=openfoam_solver
+          , destination=destination
+          , n_nodes = [nn for nn, _, _ in configurations]
+          , n_tasks = [nt for _, nt, _ in configurations]
+          , max_tasks_per_node = max_cores_per_node
+          , walltime = walltime
+          , overwrite = overwrite
+          , submit = submit
+          , throttle = throttle
+          , verbosity = verbosity
+          , options = options
+          , strategies = [strategy for _, _, strategy in configurations]
+        )
+        return
+
+    for nn, nt, strategy in configurations:
         # print(nn,nt)
         run1(
             case=case
@@ -230,7 +731,11 @@ def run_all( case:str
           , overwrite = overwrite
           , submit = submit
           , verbosity = verbosity
+          , options = options
+          , strategy = strategy
         )
+
+
 #===================================================================================================
 def run1( case
         , openfoam_solver
@@ -242,6 +747,8 @@ def run1( case
         , overwrite
         , submit
         , verbosity
+        , options=RunOptions()
+        , strategy=''
     ):
     """Create and run an OpenFOAM case on n_nodes nodes with n_tasks MPI tasks.
 
@@ -258,36 +765,97 @@ def run1( case
     :param overwrite: if True, and the case directory already exists in the destination, the case will be
         removed and recreated (previous results will be lost).
     :param submit: if True the job script will be submitted.
+    :param options: :class:`RunOptions` that apply to all run cases of the scaling test.
+    :param strategy: launch strategy (see :mod:`of.launch`), '' for the default.
     :param verbosity: print more output, 
 
     """    
-    
-    if VSC_INSTITUTE_CLUSTER == 'dodrio':
+    run_case = stage( case=case
+                    , openfoam_solver=openfoam_solver
+                    , destination=destination
+                    , n_nodes=n_nodes
+                    , n_tasks=n_tasks
+                    , max_tasks_per_node=max_tasks_per_node
+                    , walltime=walltime
+                    , overwrite=overwrite
+                    , verbosity=verbosity
+                    , options=options
+                    , strategy=strategy
+                    )
+        
+    # Submit the job if submit==True and the case directory does not have a .log file.
+    run_case_jobscript_path = run_case / f'{run_case.name}.slurm'
+    case_log_path = run_case / f'{run_case.name}.log'
+    if submit and not case_log_path.exists():
+        job_id = sbatch(run_case_jobscript_path)
+        if job_id:
+            from of.tracker import record_jobs
+            record_jobs(destination, {run_case.name: job_id})
+    else:
+        msg = "  NOT submitted: "
+        if case_log_path.exists():
+            msg += f'log-file already exists (status: {run_status(run_case)}).'
+        else:
+            msg += "'--submit' not specified."
+        click.secho(msg, fg='red')
+
+
+#===================================================================================================
+def stage( case
+         , openfoam_solver
+         , destination
+         , n_nodes
+         , n_tasks
+         , max_tasks_per_node
+         , walltime
+         , overwrite
+         , verbosity
+         , options=RunOptions()
+         , strategy=''
+    ):
+    """Copy an OpenFOAM case to a run case directory ``<case>-NxMcores[-<strategy>]`` and write its job script.
+
+    See :func:`run1` for the parameters.
+
+    :return: the path of the run case directory.
+    """
+    if VSC_INSTITUTE_CLUSTER == 'dodrio' and not options.cells_per_core:
         # Verify that blockMesh has been run in the case directory.
         p = case / 'constant/polyMesh/points'
         if not p.exists():
             raise RuntimeError("You must run blockMesh in the case directory.")
 
-    run_case_name = f"{case.name}-{n_nodes}x{n_tasks//n_nodes}cores"
-    run_case = destination / run_case_name
-    click.echo('\nPreparing case for for {VSC_INSTITUTE_CLUSTER}:\n  ' + click.style(f"{run_case}", fg='green'))
+    from of.launch import run_case_name
+    name = run_case_name(case.name, n_nodes, n_tasks, strategy)
+    run_case = destination / name
+    click.echo(f'\nPreparing case for {VSC_INSTITUTE_CLUSTER}:\n  ' + click.style(f"{run_case}", fg='green'))
 
-    if overwrite:
-        shutil.rmtree(run_case, ignore_errors=True)
+    restage = False
+    if overwrite and run_case.exists():
+        if options.staging == 'copy':
+            shutil.rmtree(run_case, ignore_errors=True)
+        else:
+            # Keep the links to the read-only parts of the case, remove the results of previous runs
+            remove_artefacts(case, run_case, verbosity=verbosity)
+            restage = True
     
-    run_case_jobscript_path = run_case / f'{run_case_name}.slurm'
-    if not run_case.exists():
-        # Copy the case
-        shutil.copytree(case, run_case)
+    run_case_jobscript_path = run_case / f'{name}.slurm'
+    if restage or not run_case.exists():
+        # Copy the case. A serial run renumbers the mesh in place (renumberMesh -overwrite), so it needs its own copy.
+        # In weak scaling mode every run case generates its own mesh.
+        link_mesh = n_tasks > 1 and not options.cells_per_core
+        stage_case(case, run_case, mode=options.staging, link_mesh=link_mesh, verbosity=verbosity)
 
         # Create and write jobscript
         run_case_jobscript = jobscript( n_nodes=n_nodes
                                       , n_tasks=n_tasks 
                                       , max_tasks_per_node=max_tasks_per_node
-                                      , walltime=walltime
-                                      , case_name=run_case_name
+                                      , walltime=run_case_walltime(walltime, n_tasks, options)
+                                      , case_name=name
                                       , openfoam_solver=openfoam_solver
                                       , verbosity=verbosity
+                                      , options=options
+                                      , strategy=strategy
                                       )
         with open( run_case_jobscript_path, mode='w') as f:
             f.write(run_case_jobscript)
@@ -296,309 +864,202 @@ def run1( case
 
     else:
         click.secho(f"Folder '{run_case}' already exists. (Specify overwrite=True to remove and recreate it)", fg='blue')        
-        
-    # Submit the job if submit==True and the case directory does not have a .log file.
-    case_log_path = run_case / f'{run_case_name}.log'
-    if submit and not case_log_path.exists():
-        cmd = ['sbatch', run_case_jobscript_path.name]
-        print(f'  > {" ".join(cmd)}')
-        subprocess.run(cmd, cwd=run_case)
-        click.secho("  Submitted.", fg='green')
-    else:
-        msg = "  NOT submitted: "
-        if case_log_path.exists():
-            msg += 'log-file already exists.'
-        else:
-            msg += "'--submit' not specified."
-        click.secho(msg, fg='red')
-            
 
-#===================================================================================================
-def get_mean_walltime_per_timestep(file):
-    # print(f"{file=}")
-    if file.is_dir():
-        file = file / (file.name + '.log')
-    
-    if not file.exists():
-        click.secho(f".log file '{file}' not found. Ignoring it.", fg='red')
-        return float('NAN')
-    
-    with open(file) as f:
-        ExecutionTimes = []
-        for line in f:
-            match = re.match(r'ExecutionTime = (\d+(\.\d*)?)', line)
-            if match:
-                w = float(match.group(1))
-                # print(f"    walltime = {w}")
-                ExecutionTimes.append(w)
-                # print(ExecutionTimes)
-        ExecutionTimes = np.array(ExecutionTimes)
-        # OpenFOAM's ExecutionTime is the elapsed time since the start.
-        # Hence, we need to diff and average 
-        time_per_timestep = np.diff(ExecutionTimes)
-        # print(time_per_timestep)
-        mean_walltime_per_timestep = np.mean(time_per_timestep) 
-        # print(mean_walltime_per_timestep)
-    return mean_walltime_per_timestep
+    return run_case
 
 
-#===================================================================================================
-def get_ncells(file):
-    """Read the number of cells from the output. 
+def sbatch(jobscript_path):
+    """Submit a job script, from the directory containing it.
 
-    we are looking for line "Mesh region0 size: 8000000".
-    (The original approach looked for "nCells:" in the blockMesh output. )
+    :return: the job id, or '' if the submission failed.
     """
-    if file.is_dir():
-        file = file / (file.name + '.stdout')
-        
-    if not file.exists():
-        click.secho(f".stdout file '{file}' not found. Ignoring it.", fg='red')
-        return float('NAN')
-    
-    with open(file) as f:
-         for line in f:
-             
-            match = re.match(r'Mesh (\w+) size: (\d+)', line)
-            if match:
-                ncells = int(match.group(2))
-                return ncells 
+    from of.tracker import parse_sbatch
+    cmd = ['sbatch', '--parsable', jobscript_path.name]
+    print(f'  > {" ".join(cmd)}')
+    completed = subprocess.run(cmd, cwd=jobscript_path.parent, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    job_id = parse_sbatch(completed.stdout)
+    if completed.returncode or not job_id:
+        click.secho(f"  Submission failed: {completed.stderr.strip()}", fg='red')
+        return ''
+    click.secho(f"  Submitted (job id {job_id}).", fg='green')
+    return job_id
 
-            match = re.match(r'Mesh size: (\d+)', line)
-            if match:
-                ncells = int(match.group(1))
-                return ncells 
 
-    return float('NAN')
+#===================================================================================================
+def run_array( case
+             , openfoam_solver
+             , destination
+             , n_nodes
+             , n_tasks
+             , max_tasks_per_node
+             , walltime
+             , overwrite
+             , submit
+             , throttle
+             , verbosity
+             , options=RunOptions()
+             , strategies=None
+    ):
+    """Stage all configurations of a sweep and run them as slurm array jobs.
+
+    All run cases are staged as in :func:`run1`, but instead of submitting a job per run case,
+    the run cases that have no .log file yet are submitted as a single array job per number of
+    nodes (all tasks of an array job request the same number of nodes). For a single node sweep
+    that is one ``sbatch`` call.
+
+    :param n_nodes: list with the number of nodes of every configuration.
+    :param n_tasks: list with the number of mpi tasks of every configuration.
+    :param throttle: maximum number of array tasks running simultaneously. 0 means no limit.
+    :param strategies: list with the launch strategy of every configuration. None for the default.
+    
+    See :func:`run1` for the other parameters.
+    """
+    if strategies is None:
+        strategies = len(n_tasks) * ['']
+    pending = {}
+    for nn, nt, strategy in zip(n_nodes, n_tasks, strategies):
+        run_case = stage( case=case
+                        , openfoam_solver=openfoam_solver
+                        , destination=destination
+                        , n_nodes=nn
+                        , n_tasks=nt
+                        , max_tasks_per_node=max_tasks_per_node
+                        , walltime=walltime
+                        , overwrite=overwrite
+                        , verbosity=verbosity
+                        , options=options
+                        , strategy=strategy
+                        )
+        if (run_case / f'{run_case.name}.log').exists():
+            click.secho(f"  Not included in array job: log-file already exists (status: {run_status(run_case)}).", fg='red')
+        else:
+            pending.setdefault(nn, []).append((nt, run_case.name, strategy))
+
+    for nn, configurations in pending.items():
+        job_name = f"{case.name}-{nn}nodes-array"
+        script = array_jobscript( n_nodes=nn
+                                , n_tasks=[nt for nt, _, _ in configurations]
+                                , max_tasks_per_node=max_tasks_per_node
+                                , walltime=max(walltime_hours(run_case_walltime(walltime, nt, options)) for nt, _, _ in configurations)
+                                , case_names=[name for _, name, _ in configurations]
+                                , openfoam_solver=openfoam_solver
+                                , job_name=job_name
+                                , throttle=throttle
+                                , verbosity=verbosity
+                                , options=options
+                                , strategies=[strategy for _, _, strategy in configurations]
+                                )
+        jobscript_path = destination / f'{job_name}.slurm'
+        with open(jobscript_path, mode='w') as f:
+            f.write(script)
+        click.echo(f'\nArray job script for {len(configurations)} run cases on {nn} node(s):\n  '
+                   + click.style(f"{jobscript_path}", fg='green'))
+        if submit:
+            job_id = sbatch(jobscript_path)
+            if job_id:
+                from of.tracker import record_jobs
+                # the array task ids are the indices in the list of run cases
+                record_jobs(destination, {name: f"{job_id}_{i}" for i, (_, name, _) in enumerate(configurations)})
+        else:
+            click.secho("  NOT submitted: '--submit' not specified.", fg='red')
 
 
 #===================================================================================================
-def postprocess( case, results, clean, verbosity):
-    """Postprocess strong scaling test results.
+def run_packed( case
+              , openfoam_solver
+              , destination
+              , n_tasks
+              , max_tasks_per_node
+              , walltime
+              , overwrite
+              , submit
+              , concurrent
+              , verbosity
+              , options=RunOptions()
+    ):
+    """Stage single node configurations and run them inside a single node allocation.
+
+    All run cases are staged as in :func:`run1`. The run cases that have no .log file yet are run by
+    a single job (see :func:`packed_jobscript`).
+
+    :param n_tasks: list with the number of mpi tasks of every (single node) configuration.
+    :param concurrent: run configurations simultaneously on non-overlapping sets of cores.
+
+    See :func:`run1` for the other parameters.
     """
-    
-    try:
-        np      
-    except NameError:
-        print('Numpy must be available for post-processing.')
-        sys.exit(1)
-    
-    results = Path(results).resolve()
-    
-    if not case:
-        results_name = results.name
-        pattern = r"(\w+)-strong-scaling-test-(\d+).(\d+)"
-        m = re.match(pattern, results_name)
-        if m:
-            case = m[1]
+    pending = []
+    for nt in n_tasks:
+        run_case = stage( case=case
+                        , openfoam_solver=openfoam_solver
+                        , destination=destination
+                        , n_nodes=1
+                        , n_tasks=nt
+                        , max_tasks_per_node=max_tasks_per_node
+                        , walltime=walltime
+                        , overwrite=overwrite
+                        , verbosity=verbosity
+                        , options=options
+                        )
+        if (run_case / f'{run_case.name}.log').exists():
+            click.secho(f"  Not included in packed job: log-file already exists (status: {run_status(run_case)}).", fg='red')
         else:
-            pattern = r'(\w+)-(\d+)x(\d+)cores'
-            m = re.match(pattern, results_name)
-            if m:
-                case = m[1]
-            else:
-                raise ValueError(f"Unable to extract case name from results directory {results}")    
-    
-    if verbosity:
-        print(f"{case=}")
-        
-    if not results.exists():
-        raise FileNotFoundError(results)
-    
-    # Gather the results
-    cases = {}
-    n_cores = []
-    Dir = namedtuple('Dir', ['name', 'n_nodes', 'n_tasks'])
-    
-    # <results> may be 
-    #   . a results directory, containing several executed cases, or 
-    #   . a result directory, i.e. a single executed case
-    s = r'(\w+)-(\d+)x(\d+)cores'
-    m = re.match(s, str(results.name))
-    if m:
-        # a (single) result directory
-        single_result = True
-        case = m[1]
-        if not case in cases:
-            cases[case] = []
-        cases[case].append(Dir( results.name, int(m[2]),  int(m[2]) * int(m[3]) ))
-    
+            pending.append((nt, run_case.name))
+    if not pending:
+        return
+
+    job_name = f"{case.name}-packed"
+    script = packed_jobscript( n_tasks=[nt for nt, _ in pending]
+                             , max_tasks_per_node=max_tasks_per_node
+                             , walltime=walltime
+                             , case_names=[name for _, name in pending]
+                             , openfoam_solver=openfoam_solver
+                             , job_name=job_name
+                             , concurrent=concurrent
+                             , verbosity=verbosity
+                             , options=options
+                             )
+    jobscript_path = destination / f'{job_name}.slurm'
+    with open(jobscript_path, mode='w') as f:
+        f.write(script)
+    click.echo(f'\nPacked job script for {len(pending)} run cases on a single node:\n  '
+               + click.style(f"{jobscript_path}", fg='green'))
+    if submit:
+        job_id = sbatch(jobscript_path)
+        if job_id:
+            from of.tracker import record_jobs
+            record_jobs(destination, {name: job_id for _, name in pending})
     else:
-        single_result = False
-        # Pick up the case directories.
-        for item in results.glob('*'):
-            if item.is_dir():
-                m = re.match(s, str(item.name))
-                if m:
-                    case = m[1]
-                    if not case in cases:
-                        cases[case] = []
-                    cases[case].append(Dir( item.name, int(m[2]),  int(m[2]) * int(m[3]) ))
-                    if clean and has_completed(item,verbosity=verbosity):
-                        count = -1
-                        for dir in  item.glob('processor*'):
-                            if count == -1:
-                                print(f"\nRemoving directories 'processor*' in {str(item)} ...")
-                                count = 0
-                            if verbosity>1:
-                                print(f"Removing directory {str(dir.name)}")
-                                count += 1
-                            shutil.rmtree(dir)
-                        if verbosity>1:
-                            if count:
-                                print(f"  Removed {count} 'processor*' directories.")
-                            else:
-                                print("  None found.")
-
-    if verbosity>1:
-        print("\nCases:")
-        pp = pprint.PrettyPrinter(indent=2)
-        pp.pprint(cases)
-    
-    for case, dirs in cases.items():
-        n_nodes = np.array([dir.n_nodes for dir in dirs])
-        n_cores = np.array([dir.n_tasks for dir in dirs])
-        
-        dirs = np.array([dir.name for dir in dirs])
-        p = n_cores.argsort()
-        n_nodes = n_nodes[p]
-        n_cores = n_cores[p]
-        dirs = dirs[p]
-        
-        walltimes = []
-        n_cells = []
-        for dir in dirs:
-            # print(f"{dir=}")
-            if single_result:
-                pdir = results
-            else:
-                pdir = results / dir
-            walltimes.append(get_mean_walltime_per_timestep(pdir))
-            n_cells.append(get_ncells(pdir))
-        print("??", n_cells)
-        n_cells = np.array(n_cells)
-        walltimes = np.array(walltimes)
-        cpu_times = walltimes * n_cores
-        cells_per_core = n_cells / n_cores
-        speedup = walltimes[0]/walltimes
-        parallel_efficiency = speedup/n_cores
-        
-        max_cores_per_nodes = n_cores[-1]//n_nodes[-1]
-        d = {            
-            '# nodes' : n_nodes
-          , '# cores' : n_cores
-          , 'walltime per timestep' : walltimes
-          , 'cpu_time per timestep' : cpu_times
-          , 'cells per core' : cells_per_core
-          , 'speedup' : speedup
-          , 'parallel efficiency' : parallel_efficiency
-          , 'max_cores_per_nodes' : max_cores_per_nodes
-        }
-    
-        # print to string
-        output = io.StringIO()
-        line = 69*'-'
-        print(line, file=output)
-        title = f"{results_name} (on {VSC_INSTITUTE_CLUSTER})"
-        print(f"{title:^69}", file=output)
-        print(line, file=output)
-        print(f"{     ' ':>10}{     ' ':>10}{'walltime':>10}{'cpu_time':>10}{'#cells':>10}{      ' ':>8}{         ' ':>11}"  , file=output)
-        print(f"{     ' ':>10}{     ' ':>10}{     'per':>10}{     'per':>10}{   'per':>10}{      ' ':>8}{  'parallel':>11}"  , file=output)
-        print(f"{'#nodes':>10}{'#cores':>10}{'timestep':>10}{'timestep':>10}{  'core':>10}{'speedup':>8}{'efficiency':>11}\n", file=output)
-        for i in range(len(n_cores)):
-            print(f"{n_nodes[i]:>10}{n_cores[i]:>10}{walltimes[i]:>10.3f}{cpu_times[i]:>10.3f}{cells_per_core[i]:>10.0f}{speedup[i]:>8.1f}{parallel_efficiency[i]:>11.3f}", file=output)
-        print(line, file=output)
-        print(f"Maximum number of cores per node: {d['max_cores_per_nodes']}/{NCORESPERNODE[VSC_INSTITUTE_CLUSTER]}", file=output)
-        
-        # print to stdout
-        print()
-        print(output.getvalue())
-        
-        # print to file
-        with open(results / (results_name + ".parallel_efficiency.txt"), mode='w') as f:
-            print(output.getvalue(), file=f)
-        
-        if single_result:
-            return
-        
-        # Produce plot and save .png
-        for i in range(len(parallel_efficiency)):
-            if math.isnan(parallel_efficiency[i]):
-                parallel_efficiency[i] = 0
-        try:
-            pyplot
-        except NameError:
-            print('Matplotlib must be available for further post-processing.')
-            sys.exit(1)
-        
-        fig = pyplot.figure()
-        ax1 = fig.add_subplot(111)
-        ax2 = ax1.twiny()
-        
-        ax1.plot(n_cores, parallel_efficiency, 'o-')
-        ax1.set_title(title)
-        ax1.set_xlabel('# cores')
-        ax1.set_ylabel('parallel efficiency')
-        # ax1.set_axis([0, n_cores[-1], 0, 1])
-        ax1.set_xscale('log')
-        ax2_tick_resultss = n_cores
-
-        def tick_function(ncores):
-            labels = []
-            for i in range(len(ncores)):
-                label = f'{n_nodes[i]}/{ncores[i]}'
-                labels.append(label)
-            return labels
-
-        ax2.set_xscale('log')
-        ax2.set_xlim(ax1.get_xlim())
-        ax2.set_xticks(ax2_tick_resultss)
-        ax2.set_xticklabels(tick_function(ax2_tick_resultss))
-        
-        for i in range(len(cells_per_core)):
-            ax2.plot( [n_cores[i], n_cores[i]], [0,1])
-            if math.isnan(cells_per_core[i]):
-                cpc = "NAN" 
-            else:
-                cpc = int(cells_per_core[i])
-            pyplot.text(n_cores[i],0,f'{cpc} cells/core', rotation=90)
-        
-        pyplot.savefig(str(results / (results_name + ".parallel_efficiency.png")), dpi=200)
-        pyplot.show()
+        click.secho("  NOT submitted: '--submit' not specified.", fg='red')
+
 
-    return d
-    
-    
 #===================================================================================================
 def has_completed(run_case, verbosity=0):
     """Check if this run_case directory has completed. 
     
     This is tested by looking for the text
-    "End(\s+)\Z" if it is a single core simulation,
-    "End(\s+)Finalising parallel run(\s+)\Z" if it is a multi-core or multi-node simulation
-    at the end of the .log file
+    "End" if it is a single core simulation,
+    "End", "Finalising parallel run" if it is a multi-core or multi-node simulation
+    at the end of the .log file. Only the tail of the .log file is read (see :func:`run_status`).
     """
-    run_case_name = run_case.name
-    run_case_log = run_case / (run_case_name + '.log')
-    
-    if not run_case_log.exists():
-        return False
-    
-    with open(run_case_log, "r") as f:
-        text = f.read()
-        
-    if '1x1'in run_case_name:
-        pattern = r"End(\w+)\Z"
-    else:
-        pattern = r"End(\s+)Finalising parallel run(\s+)\Z"
-    
-    m = re.match(pattern, text) 
-    b = bool(m)
+    b = run_status(run_case) is RunStatus.COMPLETED
     if verbosity > 3:
-        print(f"{run_case=} has completed.")
+        print(f"{run_case=} has completed: {b}.")
     return b
         
         
+#===================================================================================================
+_POST = ( 'get_mean_walltime_per_timestep', 'get_ncells', 'remove_processor_dirs', 'map_run_cases'
+        , 'postprocess'
+        )
+
+def __getattr__(name):
+    """Import the post-processing functions (and numpy and matplotlib) lazily."""
+    if name in _POST:
+        from of import post
+        return getattr(post, name)
+    raise AttributeError(f"module 'of' has no attribute '{name}'")
+
+
 #===================================================================================================
 # code below just for quick testing
 
@@ -613,6 +1074,7 @@ if __name__ == "__main__":
     dest_path = (Path(case) / '..' / f'{case_path.name}-strong-scaling-test')
 
     if pp:
+        from of.post import postprocess
         postprocess(dest_path)
     else:
         run_all( case=case_path
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module of.accounting
+====================
+
+Slurm accounting of the jobs of a scaling test: energy, memory and cpu efficiency.
+
+The job ids of the submitted run cases are recorded by :func:`of.sbatch` (see :mod:`of.tracker`).
+Post-processing asks ``sacct --parsable2`` for the accounting of all finished jobs at once, and
+stores it in the :class:`~of.scanner.CaseRecord` of each run case (and thus in the cache, see
+:mod:`of.cache`), so every job is queried only once:
+
+* ``Elapsed``, ``TotalCPU`` and ``AllocCPUS`` of the job give the core hours and the cpu efficiency
+  ``TotalCPU / (Elapsed * AllocCPUS)``,
+* ``ConsumedEnergyRaw`` (the ``ConsumedEnergy`` in joules, without unit suffix) of the job is the
+  energy of the whole job. It is only available if the cluster has energy accounting enabled,
+* ``MaxRSS`` and ``AveCPU`` of the job steps. The solver runs in its own job step, with one task per
+  MPI rank, so the largest ``MaxRSS`` of the numbered job steps is the memory of the largest rank.
+  The batch step (with the serial pre-processing) is only used if there are no numbered steps
+  (e.g. for ``mympirun``).
+
+Run cases that were packed in a single job (see :func:`of.run_packed`) share their job, and are
+left out.
+"""
+
+import re
+import math
+import subprocess
+from collections import Counter
+
+from of.tracker import TERMINAL_STATES
+
+#===================================================================================================
+SACCT_FIELDS = ('JobID', 'State', 'Elapsed', 'TotalCPU', 'AveCPU', 'MaxRSS', 'ConsumedEnergyRaw', 'AllocCPUS')
+"""The fields queried from sacct, in this order."""
+
+_DURATION = re.compile(r'(?:(\d+)-)?(?:(\d+):)?(\d+):(\d+(?:\.\d*)?)')
+_SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024**2, 'G': 1024**3, 'T': 1024**4}
+
+NAN = float('NAN')
+
+
+#===================================================================================================
+def parse_duration(s):
+    """Seconds in a slurm duration ``[D-][HH:]MM:SS[.mmm]``, NAN if there is none."""
+    m = _DURATION.fullmatch(s.strip())
+    if not m:
+        return NAN
+    days, hours, minutes, seconds = m.groups()
+    return ((int(days or 0) * 24 + int(hours or 0)) * 60 + int(minutes)) * 60 + float(seconds)
+
+
+def parse_size(s):
+    """Bytes in a slurm memory size, e.g. ``'1234K'``, ``'1.5G'``, NAN if there is none."""
+    m = re.fullmatch(r'(\d+(?:\.\d*)?)([KMGT]?)', s.strip())
+    if not m:
+        return NAN
+    return float(m[1]) * _SIZE_UNITS[m[2]]
+
+
+def _number(s):
+    try:
+        return float(s)
+    except ValueError:
+        return NAN
+
+
+def parse_sacct(output):
+    """Parse the output of ``sacct --noheader --parsable2 --format=<SACCT_FIELDS>``.
+
+    :return: dict mapping the job ids to their accounting, a dict with the ``'state'``, ``'elapsed'`` and
+        ``'total_cpu'`` (seconds) and ``'alloc_cpus'`` of the job, the ``'energy'`` (joules, NAN if not
+        measured), and the largest ``'max_rss'`` (bytes) and ``'ave_cpu'`` (seconds) of the job steps
+        (see the module documentation).
+    """
+    jobs = {}
+    steps = {}
+    for line in output.splitlines():
+        fields = line.strip().split('|')
+        if len(fields) < len(SACCT_FIELDS):
+            continue
+        values = dict(zip(SACCT_FIELDS, fields))
+        job_id, _, step = values['JobID'].partition('.')
+        if not step:
+            jobs[job_id] = { 'state': (values['State'].split() or [''])[0]
+                           , 'elapsed': parse_duration(values['Elapsed'])
+                           , 'total_cpu': parse_duration(values['TotalCPU'])
+                           , 'alloc_cpus': int(values['AllocCPUS']) if values['AllocCPUS'].isdigit() else 0
+                           , 'energy': _number(values['ConsumedEnergyRaw'])
+                           }
+        else:
+            steps.setdefault(job_id, []).append(( step.isdigit()
+                                                , parse_size(values['MaxRSS'])
+                                                , parse_duration(values['AveCPU'])
+                                                , _number(values['ConsumedEnergyRaw'])
+                                                ))
+    for job_id, accounting in jobs.items():
+        job_steps = steps.get(job_id, [])
+        numbered = [s for s in job_steps if s[0]]
+        job_steps = numbered or [s for s in job_steps if not s[0]]
+        accounting['max_rss'] = max((s[1] for s in job_steps if not math.isnan(s[1])), default=NAN)
+        accounting['ave_cpu'] = max((s[2] for s in job_steps if not math.isnan(s[2])), default=NAN)
+        if not accounting['energy'] > 0:
+            # older slurm versions only report the energy of the steps
+            energies = [s[3] for s in steps.get(job_id, []) if s[3] > 0]
+            accounting['energy'] = max(energies) if energies else NAN
+    return jobs
+
+
+def query_accounting(job_ids):
+    """The accounting of a list of jobs, with a single sacct call.
+
+    :return: dict mapping the job ids to their accounting (see :func:`parse_sacct`). Jobs that sacct does
+        not know are missing. Empty if sacct is not available.
+    """
+    if not job_ids:
+        return {}
+    cmd = [ 'sacct', '--noheader', '--parsable2', f"--format={','.join(SACCT_FIELDS)}"
+          , f"--jobs={','.join(sorted(job_ids))}"
+          ]
+    try:
+        completed = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    except FileNotFoundError:
+        return {}
+    if completed.returncode:
+        return {}
+    return parse_sacct(completed.stdout)
+
+
+def update_accounting(run_cases, records, jobs, cache=None):
+    """Add the accounting of their finished jobs to the records of run cases that do not have it yet.
+
+    :param list run_cases: the run case directories.
+    :param list records: the :class:`~of.scanner.CaseRecord` of the run cases, updated in place.
+    :param dict jobs: the job ids of the run cases, by name (see :func:`of.tracker.load_jobs`).
+    :param dict cache: cache entries of the run cases, by name (see :mod:`of.cache`), updated in place.
+    :return: the number of records updated.
+    """
+    shared = {job_id for job_id, count in Counter(jobs.values()).items() if count > 1}
+    wanted = { run_case.name: jobs[run_case.name] for run_case, record in zip(run_cases, records)
+               if not record.accounting and jobs.get(run_case.name) and jobs[run_case.name] not in shared
+             }
+    accounting = query_accounting(set(wanted.values()))
+    updated = 0
+    for run_case, record in zip(run_cases, records):
+        a = accounting.get(wanted.get(run_case.name))
+        if a is None or a['state'] not in TERMINAL_STATES:
+            continue
+        record.accounting = a
+        if cache and run_case.name in cache:
+            cache[run_case.name]['record']['accounting'] = a
+        updated += 1
+    return updated
+
+
+#===================================================================================================
+def cpu_efficiency(accounting):
+    """The cpu time of a job divided by its allocated core time, NAN if unknown."""
+    if not accounting or not accounting['elapsed'] or not accounting['alloc_cpus']:
+        return NAN
+    return accounting['total_cpu'] / (accounting['elapsed'] * accounting['alloc_cpus'])
+
+
+def core_hours(accounting):
+    """The core hours allocated to a job, NAN if unknown."""
+    if not accounting or not accounting['alloc_cpus']:
+        return NAN
+    return accounting['elapsed'] * accounting['alloc_cpus'] / 3600
+
+
+def energy_per_timestep(accounting, walltime_per_timestep):
+    """The energy to solution per timestep in joules: the mean power of the job times the walltime per timestep.
+
+    Unlike the energy divided by the number of timesteps, this leaves out the energy of the pre-processing
+    and of the start up of the solver.
+    """
+    if not accounting or not accounting['elapsed']:
+        return NAN
+    return accounting['energy'] / accounting['elapsed'] * walltime_per_timestep
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module of.cache
+===============
+
+Persistent, incremental cache of the scanned run case records of a results directory.
+
+The cache is a JSON file ``<results>/<results.name>.cache.json``. For every run case it stores the
+:class:`~of.scanner.CaseRecord` together with the size, modification time, inode and a checksum of
+the first :data:`HEAD_SIZE` bytes of the .log and .stdout files at the time of the scan:
+
+* if none of the files changed, the cached record is used as is,
+* if the files only grew (same inode, larger size, later modification time, same first bytes),
+  scanning resumes at the byte offsets in the record, i.e. only the new part of the files is read.
+  The checksum detects a file that was rewritten (e.g. after ``--overwrite``) and got the inode of
+  the old file,
+* otherwise (file replaced, truncated or removed) the run case is scanned from scratch.
+"""
+
+import os
+import json
+import hashlib
+import dataclasses
+from pathlib import Path
+
+from of.scanner import CaseRecord, scan_case
+
+#===================================================================================================
+CACHE_VERSION = 6
+"""Increment this when the layout of :class:`~of.scanner.CaseRecord` or of the cache entries changes, to
+invalidate old caches."""
+
+HEAD_SIZE = 4096
+"""Number of bytes at the start of a file whose checksum is cached."""
+
+
+def cache_path(results):
+    """Path of the cache file of a results directory."""
+    results = Path(results)
+    return results / (results.name + '.cache.json')
+
+
+def load_cache(results):
+    """Load the cache of a results directory.
+
+    :return: dict mapping run case names to cache entries. Empty if there is no (valid) cache.
+    """
+    try:
+        with open(cache_path(results)) as f:
+            cache = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if cache.get('version') != CACHE_VERSION:
+        return {}
+    return cache['run_cases']
+
+
+def save_cache(results, run_cases):
+    """Save the cache of a results directory.
+
+    The file is written to a temporary file first, and then renamed, so that an interrupted
+    run never leaves a corrupt cache behind.
+    """
+    path = cache_path(results)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, mode='w') as f:
+        json.dump({'version': CACHE_VERSION, 'run_cases': run_cases}, f)
+    os.replace(tmp, path)
+
+
+#===================================================================================================
+def _head_checksum(path, size):
+    """Checksum of the first ``size`` bytes of a file."""
+    with open(path, mode='rb') as f:
+        return hashlib.sha1(f.read(size)).hexdigest()
+
+
+def file_stat(path):
+    """The size, modification time, inode and checksum of the first :data:`HEAD_SIZE` bytes of a file,
+    or None if it does not exist.
+    """
+    try:
+        st = os.stat(path)
+        head = _head_checksum(path, min(st.st_size, HEAD_SIZE))
+    except FileNotFoundError:
+        return None
+    return {'size': st.st_size, 'mtime': st.st_mtime_ns, 'inode': st.st_ino, 'head': head}
+
+
+def _has_grown(old, new, path):
+    """True if the file ``path`` described by ``new`` is the file described by ``old`` with data appended."""
+    if old is None:
+        return True
+    if new is None:
+        return False
+    if new['inode'] != old['inode'] or new['size'] < old['size'] or new['mtime'] < old['mtime']:
+        return False
+    head_size = min(old['size'], HEAD_SIZE)
+    if head_size == min(new['size'], HEAD_SIZE):
+        return new['head'] == old['head']
+    try:
+        return _head_checksum(path, head_size) == old['head']
+    except FileNotFoundError:
+        return False
+
+
+def scan_case_cached(run_case, entry=None, verbosity=0):
+    """Scan a run case, reusing the cache entry of a previous scan where possible.
+
+    :param Path run_case: the run case directory ``<case>-NxMcores``.
+    :param dict entry: the cache entry of the run case, or None.
+    :return: the :class:`~of.scanner.CaseRecord` and the new cache entry.
+    """
+    run_case = Path(run_case)
+    paths = { 'log'   : run_case / (run_case.name + '.log')
+            , 'stdout': run_case / (run_case.name + '.stdout')
+            }
+    stats = {file: file_stat(path) for file, path in paths.items()}
+    record = None
+    if entry:
+        old = entry['stats']
+        if stats == old:
+            if verbosity > 2:
+                print(f"{run_case.name}: unchanged, using cached record.")
+            return CaseRecord(**entry['record']), entry
+        if all(_has_grown(old[file], stats[file], paths[file]) for file in stats):
+            if verbosity > 2:
+                print(f"{run_case.name}: resuming scan.")
+            record = CaseRecord(**entry['record'])
+
+    record = scan_case(run_case, record=record, verbosity=verbosity)
+    return record, {'stats': stats, 'record': dataclasses.asdict(record)}
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Command line interface sst-compare (no sub-commands)."""
+
+import sys
+
+try:
+    import of.store
+except ModuleNotFoundError:
+    # pick up the path from __file__
+    from pathlib import Path
+    p = str(Path(__file__).parent.parent)
+    sys.path.insert(0,p)
+    import of.store
+
+import click
+
+@click.command()
+@click.option('--where', '-w', multiple=True
+             , help="Only the scaling tests with tag 'name=pattern', e.g. 'case=cavity', 'openfoam=v22*'. "
+                    "The pattern may contain the wildcards * and ?. May be repeated."
+             )
+@click.option('--by', '-b', multiple=True
+             , help="The tags whose values distinguish the curves, e.g. 'cluster', 'openfoam'. May be repeated. "
+                    "Default is 'cluster'."
+             )
+@click.option('--metric', '-m', default='efficiency', type=click.Choice(list(of.store.METRICS))
+             , help='The quantity compared. Default is efficiency.'
+             )
+@click.option('--variant', default=''
+             , help='The launch strategy (and decomposition method) of the run cases. Default is the default strategy.'
+             )
+@click.option('--plot', '-p', default=''
+             , help='Overlay the curves in a .png file with this name.'
+             )
+@click.option('--list', 'list_', is_flag=True, default=False
+             , help='List the scaling tests in the results store and their tags.'
+             )
+@click.option('--store', default=''
+             , help='Path of the results store. Default is $SST_STORE, or ~/.sst-results.sqlite.'
+             )
+def main(where, by, metric, variant, plot, list_, store):
+    """Command line interface sst-compare.
+
+    Compare the scaling tests in the results store (written by sst-post) across clusters, OpenFOAM
+    versions, solvers, cases, meshes or any other tag.
+    """
+    where = of.store.parse_tags(where)
+    if list_:
+        for results, tags, n_runs in of.store.list_sweeps(where, path=store or None):
+            click.echo(f"{results} ({n_runs} run cases)")
+            click.echo('    ' + ', '.join(f"{name}={value}" for name, value in tags.items()))
+        return
+    by = list(by) or ['cluster']
+    curves = of.store.query(where, by=by, metric=metric, variant=variant, path=store or None)
+    if not curves:
+        click.secho("No matching run cases in the results store.", fg='red')
+        return
+    of.store.print_comparison(curves, by, metric)
+    if plot:
+        of.store.plot_comparison(curves, by, metric, plot)
+
+if __name__ == "__main__":
+    sys.exit(main())  # pragma: no cover
+#eof
@@ -29,16 +29,72 @@ import click
 @click.option('--clean/--no-clean', is_flag=True, default=True
              , help='Remove processor* directories to free disk space. Default is True.'
              )
+@click.option('--jobs', '-j', default=1
+             , help='Number of worker processes for parsing the logs and removing processor* directories. '
+                    '0 uses all available cores. Default is 1.'
+             )
+@click.option('--cache/--no-cache', is_flag=True, default=True
+             , help='Reuse the parsed logs of previous runs, and only parse new or grown logs. Default is True.'
+             )
+@click.option('--warmup', default=0
+             , help='Number of timesteps at the start of every run case excluded from the timings. Default is 0.'
+             )
+@click.option('--exclude-outliers/--keep-outliers', is_flag=True, default=True
+             , help='Exclude slow timesteps (field output, interference from other jobs) from the timings. '
+                    'Default is to exclude them.'
+             )
+@click.option('--efficiency-floor', default=0.7
+             , help='Minimum parallel efficiency of the recommended core count, the fastest one according to the '
+                    'fitted scaling models. Default is 0.7.'
+             )
+@click.option('--predict-nodes', default=0
+             , help='Largest number of nodes for which the scaling models predict the walltime per timestep. '
+                    'Default is 0: 4 times the largest number of nodes measured.'
+             )
+@click.option('--record/--no-record', is_flag=True, default=True
+             , help='Add the run cases to the central results store, for sst-compare. Default is True.'
+             )
+@click.option('--store', default=''
+             , help='Path of the results store. Default is $SST_STORE, or ~/.sst-results.sqlite.'
+             )
+@click.option('--tag', '-t', multiple=True
+             , help="Extra tag 'name=value' of the scaling test in the results store. May be repeated."
+             )
+@click.option('--baseline', '-b', default=''
+             , help="Compare the walltimes of the timesteps with a baseline: a results directory, or a query "
+                    "'tag=pattern,...' of the results store, e.g. 'cluster=vaughan,openfoam=v2012*'. Exits with "
+                    "status 1 if there are regressions, and 2 if no configuration could be compared."
+             )
+@click.option('--regression-threshold', default=0.05
+             , help='Relative increase of the median walltime per timestep that is a regression. Default is 0.05.'
+             )
+@click.option('--alpha', default=0.01
+             , help='Significance level of the Mann-Whitney U test of the comparison with the baseline. Default is 0.01.'
+             )
 @click.option('--verbosity', '-v', count=True, default=0
              , help="The verbosity of the program."
              )
-def main(case, results, clean, verbosity):
+def main( case, results, clean, jobs, cache, warmup, exclude_outliers, efficiency_floor, predict_nodes
+        , record, store, tag, baseline, regression_threshold, alpha, verbosity
+        ):
     """Command line interface sst_post.
     
     Post-process a strong scaling test.
     """
 
-    of.postprocess(case=case, results=results, clean=clean, verbosity=verbosity)    
+    d = of.postprocess(case=case, results=results, clean=clean, verbosity=verbosity, jobs=jobs, use_cache=cache
+                      , warmup=warmup, exclude_outliers=exclude_outliers
+                      , efficiency_floor=efficiency_floor, predict_nodes=predict_nodes
+                      , record=record, store=store or None, tags=tag
+                      , baseline=baseline, regression_threshold=regression_threshold, alpha=alpha
+                      )
+    if baseline:
+        if not d or not d['comparisons']:
+            click.secho(f"No configuration could be compared with the baseline '{baseline}'.", fg='red')
+            sys.exit(2)
+        if d['regressions']:
+            click.secho(f"{d['regressions']} regression(s) with respect to the baseline '{baseline}'.", fg='red')
+            sys.exit(1)
 
 if __name__ == "__main__":
     sys.exit(main())  # pragma: no cover
@@ -26,7 +26,8 @@ import click
              )
 @click.option('--destination', '-d', default=''
              , help="Location where case is copied to. Default is the parent of the --case directory, "
-                    "in which case the directory is named '{case.name}-strong-scaling-test[-{postfix}]'."
+                    "in which case the directory is named '{case.name}-strong-scaling-test[-{postfix}]' "
+                    "(or '{case.name}-weak-scaling-test[-{postfix}]' with --cells-per-core)."
              )
 @click.option('--max-nodes', '-n', default=1
              , help='maximum number of nodes requested. Job are created for 1 node, 2 nodes, 4 nodes, ... '
@@ -47,21 +48,117 @@ import click
              , help='If True, submit all cases that have no .log file. This includes newly created cases, '
                     'overwritten cases and cases for which the log file has been deleted manually.'
              )
+@click.option('--array/--no-array', is_flag=True, default=False
+             , help='Submit the run cases as slurm array jobs, one array job per number of nodes, '
+                    'rather than a job per run case.'
+             )
+@click.option('--throttle', default=0
+             , help='Maximum number of array tasks running simultaneously (--array=...%K). '
+                    'Default is 0, no limit.'
+             )
+@click.option('--packed', type=click.Choice(['sequential', 'concurrent']), default=None
+             , help='Run all single node configurations inside a single node allocation, one after the other '
+                    "('sequential'), or simultaneously on non-overlapping sets of cores ('concurrent'). "
+                    'Concurrent runs save time, but interfere with each other (memory bandwidth, caches), '
+                    "and are not available on dodrio (mympirun)."
+             )
+@click.option('--staging', type=click.Choice(['copy', 'symlink', 'hardlink']), default='copy'
+             , help="How the case is staged in the run case directories. 'symlink' and 'hardlink' link the "
+                    "read-only parts (constant/polyMesh, constant/*Properties) instead of copying them, "
+                    "and --overwrite then only removes the per-run artefacts. Default is 'copy'."
+             )
+@click.option('--decomposition-cache/--no-decomposition-cache', is_flag=True, default=False
+             , help='Reuse decomposed and renumbered meshes (processor* directories) of run cases with the same '
+                    "mesh, initial fields and decomposeParDict. They are cached in '.decomposition-cache' "
+                    'next to the case directory. Default is False.'
+             )
+@click.option('--timesteps', type=int, default=0
+             , help='Benchmark mode: rewrite the controlDict of every run case to stop after WARMUP + TIMESTEPS '
+                    'timesteps and write no fields. Default is 0, run the case as specified by its controlDict.'
+             )
+@click.option('--warmup', type=int, default=0
+             , help='Number of extra timesteps in benchmark mode, excluded from the timings. Default is 0.'
+             )
+@click.option('--seconds-per-step', type=float, default=0.
+             , help='Benchmark mode: estimate of the walltime per timestep of the serial run. If specified, '
+                    'the walltime of every run case is computed from it, overriding --walltime.'
+             )
+@click.option('--early-stop', type=float, default=0.
+             , help='Stop every run as soon as the relative width of the 95% confidence interval of its walltime '
+                    'per timestep (ignoring the --warmup timesteps) is below this value, e.g. 0.02. '
+                    'Default is 0, run until the endTime.'
+             )
+@click.option('--profile/--no-profile', is_flag=True, default=False
+             , help="Switch OpenFOAM's profiling on in every run case. sst-post then reports the hot spots. "
+                    'The fields are written at the end of the run, because the profiling is written with them. '
+                    'Default is False.'
+             )
+@click.option('--counters', type=click.Choice(['auto', 'perf', 'likwid']), default=None
+             , help='Measure hardware performance counters (cycles, instructions, memory traffic) of the solver '
+                    "with perf stat (per rank) or likwid-perfctr (per node). 'auto' uses likwid if it is available. "
+                    'sst-post reports IPC and memory bandwidth.'
+             )
+@click.option('--strategies', default=''
+             , help="Comma separated list of launch strategies, e.g. 'default,cyclic.bind-cores,block.bind-cores'. "
+                    'Every configuration is run with every strategy, in a run case directory <case>-NxMcores-<strategy>. '
+                    "Tokens: block, cyclic, dist-<a>-<b>[-<c>], bind-<value>, hybrid, universe, omp<N> "
+                    "(see of.launch). 'default' is the default launcher."
+             )
+@click.option('--decomposition', default=''
+             , help="Comma separated list of decomposition methods, e.g. 'scotch,hierarchical,simple,kahip'. "
+                    'Every configuration (and launch strategy) is run with every method, replacing the method '
+                    "in system/decomposeParDict. 'default' is the method of the case. sst-post then reports "
+                    'the load imbalance and the processor faces of every decomposition.'
+             )
+@click.option('--cells-per-core', type=int, default=0
+             , help='Weak scaling test with this number of cells per core: every run case scales the cell counts of '
+                    "the blocks in the case's blockMeshDict, and runs blockMesh in its job, before the decomposition. "
+                    'Default is 0, strong scaling test of the mesh of the case.'
+             )
+@click.option('--sweep', default='powers'
+             , help="The configurations of the scaling test: 'powers' (the default: nc, nc/2, nc/4, ... 1 cores on a "
+                    "node, nc = --max-cores), 'geometric:<ratio>', 'aligned' (aligned with the caches, NUMA domains "
+                    "and sockets of the cluster), 'list:<n>,<n>,...' (core counts), or 'adaptive[:<n>]' (n extra "
+                    "configurations where the measured efficiency drops most, in a follow-up submission). "
+                    "Specifications can be combined with '+', e.g. 'aligned+geometric:1.5'. The multi-node "
+                    'configurations (2, 4, ... --max-nodes) are added, except for list and adaptive. See of.sweep.'
+             )
+@click.option('--estimate-walltime/--no-estimate-walltime', is_flag=True, default=False
+             , help='Estimate the walltime of every run case from the timings of earlier sweeps of the case '
+                    '(the post-processing caches of the <case>-*-scaling-test* directories and of the destination), '
+                    'plus a safety margin. Run cases without an estimate use --walltime. Default is False.'
+             )
 @click.option('--verbosity', '-v', count=True, default=0
              , help="The verbosity of the program."
              )
 def main( case, destination, solver
         , max_nodes, max_cores, walltime
         , overwrite, submit
+        , array, throttle, packed
+        , staging, decomposition_cache
+        , timesteps, warmup, seconds_per_step, early_stop
+        , profile, counters
+        , strategies, decomposition
+        , cells_per_core, sweep
+        , estimate_walltime
         , verbosity
     ):
     """Command line interface run-sst.
 
-    Copy an OpenFOAM case and perform a (strong) scaling test.
+    Copy an OpenFOAM case and perform a (strong or weak) scaling test.
     """
     of.run_all( case=case, openfoam_solver=solver, destination=destination
               , max_nodes=max_nodes, max_cores_per_node=max_cores, walltime=walltime
               , overwrite=overwrite, submit=submit
+              , array=array, throttle=throttle, packed=packed
+              , staging=staging, decomposition_cache=decomposition_cache
+              , timesteps=timesteps, warmup=warmup, seconds_per_step=seconds_per_step
+              , early_stop=early_stop, profile=profile, counters=counters
+              , strategies=['' if s == 'default' else s for s in strategies.split(',') if s]
+              , decomposition_methods=['' if m == 'default' else m for m in decomposition.split(',') if m]
+              , cells_per_core=cells_per_core
+              , sweep_spec=sweep
+              , estimate_walltime=estimate_walltime
               , verbosity=verbosity
               )
 
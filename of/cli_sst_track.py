@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""Command line interface sst-track (no sub-commands)."""
+
+import sys
+
+try:
+    import of.tracker
+except ModuleNotFoundError:
+    # pick up the path from __file__
+    from pathlib import Path
+    p = str(Path(__file__).parent.parent)
+    sys.path.insert(0,p)
+    import of.tracker
+
+import click
+
+@click.command()
+@click.option('--results', '-r', default='.'
+             , help='Directory containing the run cases of the scaling test, submitted with sst-run --submit.'
+             )
+@click.option('--poll', default=10.
+             , help='Initial interval between polls of squeue/sacct, in seconds. The interval doubles as long as '
+                    'no job changes state. Default is 10.'
+             )
+@click.option('--max-poll', default=300.
+             , help='Maximum interval between polls, in seconds. Default is 300.'
+             )
+@click.option('--postprocess/--no-postprocess', is_flag=True, default=True
+             , help='Post-process the results when all jobs have finished (as sst-post --no-clean). Default is True.'
+             )
+@click.option('--verbosity', '-v', count=True, default=0
+             , help="The verbosity of the program."
+             )
+def main(results, poll, max_poll, postprocess, verbosity):
+    """Command line interface sst-track.
+
+    Track the jobs of a scaling test: their slurm state, timesteps done, walltime per timestep and ETA.
+    """
+    of.tracker.track(results, poll=poll, max_poll=max_poll, postprocess=postprocess, verbosity=verbosity)
+
+if __name__ == "__main__":
+    sys.exit(main())  # pragma: no cover
+#eof
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module of.counters
+==================
+
+Hardware performance counters of the solver, per MPI rank.
+
+With counters switched on, the job script writes a small wrapper script ``counters/wrap.sh`` into
+the run case, and starts the solver through it (``srun counters/wrap.sh simpleFoam -parallel``).
+The wrapper runs
+
+* the first rank on every node under ``likwid-perfctr -c N -g MEM`` if likwid is available (tool
+  ``'likwid'``, or ``'auto'`` and the ``likwid-perfctr`` command exists), which measures the memory
+  bandwidth directly. The memory traffic is counted by uncore counters, which are shared by all
+  cores of a socket, so a single likwid instance per node measures all hardware threads of the node
+  (concurrent instances would conflict on the uncore counters, and count the traffic of the socket
+  once per rank). The other ranks run as usual. The node should not be shared with other jobs.
+* every rank under ``perf stat`` (tool ``'perf'``, or ``'auto'`` without likwid), which counts
+  cycles, instructions, last level cache misses and the cpu time of the rank. The memory traffic is
+  estimated as one cache line (:data:`CACHE_LINE` bytes) per LLC load miss, which is a lower bound
+  (writes and prefetches are not counted).
+
+perf writes a file ``counters/perf.<rank>.csv`` per rank, likwid a file ``counters/likwid.<host>.csv``
+per node. The parsers below only need these files, and are tested against canned output.
+"""
+
+import math
+from pathlib import Path
+from collections import namedtuple
+
+#===================================================================================================
+COUNTER_TOOLS = ('auto', 'perf', 'likwid')
+
+COUNTER_WRAPPER = 'counters/wrap.sh'
+"""Path of the wrapper script, relative to the run case directory."""
+
+PERF_EVENTS = ('cycles', 'instructions', 'LLC-load-misses', 'task-clock')
+
+CACHE_LINE = 64
+"""Bytes transferred from memory per LLC miss."""
+
+Counters = namedtuple('Counters', ['cycles', 'instructions', 'llc_misses', 'bytes', 'seconds'])
+Counters.__doc__ = """Hardware counters of a single rank (perf) or node (likwid) (NAN if not measured).
+
+:param cycles: core cycles.
+:param instructions: instructions retired.
+:param llc_misses: last level cache load misses.
+:param bytes: bytes transferred from/to memory.
+:param seconds: the time during which the counters were measured.
+"""
+
+NAN = float('NAN')
+
+
+#===================================================================================================
+def counter_commands(tool='auto'):
+    """Job script lines writing the wrapper script :data:`COUNTER_WRAPPER`.
+
+    :param str tool: one of :data:`COUNTER_TOOLS`.
+    """
+    if tool not in COUNTER_TOOLS:
+        raise ValueError(f"Unknown counter tool '{tool}', expecting one of {COUNTER_TOOLS}.")
+    likwid = 'true' if tool == 'likwid' else 'false' if tool == 'perf' else 'command -v likwid-perfctr > /dev/null 2>&1'
+    wrapper = [ '#!/bin/bash'
+              , 'RANK=${SLURM_PROCID:-${PMI_RANK:-${OMPI_COMM_WORLD_RANK:-0}}}'
+              , 'LOCAL_RANK=${SLURM_LOCALID:-${MPI_LOCALRANKID:-${OMPI_COMM_WORLD_LOCAL_RANK:-0}}}'
+              ,f'if {likwid}; then'
+              , '    if [ "$LOCAL_RANK" = 0 ]; then'
+              , '        exec likwid-perfctr -c N -g MEM -O -o counters/likwid.$(hostname).csv "$@"'
+              , '    fi'
+              , '    exec "$@"'
+              , 'fi'
+              ,f'exec perf stat -x, -e {",".join(PERF_EVENTS)} -o counters/perf.$RANK.csv "$@"'
+              ]
+    # no here-document, the job script lines may be indented
+    return [ "# Hardware performance counters, per rank (perf) or per node (likwid)"
+           , "rm -rf counters && mkdir counters"
+           , "printf '%s\\n' " + ' '.join(f"'{line}'" for line in wrapper) + f" > {COUNTER_WRAPPER}"
+           ,f"chmod +x {COUNTER_WRAPPER}"
+           ]
+
+
+#===================================================================================================
+def _number(s):
+    try:
+        return float(s)
+    except ValueError:
+        # '<not counted>', '<not supported>'
+        return NAN
+
+
+def parse_perf(text):
+    """Parse the output of ``perf stat -x,`` (see :data:`PERF_EVENTS`).
+
+    The lines have the format ``value,unit,event,...``. Comment lines start with '#'.
+
+    :return: :class:`Counters`.
+    """
+    values = {}
+    for line in text.splitlines():
+        if not line.strip() or line.startswith('#'):
+            continue
+        fields = line.split(',')
+        if len(fields) < 3:
+            continue
+        # events may have a modifier, e.g. 'cycles:u'
+        values[fields[2].split(':')[0]] = (_number(fields[0]), fields[1])
+    cycles = values.get('cycles', (NAN,))[0]
+    instructions = values.get('instructions', (NAN,))[0]
+    llc_misses = values.get('LLC-load-misses', (NAN,))[0]
+    seconds, unit = values.get('task-clock', (NAN, 'msec'))
+    if unit == 'msec':
+        seconds *= 1e-3
+    return Counters(cycles, instructions, llc_misses, llc_misses * CACHE_LINE, seconds)
+
+
+LIKWID_FIELDS = { 'INSTR_RETIRED_ANY': 'instructions'
+                , 'CPU_CLK_UNHALTED_CORE': 'cycles'
+                , 'Runtime (RDTSC) [s]': 'seconds'
+                , 'Memory data volume [GBytes]': 'gbytes'
+                }
+"""The likwid events and metrics that are used, by the name of the first column in the -O output."""
+
+
+def parse_likwid(text):
+    """Parse the CSV output of ``likwid-perfctr -g MEM -O``.
+
+    Event lines have the format ``event,counter,value[,value...]``, metric lines ``metric,value[,value...]``.
+    Values of several hardware threads are summed (the run time is the maximum). The memory data volume
+    is only reported by one hardware thread per socket, so its sum is the traffic of all sockets.
+
+    :return: :class:`Counters`.
+    """
+    values = {}
+    for line in text.splitlines():
+        fields = line.split(',')
+        name = LIKWID_FIELDS.get(fields[0])
+        if name is None or name in values:
+            # the first table has the raw values, later ones (statistics) are ignored
+            continue
+        # event lines have a counter column
+        start = 2 if name in ('cycles', 'instructions') else 1
+        numbers = [x for x in map(_number, fields[start:]) if not math.isnan(x)]
+        if not numbers:
+            continue
+        values[name] = max(numbers) if name == 'seconds' else sum(numbers)
+    return Counters( values.get('cycles', NAN)
+                   , values.get('instructions', NAN)
+                   , NAN
+                   , values.get('gbytes', NAN) * 1e9
+                   , values.get('seconds', NAN)
+                   )
+
+
+def read_counters(run_case):
+    """Read the counter files of all ranks (perf) or nodes (likwid) of a run case.
+
+    Every counter file counts each core and socket once, so the counters are summed over the files.
+
+    :return: dict with the totals over all files: ``'cycles'``, ``'instructions'``, ``'bytes'``, the
+        maximum ``'seconds'``, and the number of counter files ``'ranks'`` (the number of nodes for
+        likwid). Empty if there are no counter files.
+    """
+    directory = Path(run_case) / 'counters'
+    ranks = []
+    for path in sorted(directory.glob('perf.*.csv')):
+        ranks.append(parse_perf(path.read_text(errors='replace')))
+    for path in sorted(directory.glob('likwid.*.csv')):
+        ranks.append(parse_likwid(path.read_text(errors='replace')))
+    if not ranks:
+        return {}
+    return { 'cycles': sum(r.cycles for r in ranks)
+           , 'instructions': sum(r.instructions for r in ranks)
+           , 'bytes': sum(r.bytes for r in ranks)
+           , 'seconds': max(r.seconds for r in ranks)
+           , 'ranks': len(ranks)
+           }
+
+
+def ipc(counters):
+    """Instructions per cycle, from the result of :func:`read_counters`."""
+    if not counters or not counters['cycles']:
+        return NAN
+    return counters['instructions'] / counters['cycles']
+
+
+def bandwidth(counters):
+    """Aggregate memory bandwidth in GB/s, from the result of :func:`read_counters`."""
+    if not counters or not counters['seconds']:
+        return NAN
+    return counters['bytes'] / counters['seconds'] * 1e-9
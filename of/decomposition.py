@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module of.decomposition
+=======================
+
+Reuse of decomposed (and renumbered) meshes across run cases.
+
+``decomposePar`` is serial, and for large meshes it may take longer than the run itself. Run cases
+with the same mesh, initial fields and ``system/decomposeParDict`` (which contains the number of
+subdomains and the decomposition method) produce identical ``processor*`` directories, so these
+are stored in a cache directory and reused:
+
+* on a hit, the ``processor*`` directories are copied from the cache,
+* on a miss, the case is decomposed and renumbered as usual, and, if that succeeded, a copy of the
+  result is added to the cache.
+
+The files are copied rather than hard linked, because OpenFOAM rewrites files in place (e.g.
+``-overwrite``), which would corrupt the cache through a link.
+
+The cache key is computed inside the job, from a checksum of ``constant/polyMesh``, ``0`` and
+``system/decomposeParDict``, so it is always consistent with what the job actually decomposes.
+
+The decomposition method of a run case can be overridden (see :func:`method_commands`), to compare
+decomposition methods in a sweep (see :mod:`of.launch`).
+"""
+
+#===================================================================================================
+DECOMPOSITION_METHODS = ('scotch', 'ptscotch', 'metis', 'kahip', 'hierarchical', 'simple')
+"""Decomposition methods that can be selected for a run case."""
+
+
+def box_factors(n):
+    """Split n subdomains in (nx, ny, nz) with nx*ny*nz = n, as equal as possible (nx >= ny >= nz).
+
+    The prime factors of n are distributed largest first, each to the direction with the fewest
+    subdomains so far.
+    """
+    primes = []
+    p = 2
+    while n > 1:
+        while n % p == 0:
+            primes.append(p)
+            n //= p
+        p += 1
+    factors = [1, 1, 1]
+    for p in sorted(primes, reverse=True):
+        factors[factors.index(min(factors))] *= p
+    return tuple(sorted(factors, reverse=True))
+
+
+def method_commands(method, n_subdomains):
+    """Job script lines setting the decomposition method in system/decomposeParDict.
+
+    The geometric methods 'simple' and 'hierarchical' also need the number of subdomains in each
+    direction, which is computed with :func:`box_factors`.
+    """
+    if method not in DECOMPOSITION_METHODS:
+        raise ValueError(f"Unknown decomposition method '{method}', expecting one of {DECOMPOSITION_METHODS}.")
+    decompose_par_dict = "system/decomposeParDict"
+    lines = [f"foamDictionary -entry method -set {method} {decompose_par_dict}"]
+    if method in ('simple', 'hierarchical'):
+        n = ' '.join(str(f) for f in box_factors(n_subdomains))
+        coeffs = f"n ({n}); order xyz;" if method == 'hierarchical' else f"n ({n}); delta 0.001;"
+        lines.append(f'foamDictionary -entry {method}Coeffs -set "{{ {coeffs} }}" {decompose_par_dict}')
+    return lines
+
+#===================================================================================================
+def cached_decomposition(cache, n_tasks, commands):
+    """Job script lines that reuse a cached decomposition, or run ``commands`` and cache the result.
+
+    :param str cache: absolute path of the cache directory.
+    :param int n_tasks: number of subdomains.
+    :param list commands: job script lines that decompose (and renumber) the case. Their standard
+        output is cached too, and replayed on a hit, so that the .stdout file of the job has the same
+        content (e.g. the mesh size) in both cases. The result is only cached if all of them succeed.
+    """
+    return [ "# Reuse a decomposition of the same mesh, initial fields and decomposeParDict, if there is one"
+           , "DECOMPOSITION_KEY=$(cat constant/polyMesh/* 0/* system/decomposeParDict 2>/dev/null | sha1sum | cut -c1-16)"
+           ,f"DECOMPOSITION={cache}/{n_tasks}-$(foamDictionary -entry method -value system/decomposeParDict)-$DECOMPOSITION_KEY"
+           , "if [ -f $DECOMPOSITION/complete ]; then"
+           , "    echo \"Using cached decomposition $DECOMPOSITION\""
+           , "    cp -r $DECOMPOSITION/processor* ."
+           , "    cat $DECOMPOSITION/log.decomposition"
+           , "else"
+           , "    # A subshell that stops at the first command that fails"
+           , "    ( set -e"
+           ] + [ "        " + line for line in commands ] + [
+             "    ) | tee log.decomposition"
+           , "    # Only a successful decomposition is cached"
+           , "    if [ ${PIPESTATUS[0]} -eq 0 ]; then"
+           ,f"        mkdir -p {cache}"
+           , "        # Add to the cache atomically, another job may be doing the same"
+           , "        tmp=$(mktemp -d $DECOMPOSITION.XXXXXX)"
+           , "        cp -r processor* log.decomposition $tmp/ && touch $tmp/complete && mv -T $tmp $DECOMPOSITION || rm -rf $tmp"
+           , "    fi"
+           , "fi"
+           ]
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module of.estimate
+==================
+
+Estimate the walltime of every run case of a sweep from the timings of earlier sweeps of the same case.
+
+Requesting the same walltime for all run cases makes the small jobs wait for a long slot, while
+the backfill scheduler could start them early if they asked for less. The walltime per timestep
+of the earlier run cases is read from the caches of the post-processing (see :mod:`of.cache`) of
+all results directories ``<case>-strong-scaling-test-*`` (or ``-weak-``) next to the case and of
+the destination. A short probe run, post-processed with ``sst-post``, is just such an earlier sweep.
+
+For a number of cores that was measured, its walltime per timestep is used. Otherwise it is predicted
+by a scaling model (see :mod:`of.model`, imported only here, because it needs numpy) fitted to the
+measured core counts, or, with a single measurement or without numpy, by ideal scaling from the
+nearest measured core count. In weak scaling mode the walltime per timestep is scaled with the
+number of cells per core, and the nearest measured core count above is used (it is slower).
+
+The number of timesteps is that of benchmark mode, or otherwise the number of timesteps in the
+controlDict of the case (see :func:`of.tracker.total_timesteps`). The earlier run cases are not used
+for it, as they may have been stopped early, or run in benchmark mode.
+
+The walltime requested is :data:`of.BENCHMARK_OVERHEAD` plus :data:`WALLTIME_MARGIN` times the
+estimated processing time, rounded up to whole minutes.
+"""
+
+import math
+from pathlib import Path
+
+from of.launch import RUN_CASE_PATTERN
+from of.cache import load_cache
+from of.scanner import CaseRecord
+
+#===================================================================================================
+WALLTIME_MARGIN = 1.5
+"""Safety factor on the estimated processing time."""
+
+
+#===================================================================================================
+def results_directories(case, destination, weak=False):
+    """The results directories of earlier sweeps of a case (and the destination, if it exists)."""
+    case = Path(case)
+    scaling = 'weak' if weak else 'strong'
+    directories = sorted(case.resolve().parent.glob(f'{case.name}-{scaling}-scaling-test*'))
+    destination = Path(destination).resolve()
+    if destination.is_dir() and destination not in directories:
+        directories.append(destination)
+    return directories
+
+
+def seconds_per_step(record):
+    """The wall clock time per timestep of a record, from the ClockTimes if they resolve it."""
+    seconds = record.mean_clocktime_per_timestep()
+    if math.isnan(seconds) or seconds <= 0:
+        seconds = record.mean_walltime_per_timestep()
+    return seconds
+
+
+def measured_timings(directories, case_name, cells_per_core=0):
+    """The walltime per timestep of the completed (default launch strategy) run cases of a case.
+
+    :param int cells_per_core: in weak scaling mode, the walltimes are scaled to this number of cells per core.
+    :return: dict mapping numbers of cores to the largest walltime per timestep measured.
+    """
+    timings = {}
+    for directory in directories:
+        for name, entry in load_cache(directory).items():
+            m = RUN_CASE_PATTERN.match(name)
+            if not m or m[1] != case_name or m[4]:
+                continue
+            record = CaseRecord(**entry['record'])
+            seconds = seconds_per_step(record)
+            if not record.completed or math.isnan(seconds):
+                continue
+            n_tasks = int(m[2]) * int(m[3])
+            if cells_per_core:
+                if math.isnan(record.n_cells):
+                    continue
+                seconds *= cells_per_core * n_tasks / record.n_cells
+            timings[n_tasks] = max(seconds, timings.get(n_tasks, 0.))
+    return timings
+
+
+def predict_seconds_per_step(timings, n_tasks, weak=False):
+    """Predict the walltime per timestep of n_tasks cores from the measured timings (see :func:`measured_timings`).
+
+    :return: the walltime per timestep in seconds, NAN if there are no timings.
+    """
+    if not timings:
+        return float('NAN')
+    if n_tasks in timings:
+        return timings[n_tasks]
+    measured = sorted(timings)
+    if weak:
+        above = [n for n in measured if n > n_tasks]
+        return timings[above[0] if above else measured[-1]]
+    if len(measured) > 1:
+        try:
+            from of import model
+        except ModuleNotFoundError:
+            model = None
+        if model is not None:
+            # a fit needs more points than parameters
+            name = 'communication' if len(measured) > 3 else 'amdahl'
+            fitted = model.fit(name, measured, [timings[n] for n in measured], len(measured) * [float('NAN')])
+            if fitted is not None:
+                predicted = float(model.predict(fitted, n_tasks)[0][0])
+                if predicted > 0:
+                    return predicted
+    nearest = min(measured, key=lambda n: abs(math.log(n / n_tasks)))
+    return timings[nearest] * nearest / n_tasks
+
+
+def estimate_walltimes(case, destination, n_tasks, options):
+    """Estimate the walltime of run cases from the timings of earlier sweeps of the case.
+
+    :param case: the OpenFOAM case directory.
+    :param destination: the results directory of the sweep.
+    :param list n_tasks: the numbers of cores of the run cases.
+    :param options: :class:`of.RunOptions`. In benchmark mode the number of timesteps is known, otherwise
+        it is computed from the controlDict of the case.
+    :return: dict mapping the numbers of cores to the estimated walltime in hours. Numbers of cores for which
+        nothing can be estimated are missing.
+    """
+    from of import BENCHMARK_OVERHEAD
+    from of.tracker import total_timesteps
+    weak = bool(options.cells_per_core)
+    directories = results_directories(case, destination, weak)
+    timings = measured_timings(directories, Path(case).name, options.cells_per_core)
+    if options.timesteps:
+        n_steps = options.warmup + options.timesteps
+    else:
+        n_steps = total_timesteps(case)
+    estimates = {}
+    if not n_steps:
+        return estimates
+    for nt in n_tasks:
+        seconds = predict_seconds_per_step(timings, nt, weak)
+        if not math.isnan(seconds):
+            hours = BENCHMARK_OVERHEAD + WALLTIME_MARGIN * n_steps * seconds / 3600
+            estimates[nt] = math.ceil(hours * 60) / 60
+    return estimates
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module of.launch
+================
+
+Launch strategies: how the MPI tasks of a run case are started, distributed and pinned.
+
+By default, the launcher is chosen by :func:`of.mpi_driver`. A launch strategy overrides that choice.
+It is a string of tokens separated by dots, e.g. ``'cyclic.bind-cores'`` or ``'hybrid.omp2'``:
+
+* ``block``: ``srun --distribution block:block``,
+* ``cyclic``: ``srun --distribution block:cyclic:cyclic``,
+* ``dist-<a>-<b>[-<c>]``: ``srun --distribution <a>:<b>:<c>``,
+* ``bind-<value>``: ``srun --cpu-bind=<value>``, e.g. ``bind-cores``, ``bind-sockets``, ``bind-none``,
+* ``hybrid``: ``mympirun --hybrid <tasks per node>``,
+* ``universe``: ``mympirun --universe <tasks>``,
+* ``omp<N>``: N OpenMP threads per MPI task. A run case with n cores then runs n/N MPI tasks,
+* a decomposition method, one of :data:`of.decomposition.DECOMPOSITION_METHODS`, e.g. ``scotch``:
+  the method in ``system/decomposeParDict`` is replaced (see :func:`of.decomposition.method_commands`).
+
+The strategy is part of the run case directory name, ``<case>-NxMcores-<strategy>``, so that
+run cases of different strategies can live side by side in the same results directory (see
+:data:`RUN_CASE_PATTERN`).
+"""
+
+import re
+from collections import namedtuple
+
+from of.decomposition import DECOMPOSITION_METHODS
+
+#===================================================================================================
+RUN_CASE_PATTERN = re.compile(r'(\w+)-(\d+)x(\d+)cores(?:-([\w.-]+))?$')
+"""Pattern of run case directory names: case name, number of nodes, cores per node, and the launch strategy (or None)."""
+
+DISTRIBUTIONS = {'block': 'block:block', 'cyclic': 'block:cyclic:cyclic'}
+
+Launch = namedtuple('Launch', ['n_ranks', 'driver', 'environment'])
+Launch.__doc__ = """How to launch a run case.
+
+:param n_ranks: number of MPI tasks (the number of cores divided by the number of threads per task).
+:param driver: the command that starts the MPI tasks, or '' for the default (:func:`of.mpi_driver`).
+:param environment: list of job script lines to execute before starting the MPI tasks.
+"""
+
+
+#===================================================================================================
+def parse_strategy(strategy):
+    """Parse a launch strategy string.
+
+    :return: dict with keys ``'distribution'``, ``'cpu_bind'``, ``'mympirun'``, ``'method'`` (None if not
+        specified) and ``'threads'`` (1 if not specified).
+    :raises ValueError: for invalid strategies.
+    """
+    parsed = {'distribution': None, 'cpu_bind': None, 'mympirun': None, 'method': None, 'threads': 1}
+    if not strategy:
+        return parsed
+    if not re.fullmatch(r'[\w.-]+', strategy):
+        raise ValueError(f"Invalid launch strategy '{strategy}': only letters, digits, '_', '-' and '.' are allowed.")
+    for token in strategy.split('.'):
+        if token in DISTRIBUTIONS:
+            parsed['distribution'] = DISTRIBUTIONS[token]
+        elif token.startswith('dist-'):
+            parsed['distribution'] = token[5:].replace('-', ':')
+        elif token.startswith('bind-'):
+            parsed['cpu_bind'] = token[5:]
+        elif token in ('hybrid', 'universe'):
+            parsed['mympirun'] = token
+        elif re.fullmatch(r'omp\d+', token):
+            parsed['threads'] = int(token[3:])
+        elif token in DECOMPOSITION_METHODS:
+            parsed['method'] = token
+        else:
+            raise ValueError(f"Invalid launch strategy '{strategy}': unknown token '{token}'.")
+    if parsed['mympirun'] and (parsed['distribution'] or parsed['cpu_bind']):
+        raise ValueError(f"Invalid launch strategy '{strategy}': srun options cannot be combined with mympirun.")
+    return parsed
+
+
+def launch(strategy, n_tasks, max_tasks_per_node):
+    """How to launch a run case with a launch strategy.
+
+    :param str strategy: the launch strategy, '' for the default.
+    :param int n_tasks: number of cores of the run case.
+    :param int max_tasks_per_node: maximum number of cores per node used.
+    :return: :class:`Launch`.
+    """
+    parsed = parse_strategy(strategy)
+    threads = parsed['threads']
+    if n_tasks % threads:
+        raise ValueError(f"Launch strategy '{strategy}': {n_tasks} cores is not a multiple of {threads} threads.")
+    n_ranks = n_tasks // threads
+    ranks_per_node = min(max(max_tasks_per_node // threads, 1), n_ranks)
+    environment = []
+    if threads > 1:
+        environment = [f"export OMP_NUM_THREADS={threads}", "export OMP_PROC_BIND=close OMP_PLACES=cores"]
+
+    if parsed['mympirun'] == 'hybrid':
+        driver = f"mympirun --hybrid {ranks_per_node}"
+    elif parsed['mympirun'] == 'universe':
+        driver = f"mympirun --universe {n_ranks}"
+    elif parsed['distribution'] or parsed['cpu_bind'] or threads > 1:
+        driver = f"srun --ntasks {n_ranks}"
+        if threads > 1:
+            driver += f" --cpus-per-task {threads}"
+        if parsed['distribution']:
+            driver += f" --distribution {parsed['distribution']}"
+        if parsed['cpu_bind']:
+            driver += f" --cpu-bind={parsed['cpu_bind']}"
+    else:
+        driver = ''
+    return Launch(n_ranks, driver, environment)
+
+
+def applies(strategy, n_tasks):
+    """Test whether a launch strategy applies to a run case with n_tasks cores.
+
+    The serial run case only has the default strategy, and threaded strategies need at least two MPI
+    tasks, each with the same number of threads.
+    """
+    if n_tasks == 1:
+        return not strategy
+    threads = parse_strategy(strategy)['threads']
+    return n_tasks % threads == 0 and n_tasks // threads > 1
+
+
+def combine(strategies, methods):
+    """All combinations of launch strategies and decomposition methods, as strategy strings.
+
+    :param list strategies: launch strategies, '' is the default.
+    :param list methods: decomposition methods, '' is the method of the case.
+    """
+    return ['.'.join(token for token in (strategy, method) if token) for strategy in strategies for method in methods]
+
+
+def run_case_name(case_name, n_nodes, n_tasks, strategy=''):
+    """The name of the run case directory of a configuration: ``<case>-NxMcores[-<strategy>]``."""
+    name = f"{case_name}-{n_nodes}x{n_tasks//n_nodes}cores"
+    if strategy:
+        name += f"-{strategy}"
+    return name
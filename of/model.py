@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module of.model
+===============
+
+Scaling models fitted to the walltime per timestep of a strong scaling test.
+
+Every model is linear in its parameters, a sum of terms in the number of cores p:
+
+* ``'amdahl'``: ``T(p) = a + b/p``. ``a`` is the time of the serial part, ``b`` that of the parallel
+  part on a single core. The serial fraction (Amdahl) is ``s = a / (a + b)``.
+* ``'communication'``: ``T(p) = a + b/p + c*log2(p)``. The ``log2(p)`` term models the latency of the
+  global reductions (a tree of depth log2 p) in every linear solver iteration.
+
+The models are fitted with weighted linear least squares: the weights are the inverse variances of
+the mean walltimes (see :mod:`of.statistics`), and the covariance of the parameters is scaled by
+the reduced chi-square, because the misfit of the model is usually much larger than the measurement
+error. Predictions at untested core counts carry the resulting uncertainty.
+
+The Gustafson scaled speedup at p cores, ``p - s_p*(p - 1)`` with ``s_p`` the serial fraction of the
+time at p cores, tells how much larger a problem p cores solve in the same time.
+
+This module needs numpy.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+#===================================================================================================
+TERMS = { '1': np.ones_like
+        , '1/p': lambda p: 1 / p
+        , 'log2(p)': np.log2
+        }
+"""The terms of the models, as functions of the number of cores."""
+
+MODELS = { 'amdahl': ('1', '1/p')
+         , 'communication': ('1', '1/p', 'log2(p)')
+         }
+"""The scaling models and their terms."""
+
+RELATIVE_ERROR = 0.01
+"""Lower bound of the relative error of the walltimes, also used for walltimes without a (valid) error."""
+
+ScalingModel = namedtuple('ScalingModel', ['name', 'terms', 'params', 'cov', 'chi2', 'dof'])
+ScalingModel.__doc__ = """A fitted scaling model.
+
+:param name: name of the model, a key of :data:`MODELS`.
+:param terms: the terms of the model (keys of :data:`TERMS`).
+:param params: array with the fitted coefficients of the terms.
+:param cov: covariance matrix of the parameters.
+:param chi2: chi-square of the fit.
+:param dof: degrees of freedom of the fit (number of points - number of parameters).
+"""
+
+
+#===================================================================================================
+def design(n_cores, terms):
+    """Design matrix of the terms for core counts n_cores (one row per core count)."""
+    p = np.asarray(n_cores, dtype=float)
+    return np.column_stack([TERMS[term](p) for term in terms])
+
+
+def fit(name, n_cores, walltimes, walltime_errors):
+    """Fit scaling model ``name`` to the walltimes per timestep.
+
+    :param n_cores: array with the number of cores of the run cases.
+    :param walltimes: array with the mean walltime per timestep.
+    :param walltime_errors: array with the half width of the 95% confidence interval of the walltimes.
+    :return: :class:`ScalingModel`, or None if there are not more valid points than parameters.
+    """
+    terms = MODELS[name]
+    n_cores = np.asarray(n_cores, dtype=float)
+    walltimes = np.asarray(walltimes, dtype=float)
+    sigma = np.asarray(walltime_errors, dtype=float) / 1.96
+    valid = ~np.isnan(walltimes)
+    if valid.sum() <= len(terms):
+        return None
+    n_cores, walltimes, sigma = n_cores[valid], walltimes[valid], sigma[valid]
+    # near zero errors (e.g. quantized timesteps) would dominate the fit, fmax also replaces NaN errors
+    sigma = np.fmax(sigma, RELATIVE_ERROR * walltimes)
+
+    x = design(n_cores, terms) / sigma[:, None]
+    y = walltimes / sigma
+    params, _, _, _ = np.linalg.lstsq(x, y, rcond=None)
+    chi2 = float(((x @ params - y)**2).sum())
+    dof = len(y) - len(terms)
+    cov = np.linalg.pinv(x.T @ x)
+    if dof > 0:
+        cov *= chi2 / dof
+    return ScalingModel(name, terms, params, cov, chi2, dof)
+
+
+def predict(model, n_cores):
+    """The walltime per timestep predicted by a model, and its error (one standard deviation).
+
+    :return: tuple of arrays (walltimes, errors).
+    """
+    x = design(np.atleast_1d(n_cores), model.terms)
+    walltimes = x @ model.params
+    errors = np.sqrt(np.einsum('ij,jk,ik->i', x, model.cov, x))
+    return walltimes, errors
+
+
+def serial_fraction(model):
+    """Amdahl's serial fraction ``a / (a + b)`` of a model, and its error.
+
+    The ``log2(p)`` term of the communication model vanishes for p = 1 and is not part of it.
+    """
+    a, b = model.params[0], model.params[1]
+    gradient = np.zeros(len(model.params))
+    gradient[0] = b / (a + b)**2
+    gradient[1] = -a / (a + b)**2
+    return a / (a + b), np.sqrt(gradient @ model.cov @ gradient)
+
+
+def efficiency(model, n_cores, reference_cores=1):
+    """The parallel efficiency predicted by a model, relative to reference_cores cores."""
+    n_cores = np.atleast_1d(np.asarray(n_cores, dtype=float))
+    reference, _ = predict(model, reference_cores)
+    walltimes, _ = predict(model, n_cores)
+    return reference[0] * reference_cores / (walltimes * n_cores)
+
+
+def gustafson_speedup(model, n_cores):
+    """The Gustafson scaled speedup ``p - s_p*(p - 1)`` predicted by a model.
+
+    ``s_p`` is the fraction of the walltime at p cores that does not decrease with p (all terms but ``1/p``).
+    """
+    n_cores = np.atleast_1d(np.asarray(n_cores, dtype=float))
+    walltimes, _ = predict(model, n_cores)
+    parallel = model.params[model.terms.index('1/p')] / n_cores
+    s = 1 - parallel / walltimes
+    return n_cores - s * (n_cores - 1)
+
+
+def recommend(model, n_cores, efficiency_floor, reference_cores=1):
+    """The core count with the highest throughput (timesteps per hour) whose predicted efficiency is at
+    least efficiency_floor.
+
+    Among the core counts that are efficient enough, the fastest one gives the shortest time to solution
+    for the core hours that may be spent. If no core count is efficient enough, the most efficient one
+    is returned.
+
+    :param n_cores: array with the candidate core counts.
+    :return: the recommended core count.
+    """
+    n_cores = np.atleast_1d(np.asarray(n_cores))
+    e = efficiency(model, n_cores, reference_cores)
+    walltimes, _ = predict(model, n_cores)
+    ok = e >= efficiency_floor
+    if not ok.any():
+        return int(n_cores[np.argmax(e)])
+    candidates = np.where(ok)[0]
+    return int(n_cores[candidates[np.argmin(walltimes[candidates])]])
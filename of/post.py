@@ -0,0 +1,856 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module of.post
+==============
+
+Post-processing of strong scaling tests.
+
+This module needs numpy. Matplotlib is only imported when a plot is produced, and uses the
+headless Agg backend, unless the ``MPLBACKEND`` environment variable says otherwise.
+On dodrio, run `module load SciPy-bundle` and `module load matplotlib`.
+"""
+
+import os, sys, re, shutil, math, pprint, functools
+import concurrent.futures
+import sqlite3
+from pathlib import Path
+from collections import namedtuple
+import io
+
+try:
+    import numpy as np
+except ModuleNotFoundError as x:
+    print(x)
+    print("Module numpy is needed for post-processing.")
+    print("On dodrio, run `module load SciPy-bundle`")
+    raise
+
+import click
+
+from of import NCORESPERNODE, MODULES, VSC_INSTITUTE_CLUSTER, has_completed
+from of.scanner import scan_log, scan_stdout
+from of.cache import load_cache, save_cache, scan_case_cached
+from of.statistics import timestep_statistics, ratio_error, step_times
+from of.profiling import self_times_by_category, hot_spot
+from of.counters import ipc, bandwidth
+from of.accounting import update_accounting, cpu_efficiency, core_hours, energy_per_timestep
+from of.tracker import load_jobs, write_interval
+from of import store as results_store
+from of import regression
+from of.launch import RUN_CASE_PATTERN
+from of import model as scaling_model
+
+
+#===================================================================================================
+def import_pyplot():
+    """Import matplotlib.pyplot with a headless backend."""
+    try:
+        import matplotlib
+    except ModuleNotFoundError as x:
+        print(x)
+        print('Matplotlib must be available for further post-processing.')
+        print("On dodrio, run `module load matplotlib`")
+        sys.exit(1)
+    if 'MPLBACKEND' not in os.environ:
+        matplotlib.use('Agg')
+    from matplotlib import pyplot
+    return pyplot
+
+
+#===================================================================================================
+def get_mean_walltime_per_timestep(file):
+    """Mean walltime per timestep from the ExecutionTimes in a .log file.
+
+    :param Path file: the .log file, or the run case directory containing it.
+    """
+    if file.is_dir():
+        file = file / (file.name + '.log')
+    
+    if not file.exists():
+        click.secho(f".log file '{file}' not found. Ignoring it.", fg='red')
+        return float('NAN')
+    
+    return scan_log(file).mean_walltime_per_timestep()
+
+
+#===================================================================================================
+def get_ncells(file):
+    """Read the number of cells from the output. 
+
+    we are looking for line "Mesh region0 size: 8000000".
+    (The original approach looked for "nCells:" in the blockMesh output. )
+    """
+    if file.is_dir():
+        file = file / (file.name + '.stdout')
+        
+    if not file.exists():
+        click.secho(f".stdout file '{file}' not found. Ignoring it.", fg='red')
+        return float('NAN')
+    
+    return scan_stdout(file).n_cells
+
+
+#===================================================================================================
+def remove_processor_dirs(run_case, verbosity=0):
+    """Remove the processor* directories of a run case to free disk space."""
+    count = -1
+    for dir in  run_case.glob('processor*'):
+        if count == -1:
+            print(f"\nRemoving directories 'processor*' in {str(run_case)} ...")
+            count = 0
+        if verbosity>1:
+            print(f"Removing directory {str(dir.name)}")
+            count += 1
+        shutil.rmtree(dir)
+    if verbosity>1:
+        if count:
+            print(f"  Removed {count} 'processor*' directories.")
+        else:
+            print("  None found.")
+
+
+def _clean_and_scan(run_case, entry, clean, verbosity):
+    """Scan run_case, and remove its processor* directories if it has completed and clean is True.
+
+    The run case is scanned first, because the profiling of a parallel run is in processor0.
+
+    :return: the record and the new cache entry of run_case (see :func:`of.cache.scan_case_cached`).
+    """
+    result = scan_case_cached(run_case, entry, verbosity=verbosity)
+    if clean and has_completed(run_case, verbosity=verbosity):
+        remove_processor_dirs(run_case, verbosity=verbosity)
+    return result
+
+
+def map_run_cases(run_cases, clean=False, jobs=1, verbosity=0, cache=None):
+    """Clean and scan a list of run cases, using a pool of ``jobs`` worker processes.
+
+    Scanning is CPU bound (pattern matching) and cleaning is I/O bound, so both benefit from
+    separate processes, in particular on a parallel file system.
+
+    :param dict cache: cache entries of the run cases, by name (see :mod:`of.cache`). Files that
+        did not change since they were cached, are not scanned again. The entries are updated in place.
+    :return: a list with the :class:`CaseRecord` of each run case, in the order of ``run_cases``.
+    """
+    if cache is None:
+        cache = {}
+    entries = [cache.get(run_case.name) for run_case in run_cases]
+    worker = functools.partial(_clean_and_scan, clean=clean, verbosity=verbosity)
+    if jobs == 0:
+        jobs = os.cpu_count()
+    jobs = min(jobs, len(run_cases))
+    if jobs > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(worker, run_cases, entries))
+    else:
+        results = [worker(run_case, entry) for run_case, entry in zip(run_cases, entries)]
+
+    records = []
+    for run_case, (record, entry) in zip(run_cases, results):
+        cache[run_case.name] = entry
+        records.append(record)
+    return records
+
+
+#===================================================================================================
+def is_weak_scaling(n_cells):
+    """Test whether the run cases of a scaling test are a weak scaling test, i.e. their meshes differ."""
+    n_cells = n_cells[~np.isnan(n_cells)]
+    return len(n_cells) > 1 and n_cells.min() != n_cells.max()
+
+
+def weak_efficiency(walltimes, walltime_errors, cells_per_core):
+    """Weak scaling efficiency and its error.
+
+    The number of cells per core of the run cases is not exactly the same (the block counts are
+    rounded, see :mod:`of.weak`), therefore the walltimes are normalized by the number of cells per
+    core: the efficiency is the walltime per cell per core of the first run case (the serial run)
+    divided by that of every run case.
+
+    :return: tuple (efficiency, error), arrays.
+    """
+    normalized = walltimes / cells_per_core
+    errors = walltime_errors / cells_per_core
+    efficiency = normalized[0] / normalized
+    efficiency_errors = ratio_error(normalized[0], errors[0], normalized, errors)
+    efficiency_errors[0] = 0 # exactly 1
+    return efficiency, efficiency_errors
+
+
+#===================================================================================================
+def solver_breakdown(records):
+    """Linear solver iterations and time split of a list of run cases.
+
+    :param list records: the :class:`of.scanner.CaseRecord` of the run cases.
+    :return: dict with arrays (one entry per run case):
+
+        * ``'iterations per timestep'``: dict with the mean number of linear solver iterations per
+          timestep for every field,
+        * ``'pressure field'``: name of the pressure field, or None,
+        * ``'time per pressure iteration'``: walltime per timestep per pressure iteration,
+        * ``'clock gap'``: fraction of the wall clock time not spent computing (see :meth:`of.scanner.CaseRecord.clock_gap`).
+    """
+    fields = sorted({field for record in records for field in record.iterations})
+    iterations = [record.iterations_per_timestep() for record in records]
+    pressure_fields = [record.pressure_field() for record in records]
+    return { 'iterations per timestep' : {field: np.array([its.get(field, float('NAN')) for its in iterations]) for field in fields}
+           , 'pressure field' : next((p for p in pressure_fields if p), None)
+           , 'time per pressure iteration' : np.array([record.time_per_pressure_iteration() for record in records])
+           , 'clock gap' : np.array([record.clock_gap() for record in records])
+           }
+
+
+def print_solver_breakdown(n_cores, d, file=sys.stdout):
+    """Print the solver breakdown table.
+
+    :param d: dict with the entries of :func:`solver_breakdown`.
+    """
+    fields = list(d['iterations per timestep'])
+    width = 10 + 8*len(fields) + 22
+    line = width*'-'
+    print(f"\n{'linear solver iterations per timestep and time split':^{width}}", file=file)
+    print(line, file=file)
+    print(f"{' ':>10}" + len(fields)*f"{' ':>8}" + f"{'ms per':>11}{'clock':>11}", file=file)
+    print(f"{'#cores':>10}" + ''.join(f"{field:>8}" for field in fields) + f"{(d['pressure field'] or 'p') + '-iter':>11}{'gap':>11}", file=file)
+    for i in range(len(n_cores)):
+        print( f"{n_cores[i]:>10}" + ''.join(f"{d['iterations per timestep'][field][i]:>8.1f}" for field in fields)
+             + f"{1000*d['time per pressure iteration'][i]:>11.3f}{100*d['clock gap'][i]:>10.1f}%"
+             , file=file
+             )
+    print(line, file=file)
+
+
+def plot_solver_breakdown(n_cores, d, title, path):
+    """Plot the linear solver iterations per timestep, the time per pressure iteration and the clock gap.
+
+    :param d: dict with the entries of :func:`solver_breakdown`.
+    :param Path path: the .png file.
+    """
+    pyplot = import_pyplot()
+    fig, (ax1, ax2) = pyplot.subplots(2, 1, sharex=True, figsize=(6.4, 7.2))
+    for field, iterations in d['iterations per timestep'].items():
+        ax1.plot(n_cores, iterations, 'o-', label=field)
+    ax1.set_title(title)
+    ax1.set_ylabel('iterations per timestep')
+    ax1.legend()
+    ax2.plot(n_cores, 1000*d['time per pressure iteration'], 'o-', label=f"ms per {d['pressure field'] or 'p'}-iteration")
+    ax2.set_ylabel('ms per pressure iteration')
+    ax2.set_xlabel('# cores')
+    ax2.set_xscale('log')
+    ax3 = ax2.twinx()
+    ax3.plot(n_cores, 100*d['clock gap'], 's--', color='tab:red', label='clock gap')
+    ax3.set_ylabel('clock gap [%]', color='tab:red')
+    fig.savefig(str(path), dpi=200)
+    pyplot.close(fig)
+
+
+def profiling_breakdown(records):
+    """Self time per timestep of the profiled functions of a list of run cases, per category.
+
+    :param list records: the :class:`of.scanner.CaseRecord` of the run cases.
+    :return: dict with entries ``'profiling'``: dict with an array per category (see :mod:`of.profiling`),
+        NAN for run cases without profiling, and ``'hot spot'``: list with the function with the largest
+        self time of every run case. Empty if none of the run cases was profiled.
+    """
+    if not any(record.profiling for record in records):
+        return {}
+    times = [ self_times_by_category(record.profiling) if record.profiling and record.n_timesteps else None
+              for record in records
+            ]
+    categories = next(t for t in times if t is not None)
+    return { 'profiling' : { c: np.array([t[c] / record.n_timesteps if t else float('NAN') for t, record in zip(times, records)])
+                             for c in categories
+                           }
+           , 'hot spot' : [hot_spot(record.profiling) for record in records]
+           }
+
+
+def print_profiling(n_cores, d, file=sys.stdout):
+    """Print the hot spot table.
+
+    :param d: dict with the entries of :func:`profiling_breakdown`.
+    """
+    categories = list(d['profiling'])
+    width = 10 + 10*len(categories) + 32
+    line = width*'-'
+    print(f"\n{'profiling of rank 0: self time per timestep [s]':^{width}}", file=file)
+    print(line, file=file)
+    print(f"{'#cores':>10}" + ''.join(f"{c:>10}" for c in categories) + f"  {'hot spot':<30}", file=file)
+    for i in range(len(n_cores)):
+        print( f"{n_cores[i]:>10}" + ''.join(f"{d['profiling'][c][i]:>10.4f}" for c in categories)
+             + f"  {d['hot spot'][i][:30]:<30}"
+             , file=file
+             )
+    print(line, file=file)
+
+
+def plot_profiling(n_cores, d, title, path):
+    """Stacked bar chart of the cpu time per timestep (self time x number of cores) per category.
+
+    A category that scales perfectly has a constant cpu time, the categories that grow with the
+    number of cores are the ones that stop scaling.
+
+    :param d: dict with the entries of :func:`profiling_breakdown`.
+    :param Path path: the .png file.
+    """
+    pyplot = import_pyplot()
+    fig, ax = pyplot.subplots()
+    x = np.arange(len(n_cores))
+    bottom = np.zeros(len(n_cores))
+    for c, times in d['profiling'].items():
+        cpu_times = np.nan_to_num(times * n_cores)
+        ax.bar(x, cpu_times, bottom=bottom, label=c)
+        bottom += cpu_times
+    ax.set_xticks(x)
+    ax.set_xticklabels([str(n) for n in n_cores])
+    ax.set_xlabel('# cores')
+    ax.set_ylabel('cpu time per timestep [s]')
+    ax.set_title(title)
+    ax.legend()
+    fig.savefig(str(path), dpi=200)
+    pyplot.close(fig)
+
+
+def print_counters(n_nodes, n_cores, records, file=sys.stdout):
+    """Print the instructions per cycle and the memory bandwidth (see :mod:`of.counters`) of the run cases.
+
+    :return: dict with arrays ``'IPC'`` and ``'GB/s'`` (aggregated over all ranks).
+    """
+    ipcs = np.array([ipc(record.counters) for record in records])
+    gbs = np.array([bandwidth(record.counters) for record in records])
+    line = 50*'-'
+    print(f"\n{'hardware counters':^50}", file=file)
+    print(line, file=file)
+    print(f"{'#nodes':>10}{'#cores':>10}{'IPC':>10}{'GB/s':>10}{'GB/s/node':>10}", file=file)
+    for i in range(len(n_cores)):
+        print(f"{n_nodes[i]:>10}{n_cores[i]:>10}{ipcs[i]:>10.2f}{gbs[i]:>10.1f}{gbs[i]/n_nodes[i]:>10.1f}", file=file)
+    print(line, file=file)
+    return {'IPC': ipcs, 'GB/s': gbs}
+
+
+def print_accounting(n_nodes, n_cores, walltimes, records, file=sys.stdout):
+    """Print the slurm accounting (see :mod:`of.accounting`) of the run cases.
+
+    The memory per node is the memory of the largest rank times the number of ranks per node, which
+    tells the smallest number of nodes a mesh fits on.
+
+    :return: dict with arrays ``'energy per timestep'`` (J), ``'max rss per rank'`` (bytes),
+        ``'cpu efficiency'`` and ``'core hours'``.
+    """
+    energy = np.array([energy_per_timestep(record.accounting, walltime) for record, walltime in zip(records, walltimes)])
+    max_rss = np.array([record.accounting.get('max_rss', float('NAN')) for record in records])
+    efficiency = np.array([cpu_efficiency(record.accounting) for record in records])
+    hours = np.array([core_hours(record.accounting) for record in records])
+    line = 73*'-'
+    print(f"\n{'slurm accounting':^73}", file=file)
+    print(line, file=file)
+    print(f"{' ':>10}{' ':>10}{'energy per':>12}{'MaxRSS':>10}{'memory':>10}{'cpu':>11}{'core':>10}", file=file)
+    print(f"{'#nodes':>10}{'#cores':>10}{'timestep[J]':>12}{'rank[MB]':>10}{'node[GB]':>10}{'efficiency':>11}{'hours':>10}", file=file)
+    for i in range(len(n_cores)):
+        print( f"{n_nodes[i]:>10}{n_cores[i]:>10}{energy[i]:>12.1f}{max_rss[i]/1024**2:>10.0f}"
+               f"{max_rss[i]*n_cores[i]/n_nodes[i]/1024**3:>10.1f}{100*efficiency[i]:>10.1f}%{hours[i]:>10.2f}"
+             , file=file
+             )
+    print(line, file=file)
+    return { 'energy per timestep' : energy
+           , 'max rss per rank' : max_rss
+           , 'cpu efficiency' : efficiency
+           , 'core hours' : hours
+           }
+
+
+def print_decomposition(n_cores, records, file=sys.stdout):
+    """Print the load imbalance and communication surface of the decompositions of the run cases.
+
+    :return: dict with arrays ``'cell imbalance'``, ``'processor faces per cell'`` and ``'max processor faces'``.
+    """
+    imbalance = np.array([record.cell_imbalance() for record in records])
+    faces_per_cell = np.array([record.processor_faces_per_cell() for record in records])
+    max_faces = np.array([max(record.processor_faces, default=0) for record in records])
+    line = 52*'-'
+    print(f"\n{'decomposition':^52}", file=file)
+    print(line, file=file)
+    print(f"{' ':>10}{'cell':>10}{'max proc':>10}{'shared':>10}{'proc faces':>12}", file=file)
+    print(f"{'#cores':>10}{'imbalance':>10}{'faces':>10}{'faces':>10}{'per cell':>12}", file=file)
+    for i in range(len(n_cores)):
+        print( f"{n_cores[i]:>10}{100*imbalance[i]:>9.1f}%{max_faces[i]:>10}{records[i].total_processor_faces:>10}"
+               f"{faces_per_cell[i]:>12.4f}"
+             , file=file
+             )
+    print(line, file=file)
+    return { 'cell imbalance' : imbalance
+           , 'processor faces per cell' : faces_per_cell
+           , 'max processor faces' : max_faces
+           }
+
+
+def print_decomposition_comparison(decompositions, file=sys.stdout):
+    """Compare the variants (launch strategies, decomposition methods) of the run cases with the same number of cores.
+
+    For every number of cores run with more than one variant, the walltime per timestep of each variant
+    is divided by the best one. These relative walltimes are correlated with the load imbalance and
+    the communication surface of the decomposition (Pearson correlation coefficient), which shows which
+    of the two explains the differences.
+
+    :param dict decompositions: ``{(case, variant): (n_cores, walltimes, cell imbalance, processor faces per cell)}``.
+    """
+    by_cores = {}
+    for (case, variant), (n_cores, walltimes, imbalance, faces_per_cell) in decompositions.items():
+        for i, n in enumerate(n_cores):
+            if n > 1 and not math.isnan(walltimes[i]):
+                by_cores.setdefault((case, n), []).append((walltimes[i], variant or 'default', imbalance[i], faces_per_cell[i]))
+    line = 69*'-'
+    print(f"\n{'comparison of the variants with the same number of cores':^69}", file=file)
+    print(line, file=file)
+    print(f"{'case':>10}{'#cores':>8}{'best':>30}{'worst/best':>12}", file=file)
+    relative = []
+    for (case, n), variants in sorted(by_cores.items()):
+        if len(variants) < 2:
+            continue
+        variants.sort()
+        best = variants[0][0]
+        print(f"{case:>10}{n:>8}{variants[0][1]:>30}{variants[-1][0]/best:>12.3f}", file=file)
+        relative += [(walltime / best, imbalance, faces) for walltime, _, imbalance, faces in variants]
+    print(line, file=file)
+    relative = np.array([r for r in relative if not np.isnan(r).any()])
+    if len(relative) > 2:
+        for j, name in ((1, 'cell imbalance'), (2, 'processor faces per cell')):
+            if relative[:, 0].std() == 0 or relative[:, j].std() == 0:
+                continue
+            r = np.corrcoef(relative[:, 0], relative[:, j])[0, 1]
+            print(f"correlation of the relative walltime with the {name}: {r:.2f}", file=file)
+
+
+def print_scaling_models( n_nodes, n_cores, walltimes, walltime_errors, cores_per_node
+                        , efficiency_floor=0.7, predict_nodes=0, file=sys.stdout
+                        ):
+    """Fit the scaling models (see :mod:`of.model`) to the walltimes, print their parameters and predictions.
+
+    The predictions are for the measured core counts and for 1, 2, 4, ... predict_nodes full nodes. The
+    recommended core count is the fastest one with a predicted efficiency of at least efficiency_floor
+    (see :func:`of.model.recommend`), according to the communication model (or Amdahl's if there are
+    too few run cases).
+
+    :param int cores_per_node: the number of cores of a node of the cluster (see :data:`of.NCORESPERNODE`),
+        not the largest number of cores per node of the run cases, which may use nodes partially.
+    :param int predict_nodes: the largest number of nodes to predict. 0 is 4 times the largest measured.
+    :return: dict with the fitted models ``'scaling models'`` (by name), and the ``'recommended cores'``
+        (0 if no model could be fitted).
+    """
+    models = {}
+    for name in scaling_model.MODELS:
+        m = scaling_model.fit(name, n_cores, walltimes, walltime_errors)
+        if m is not None:
+            models[name] = m
+    if not models:
+        return {'scaling models': models, 'recommended cores': 0}
+
+    line = 82*'-'
+    print(f"\n{'scaling models':^82}", file=file)
+    print(line, file=file)
+    for name, m in models.items():
+        params = ', '.join( f"{term}: {value:.4g} +/- {error:.2g}"
+                            for term, value, error in zip(m.terms, m.params, np.sqrt(np.diag(m.cov)))
+                          )
+        s, ds = scaling_model.serial_fraction(m)
+        print(f"{name:>14}: {params}", file=file)
+        print(f"{' ':>16}serial fraction {s:.4f} +/- {ds:.4f}, chi2/dof {m.chi2:.3g}/{m.dof}", file=file)
+    print(line, file=file)
+
+    if not predict_nodes:
+        predict_nodes = 4 * int(max(n_nodes))
+    nodes = [1]
+    while nodes[-1] < predict_nodes:
+        nodes.append(2 * nodes[-1])
+    candidates = np.array(sorted(set(int(n) for n in n_cores) | {n * cores_per_node for n in nodes}))
+    measured = {int(n) for n in n_cores}
+    best = models.get('communication', models.get('amdahl'))
+    reference = int(n_cores[0])
+    predicted, errors = scaling_model.predict(best, candidates)
+    efficiencies = scaling_model.efficiency(best, candidates, reference)
+    gustafson = scaling_model.gustafson_speedup(best, candidates)
+    recommended = scaling_model.recommend(best, candidates, efficiency_floor, reference)
+
+    print(f"predictions of the {best.name} model (* measured)", file=file)
+    print(f"{'#nodes':>10}{'#cores':>10}{'walltime':>12}{'+/-':>10}{'efficiency':>12}{'Gustafson':>12}", file=file)
+    for i, n in enumerate(candidates):
+        mark = '*' if n in measured else ' '
+        print( f"{-(-n // cores_per_node):>10}{n:>9}{mark}{predicted[i]:>12.4g}{errors[i]:>10.2g}"
+               f"{efficiencies[i]:>12.3f}{gustafson[i]:>12.1f}"
+             , file=file
+             )
+    print(line, file=file)
+    print(f"recommended: {recommended} cores (the fastest with a predicted efficiency >= {efficiency_floor})", file=file)
+    return {'scaling models': models, 'recommended cores': recommended}
+
+
+def record_results(results, case, strategy, n_nodes, n_cores, dirs, records, d, tags, store=None):
+    """Add the run cases of a case and launch strategy to the results store (see :mod:`of.store`).
+
+    :param d: dict with the entries computed by :func:`postprocess`.
+    :param dict tags: extra tags of the sweep.
+    """
+    info = results_store.load_sweep_info(results)
+    if not info:
+        info = {'cluster': VSC_INSTITUTE_CLUSTER, 'modules': MODULES[VSC_INSTITUTE_CLUSTER]}
+    mesh = next((int(n) for n in d['cells per core'] * n_cores if not math.isnan(n)), '')
+    sweep_tags = results_store.sweep_tags(info, case, 'weak' if d['weak scaling'] else 'strong', mesh)
+    sweep_tags.update(tags)
+    runs = []
+    for i, record in enumerate(records):
+        runs.append({ 'run_case': str(dirs[i])
+                    , 'variant': strategy
+                    , 'n_nodes': n_nodes[i]
+                    , 'n_cores': n_cores[i]
+                    , 'n_cells': record.n_cells
+                    , 'n_timesteps': record.n_timesteps
+                    , 'walltime': d['walltime per timestep'][i]
+                    , 'walltime_error': d['walltime per timestep error'][i]
+                    , 'speedup': d['speedup'][i]
+                    , 'efficiency': d['parallel efficiency'][i]
+                    , 'energy_per_timestep': energy_per_timestep(record.accounting, d['walltime per timestep'][i])
+                    , 'max_rss': record.accounting.get('max_rss', float('NAN'))
+                    , 'cpu_efficiency': cpu_efficiency(record.accounting)
+                    , 'step_times': np.diff(record.execution_times).tolist()
+                    })
+    try:
+        results_store.record_runs(results, sweep_tags, runs, path=store)
+    except (sqlite3.Error, RuntimeError) as x:
+        click.secho(f"Could not add the results to the results store: {x}", fg='red')
+
+
+def plot_strategies(curves, title, path):
+    """Plot the parallel efficiency of all launch strategies (see :mod:`of.launch`) in a single figure.
+
+    :param dict curves: ``{(case, strategy): (n_cores, parallel efficiency, error)}``.
+    :param Path path: the .png file.
+    """
+    pyplot = import_pyplot()
+    fig, ax = pyplot.subplots()
+    cases = {case for case, _ in curves}
+    for (case, strategy), (n_cores, efficiency, errors) in curves.items():
+        label = strategy or 'default'
+        if len(cases) > 1:
+            label = f"{case} {label}"
+        ax.errorbar(n_cores, efficiency, yerr=errors, fmt='o-', capsize=3, label=label)
+    ax.set_title(title)
+    ax.set_xlabel('# cores')
+    ax.set_ylabel('parallel efficiency')
+    ax.set_xscale('log')
+    ax.legend()
+    fig.savefig(str(path), dpi=200)
+    pyplot.close(fig)
+
+
+#===================================================================================================
+def postprocess( case, results, clean, verbosity, jobs=1, use_cache=True, warmup=0, exclude_outliers=True
+               , efficiency_floor=0.7, predict_nodes=0, record=True, store=None, tags=()
+               , baseline='', regression_threshold=regression.REGRESSION_THRESHOLD, alpha=regression.ALPHA
+               ):
+    """Postprocess strong scaling test results.
+
+    Weak scaling tests (see :mod:`of.weak`) are recognized by the number of cells, which differs
+    between the run cases. Their efficiency is the weak scaling efficiency (see :func:`weak_efficiency`).
+
+    :param case: name of the OpenFOAM case. If empty, it is extracted from the results directory name.
+    :param results: results directory of a scaling test, or a single run case directory.
+    :param clean: remove the processor* directories of completed run cases.
+    :param verbosity: print more output.
+    :param jobs: number of worker processes for cleaning and scanning the run cases. 0 uses all cores.
+    :param use_cache: reuse the records of previous runs for unchanged logs, and only scan the new
+        part of grown logs (see :mod:`of.cache`).
+    :param warmup: number of timesteps at the start of every run case that are excluded from the timings.
+    :param exclude_outliers: exclude slow timesteps (field output, interference) from the timings
+        (see :mod:`of.statistics`).
+    :param efficiency_floor: the minimum parallel efficiency of the recommended core count of a strong scaling
+        test (see :func:`print_scaling_models`).
+    :param predict_nodes: the largest number of nodes for which the scaling models predict the walltime.
+        0 is 4 times the largest number of nodes measured.
+    :param record: add the run cases to the central results store (see :mod:`of.store`).
+    :param store: path of the results store. If None, :func:`of.store.default_store`.
+    :param tags: extra tags of the sweep in the results store, a list of 'name=value' strings.
+    :param baseline: if not empty, compare the walltimes of the timesteps with this baseline, a results directory
+        or a query of the results store (see :mod:`of.regression`).
+    :param regression_threshold: relative increase of the median walltime per timestep that is a regression.
+    :param alpha: significance level of the comparison with the baseline.
+    :return: dict with the results of the last case and launch strategy. With a baseline, it also has the
+        ``'comparisons'`` (see :func:`of.regression.compare`) and the number of ``'regressions'``.
+    """
+    
+    results = Path(results).resolve()
+    results_name = results.name
+    
+    if not case:
+        pattern = r"(\w+)-(?:strong|weak)-scaling-test-(\d+).(\d+)"
+        m = re.match(pattern, results_name)
+        if m:
+            case = m[1]
+        else:
+            pattern = r'(\w+)-(\d+)x(\d+)cores'
+            m = re.match(pattern, results_name)
+            if m:
+                case = m[1]
+            else:
+                raise ValueError(f"Unable to extract case name from results directory {results}")    
+    
+    if verbosity:
+        print(f"{case=}")
+        
+    if not results.exists():
+        raise FileNotFoundError(results)
+    extra_tags = results_store.parse_tags(tags)
+    
+    # Gather the results
+    # The run cases are grouped by case and launch strategy (see of.launch)
+    cases = {}
+    n_cores = []
+    Dir = namedtuple('Dir', ['name', 'n_nodes', 'n_tasks'])
+    
+    # <results> may be 
+    #   . a results directory, containing several executed cases, or 
+    #   . a result directory, i.e. a single executed case
+    m = RUN_CASE_PATTERN.match(str(results.name))
+    if m:
+        # a (single) result directory
+        single_result = True
+        case = m[1]
+        cases.setdefault((case, m[4] or ''), []).append(Dir( results.name, int(m[2]),  int(m[2]) * int(m[3]) ))
+    
+    else:
+        single_result = False
+        # Pick up the case directories.
+        for item in results.glob('*'):
+            if item.is_dir():
+                m = RUN_CASE_PATTERN.match(str(item.name))
+                if m:
+                    case = m[1]
+                    cases.setdefault((case, m[4] or ''), []).append(Dir( item.name, int(m[2]),  int(m[2]) * int(m[3]) ))
+        # The serial run case does not depend on the launch strategy, it is the reference for all strategies.
+        for (case, strategy), dirs in cases.items():
+            if strategy and not any(dir.n_tasks == 1 for dir in dirs):
+                dirs += [dir for dir in cases.get((case, ''), []) if dir.n_tasks == 1]
+
+    if verbosity>1:
+        print("\nCases:")
+        pp = pprint.PrettyPrinter(indent=2)
+        pp.pprint(cases)
+    
+    # Sort the run cases of every case by number of cores
+    for case, dirs in cases.items():
+        n_nodes = np.array([dir.n_nodes for dir in dirs])
+        n_cores = np.array([dir.n_tasks for dir in dirs])
+        
+        dirs = np.array([dir.name for dir in dirs])
+        p = n_cores.argsort(kind='stable')
+        cases[case] = (n_nodes[p], n_cores[p], dirs[p])
+
+    # Clean and scan all run cases, in parallel if jobs > 1. The records come back in the same order.
+    # The serial run case may be in several groups, it is scanned only once.
+    names = list(dict.fromkeys(str(dir) for _, _, dirs in cases.values() for dir in dirs))
+    if single_result:
+        run_cases = [results]
+    else:
+        run_cases = [results / name for name in names]
+    cache = load_cache(results) if use_cache else None
+    records = map_run_cases(run_cases, clean=clean and not single_result, jobs=jobs, verbosity=verbosity, cache=cache)
+    # a single sacct call for the finished jobs without accounting
+    update_accounting(run_cases, records, load_jobs(results.parent if single_result else results), cache=cache)
+    if use_cache:
+        save_cache(results, cache)
+    records = dict(zip(names, records))
+
+    sweep_results = results.parent if single_result else results
+    curves = {}
+    decompositions = {}
+    # the walltimes of the timesteps of the run cases of every configuration (n_nodes, n_cores, variant), for the baseline
+    current = {}
+    for name, record in records.items():
+        m = RUN_CASE_PATTERN.match(name)
+        current.setdefault((int(m[2]), int(m[2]) * int(m[3]), m[4] or ''), []).append(step_times(record.execution_times))
+    # empty if there are no run cases
+    d = {}
+    for (case, strategy), (n_nodes, n_cores, dirs) in cases.items():
+        stats = []
+        n_cells = []
+        case_records = []
+        for dir in dirs:
+            record = records[str(dir)]
+            case_records.append(record)
+            run_case = results if single_result else results / dir
+            stats.append(timestep_statistics( record.execution_times, warmup=warmup, exclude_outliers=exclude_outliers
+                                            , write_interval=write_interval(run_case)
+                                            ))
+            n_cells.append(record.n_cells)
+        n_cells = np.array(n_cells)
+        walltimes = np.array([ts.mean for ts in stats])
+        # half width of the confidence interval
+        walltime_errors = np.array([(ts.ci_high - ts.ci_low) / 2 for ts in stats])
+        cpu_times = walltimes * n_cores
+        cells_per_core = n_cells / n_cores
+        speedup = walltimes[0]/walltimes
+        speedup_errors = ratio_error(walltimes[0], walltime_errors[0], walltimes, walltime_errors)
+        speedup_errors[0] = 0 # exactly 1
+        parallel_efficiency = speedup/n_cores
+        parallel_efficiency_errors = speedup_errors/n_cores
+        weak = is_weak_scaling(n_cells)
+        if weak:
+            parallel_efficiency, parallel_efficiency_errors = weak_efficiency(walltimes, walltime_errors, cells_per_core)
+            # scaled speedup
+            speedup = parallel_efficiency*n_cores
+            speedup_errors = parallel_efficiency_errors*n_cores
+        
+        max_cores_per_nodes = n_cores[-1]//n_nodes[-1]
+        d = {            
+            '# nodes' : n_nodes
+          , '# cores' : n_cores
+          , 'walltime per timestep' : walltimes
+          , 'walltime per timestep error' : walltime_errors
+          , 'timestep statistics' : stats
+          , 'cpu_time per timestep' : cpu_times
+          , 'cells per core' : cells_per_core
+          , 'speedup' : speedup
+          , 'speedup error' : speedup_errors
+          , 'parallel efficiency' : parallel_efficiency
+          , 'parallel efficiency error' : parallel_efficiency_errors
+          , 'max_cores_per_nodes' : max_cores_per_nodes
+          , 'weak scaling' : weak
+        }
+        d.update(solver_breakdown(case_records))
+        d.update(profiling_breakdown(case_records))
+    
+        # print to string
+        output = io.StringIO()
+        line = 82*'-'
+        print(line, file=output)
+        title = f"{results_name} (on {VSC_INSTITUTE_CLUSTER})"
+        if strategy:
+            title = f"{results_name} [{strategy}] (on {VSC_INSTITUTE_CLUSTER})"
+        # the files of a launch strategy other than the default get the strategy as a suffix
+        output_name = f"{results_name}.{strategy}" if strategy else results_name
+        print(f"{title:^82}", file=output)
+        print(line, file=output)
+        scaling = 'weak' if weak else 'parallel'
+        print(f"{     ' ':>10}{     ' ':>10}{'walltime':>10}{'cpu_time':>10}{'#cells':>10}{      ' ':>8}{' ':>6}{         ' ':>11}{' ':>7}"  , file=output)
+        print(f"{     ' ':>10}{     ' ':>10}{     'per':>10}{     'per':>10}{   'per':>10}{      ' ':>8}{' ':>6}{   scaling:>11}{' ':>7}"  , file=output)
+        print(f"{'#nodes':>10}{'#cores':>10}{'timestep':>10}{'timestep':>10}{  'core':>10}{'speedup':>8}{'+/-':>6}{'efficiency':>11}{'+/-':>7}\n", file=output)
+        for i in range(len(n_cores)):
+            print(f"{n_nodes[i]:>10}{n_cores[i]:>10}{walltimes[i]:>10.3f}{cpu_times[i]:>10.3f}{cells_per_core[i]:>10.0f}{speedup[i]:>8.1f}{speedup_errors[i]:>6.1f}{parallel_efficiency[i]:>11.3f}{parallel_efficiency_errors[i]:>7.3f}", file=output)
+        print(line, file=output)
+        print(f"Maximum number of cores per node: {d['max_cores_per_nodes']}/{NCORESPERNODE[VSC_INSTITUTE_CLUSTER]}", file=output)
+        print(f"+/-: half width of the 95% confidence interval (warmup = {warmup} timesteps"
+              f"{', outliers excluded' if exclude_outliers else ''})", file=output)
+        if weak:
+            print("Weak scaling: efficiency = walltime per timestep per cell per core of the serial run / that of the run;"
+                  "\n              speedup = scaled speedup = #cores * efficiency", file=output)
+        print(file=output)
+        # timestep statistics
+        print(f"{'walltime per timestep [s]':^82}", file=output)
+        print(line, file=output)
+        print(f"{'#cores':>10}{'#steps':>8}{'#excl':>6}{'median':>9}{'trimmed':>9}{'p5':>9}{'p95':>9}{'std':>8}{'95% CI':>14}", file=output)
+        for i in range(len(n_cores)):
+            ts = stats[i]
+            print(f"{n_cores[i]:>10}{ts.n:>8}{ts.n_excluded:>6}{ts.median:>9.3f}{ts.trimmed_mean:>9.3f}{ts.p5:>9.3f}{ts.p95:>9.3f}{ts.std:>8.3f}{ts.ci_low:>7.3f}-{ts.ci_high:<6.3f}", file=output)
+        print(line, file=output)
+        print_solver_breakdown(n_cores, d, file=output)
+        if 'profiling' in d:
+            print_profiling(n_cores, d, file=output)
+        if any(record.counters for record in case_records):
+            d.update(print_counters(n_nodes, n_cores, case_records, file=output))
+        if any(record.accounting for record in case_records):
+            d.update(print_accounting(n_nodes, n_cores, walltimes, case_records, file=output))
+        if any(record.processor_cells for record in case_records):
+            d.update(print_decomposition(n_cores, case_records, file=output))
+            decompositions[(case, strategy)] = (n_cores, walltimes, d['cell imbalance'], d['processor faces per cell'])
+        if not weak:
+            d.update(print_scaling_models( n_nodes, n_cores, walltimes, walltime_errors, NCORESPERNODE[VSC_INSTITUTE_CLUSTER]
+                                         , efficiency_floor=efficiency_floor, predict_nodes=predict_nodes, file=output
+                                         ))
+        
+        if record:
+            record_results(sweep_results, case, strategy, n_nodes, n_cores, dirs
+                          , case_records, d, extra_tags, store
+                          )
+
+        # print to stdout
+        print()
+        print(output.getvalue())
+        
+        # print to file
+        with open(results / (output_name + ".parallel_efficiency.txt"), mode='w') as f:
+            print(output.getvalue(), file=f)
+        
+        if single_result:
+            break
+        
+        # Produce plot and save .png
+        for i in range(len(parallel_efficiency)):
+            if math.isnan(parallel_efficiency[i]):
+                parallel_efficiency[i] = 0
+                parallel_efficiency_errors[i] = 0
+        pyplot = import_pyplot()
+        
+        fig = pyplot.figure()
+        ax1 = fig.add_subplot(111)
+        ax2 = ax1.twiny()
+        
+        ax1.errorbar(n_cores, parallel_efficiency, yerr=parallel_efficiency_errors, fmt='o-', capsize=3)
+        ax1.set_title(title)
+        ax1.set_xlabel('# cores')
+        ax1.set_ylabel('weak scaling efficiency' if weak else 'parallel efficiency')
+        # ax1.set_axis([0, n_cores[-1], 0, 1])
+        ax1.set_xscale('log')
+        ax2_tick_resultss = n_cores
+
+        def tick_function(ncores):
+            labels = []
+            for i in range(len(ncores)):
+                label = f'{n_nodes[i]}/{ncores[i]}'
+                labels.append(label)
+            return labels
+
+        ax2.set_xscale('log')
+        ax2.set_xlim(ax1.get_xlim())
+        ax2.set_xticks(ax2_tick_resultss)
+        ax2.set_xticklabels(tick_function(ax2_tick_resultss))
+        
+        for i in range(len(cells_per_core)):
+            ax2.plot( [n_cores[i], n_cores[i]], [0,1])
+            if math.isnan(cells_per_core[i]):
+                cpc = "NAN" 
+            else:
+                cpc = int(cells_per_core[i])
+            pyplot.text(n_cores[i],0,f'{cpc} cells/core', rotation=90)
+        
+        pyplot.savefig(str(results / (output_name + ".parallel_efficiency.png")), dpi=200)
+        pyplot.close(fig)
+
+        plot_solver_breakdown(n_cores, d, title, results / (output_name + ".solver_breakdown.png"))
+        if 'profiling' in d:
+            plot_profiling(n_cores, d, title, results / (output_name + ".profiling.png"))
+        curves[(case, strategy)] = (n_cores, parallel_efficiency, parallel_efficiency_errors)
+
+    if len(decompositions) > 1:
+        output = io.StringIO()
+        print_decomposition_comparison(decompositions, file=output)
+        print(output.getvalue())
+        with open(results / (results_name + ".decomposition.txt"), mode='w') as f:
+            print(output.getvalue(), file=f)
+
+    if len(curves) > 1:
+        plot_strategies(curves, f"{results_name} (on {VSC_INSTITUTE_CLUSTER})", results / (results_name + ".strategies.png"))
+
+    if baseline:
+        comparisons = regression.compare( current, regression.baseline_step_times(baseline, case, sweep_results, store)
+                                        , warmup=warmup, exclude_outliers=exclude_outliers
+                                        , threshold=regression_threshold, alpha=alpha
+                                        )
+        output = io.StringIO()
+        regression.print_comparisons(comparisons, baseline, file=output)
+        print(output.getvalue())
+        with open(results / (results_name + ".regression.txt"), mode='w') as f:
+            print(output.getvalue(), file=f)
+        d['comparisons'] = comparisons
+        d['regressions'] = sum(c.verdict == 'regression' for c in comparisons)
+
+    return d
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module of.profiling
+===================
+
+OpenFOAM's built-in profiling.
+
+With ``profiling { active true; }`` in ``system/controlDict``, OpenFOAM writes the file
+``<time>/uniform/profiling`` (``processor<N>/<time>/uniform/profiling`` in a parallel run) at every
+write time. It contains a tree of triggers, one per profiled function::
+
+    trigger1
+    {
+        id              1;
+        parentId        0;
+        description     "fvMatrix::solve_p";
+        calls           20;
+        totalTime       0.3;
+        childTime       0.25;
+        onStack         0;
+    }
+
+``totalTime`` is the inclusive time, ``totalTime - childTime`` the exclusive (self) time. The
+self times are grouped in :data:`CATEGORIES` for the scaling report. Only rank 0 is read: with a
+balanced decomposition it is representative, and it is the rank that does the I/O.
+
+The profiling file is only written at write times. In benchmark mode (no field output) the fields
+are therefore written once, at the end of the run, when profiling is on.
+"""
+
+import re
+from pathlib import Path
+
+#===================================================================================================
+CATEGORIES = ( ('I/O', re.compile(r'\b(?:write|read)|Write|Read'))
+             , ('MPI', re.compile(r'[Rr]educe|Pstream|[Gg]ather|[Ss]catter|\bsync|Sync'))
+             , ('solve', re.compile(r'solve', re.IGNORECASE))
+             , ('assembly', re.compile(r'.'))
+             )
+"""Categories of profiled functions, and the patterns matching their descriptions. The first match
+wins. The self time of the application itself (equation assembly, flux computation) is 'assembly'.
+'read', 'write' and 'sync' must start a word, or be capitalized in a camelCase name, so that e.g.
+'thread' is not I/O and 'async' is not MPI."""
+
+_TRIGGER = re.compile(r'trigger\d+\s*\{([^{}]*)\}')
+_ENTRY = re.compile(r'(\w+)\s+("[^"]*"|[^;]*);')
+
+
+#===================================================================================================
+def profiling_commands():
+    """Job script lines switching OpenFOAM's profiling on in system/controlDict."""
+    return [ "# Profiling"
+           , 'foamDictionary -entry profiling -set "{ active true; cpuInfo false; memInfo false; sysInfo false; }" system/controlDict'
+           ]
+
+
+def parse_profiling(text):
+    """Parse the content of a uniform/profiling file.
+
+    :return: dict mapping the description of every profiled function to ``[calls, total time, self time]``.
+        Functions that are profiled in several places of the tree are summed.
+    """
+    profile = {}
+    for trigger in _TRIGGER.finditer(text):
+        entries = {key: value.strip('"') for key, value in _ENTRY.findall(trigger[1])}
+        try:
+            description = entries['description']
+            calls = int(entries.get('calls', 0))
+            total_time = float(entries['totalTime'])
+            child_time = float(entries.get('childTime', 0))
+        except (KeyError, ValueError):
+            continue
+        p = profile.setdefault(description, [0, 0., 0.])
+        p[0] += calls
+        p[1] += total_time
+        p[2] += total_time - child_time
+    return profile
+
+
+def latest_profiling_file(run_case):
+    """The uniform/profiling file of rank 0 in the latest time directory of a run case, or None."""
+    run_case = Path(run_case)
+    root = run_case / 'processor0'
+    if not root.is_dir():
+        root = run_case
+    latest = None
+    for item in root.iterdir():
+        try:
+            t = float(item.name)
+        except ValueError:
+            continue
+        if (item / 'uniform/profiling').exists() and (latest is None or t > latest[0]):
+            latest = (t, item / 'uniform/profiling')
+    return latest[1] if latest else None
+
+
+def read_case_profiling(run_case):
+    """Read the profiling of rank 0 of a run case (see :func:`parse_profiling`). Empty if there is none."""
+    path = latest_profiling_file(run_case)
+    if path is None:
+        return {}
+    return parse_profiling(path.read_text(errors='replace'))
+
+
+def category(description):
+    """The category (see :data:`CATEGORIES`) of a profiled function."""
+    for name, pattern in CATEGORIES:
+        if pattern.search(description):
+            return name
+
+
+def self_times_by_category(profile):
+    """Sum the self times of a profile (see :func:`parse_profiling`) per category.
+
+    :return: dict mapping every category name to its self time, in the order of :data:`CATEGORIES`.
+    """
+    times = {name: 0. for name, _ in CATEGORIES}
+    for description, (_, _, self_time) in profile.items():
+        times[category(description)] += self_time
+    return times
+
+
+def hot_spot(profile):
+    """The description of the profiled function with the largest self time, or '' if there is none."""
+    if not profile:
+        return ''
+    return max(profile, key=lambda description: profile[description][2])
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module of.regression
+====================
+
+Detect performance regressions of a scaling test against a baseline, e.g. a canary sweep after an
+upgrade of the modules against the sweep before it.
+
+The baseline is either
+
+* a results directory of an earlier sweep of the same case, or
+* a query of the results store (see :mod:`of.store`): comma separated ``tag=pattern`` pairs, e.g.
+  ``'cluster=vaughan,openfoam=v2012*'``. The timesteps of all matching sweeps are pooled per
+  configuration. If the query has no ``case`` tag, only sweeps of the same case match.
+
+For every configuration (number of nodes, number of cores, launch strategy) in both, the walltimes of
+the timesteps are compared with the Mann-Whitney U test (see :func:`of.statistics.mann_whitney`). The warmup timesteps and
+the outliers are removed from every run case before the run cases are pooled (see
+:func:`of.statistics.select_times`). A configuration is a regression if
+its median walltime per timestep is more than ``threshold`` larger than that of the baseline, and the
+test says it is slower with a p-value below ``alpha``. Improvements are detected likewise.
+
+This module needs numpy.
+"""
+
+import sys
+from pathlib import Path
+from collections import namedtuple
+
+import numpy as np
+
+from of import store as results_store
+from of.cache import load_cache, scan_case_cached
+from of.launch import RUN_CASE_PATTERN
+from of.statistics import step_times, select_times, mann_whitney
+
+#===================================================================================================
+REGRESSION_THRESHOLD = 0.05
+"""Default relative increase of the median walltime per timestep that is a regression."""
+
+ALPHA = 0.01
+"""Default significance level of the Mann-Whitney U test."""
+
+Comparison = namedtuple( 'Comparison'
+                       , [ 'n_nodes', 'n_cores', 'variant', 'n_baseline', 'n_current'
+                         , 'median_baseline', 'median_current', 'change', 'p_value', 'verdict'
+                         ]
+                       )
+Comparison.__doc__ = """Comparison of a configuration with the baseline.
+
+:param n_nodes: number of nodes.
+:param n_cores: number of cores.
+:param variant: launch strategy (and decomposition method), '' for the default.
+:param n_baseline: number of timesteps of the baseline used.
+:param n_current: number of timesteps of the current run case used.
+:param median_baseline: median walltime per timestep of the baseline.
+:param median_current: median walltime per timestep of the current run case.
+:param change: relative change of the median, ``median_current / median_baseline - 1``.
+:param p_value: p-value of the one-sided Mann-Whitney U test in the direction of the change.
+:param verdict: 'regression', 'improvement' or 'ok'.
+"""
+
+
+#===================================================================================================
+def baseline_step_times(baseline, case, results, store=None):
+    """The walltimes of the timesteps of the baseline, per configuration.
+
+    :param str baseline: a results directory or a query of the results store (see the module documentation).
+    :param str case: name of the case.
+    :param results: the results directory of the current sweep, which is left out of a query.
+    :param store: path of the results store (see :func:`of.store.connect`).
+    :return: dict mapping the configurations ``(n_nodes, n_cores, variant)`` to a list with an array
+        with the walltimes of the timesteps for every run case with that configuration.
+    :raises ValueError: if baseline is neither a directory nor a query.
+    """
+    path = Path(baseline)
+    if path.is_dir():
+        cache = load_cache(path)
+        times = {}
+        for item in sorted(path.glob(f'{case}-*')):
+            m = RUN_CASE_PATTERN.match(item.name)
+            if not m or m[1] != case or not item.is_dir():
+                continue
+            record, _ = scan_case_cached(item, cache.get(item.name))
+            times.setdefault((int(m[2]), int(m[2]) * int(m[3]), m[4] or ''), []).append(step_times(record.execution_times))
+        return times
+    if '=' not in baseline:
+        raise ValueError(f"Baseline '{baseline}' is neither a results directory nor a query 'tag=pattern,...'.")
+    where = results_store.parse_tags(baseline.split(','))
+    where.setdefault('case', case)
+    times = results_store.load_step_times(where, exclude=results, path=store)
+    return {configuration: [np.array(t) for t in runs] for configuration, runs in times.items()}
+
+
+def pooled_times(runs, warmup=0, exclude_outliers=True):
+    """The walltimes of the timesteps of run cases with the same configuration, pooled.
+
+    The warmup timesteps and the outliers are removed from every run case separately (see
+    :func:`of.statistics.select_times`), as the warmup is at the start of every run case, and the
+    walltimes of different run cases may differ (e.g. other nodes).
+
+    :param list runs: an array with the walltimes of the timesteps for every run case.
+    :return: array with the walltimes.
+    """
+    selected = [select_times(times, warmup, exclude_outliers)[0] for times in runs]
+    return np.concatenate(selected) if selected else np.array([])
+
+
+def compare(current, baseline, warmup=0, exclude_outliers=True, threshold=REGRESSION_THRESHOLD, alpha=ALPHA):
+    """Compare the walltimes of the timesteps of the current run cases with those of the baseline.
+
+    :param dict current: the walltimes of the timesteps of the current run cases, by configuration
+        ``(n_nodes, n_cores, variant)``: a list with an array for every run case (see :func:`pooled_times`).
+    :param dict baseline: idem for the baseline.
+    :param int warmup: number of timesteps at the start of every run case that are excluded.
+    :param bool exclude_outliers: exclude slow timesteps (see :mod:`of.statistics`).
+    :param float threshold: relative change of the median that is significant.
+    :param float alpha: significance level of the test.
+    :return: list of :class:`Comparison`, for the configurations with timesteps in both.
+    """
+    comparisons = []
+    for configuration in sorted(set(current) & set(baseline), key=lambda c: (c[2], c[1], c[0])):
+        x = pooled_times(current[configuration], warmup, exclude_outliers)
+        y = pooled_times(baseline[configuration], warmup, exclude_outliers)
+        if len(x) == 0 or len(y) == 0:
+            continue
+        median_x, median_y = np.median(x), np.median(y)
+        change = median_x / median_y - 1
+        if change >= 0:
+            _, p = mann_whitney(x, y)
+        else:
+            _, p = mann_whitney(y, x)
+        verdict = 'ok'
+        if abs(change) > threshold and p < alpha:
+            verdict = 'regression' if change > 0 else 'improvement'
+        comparisons.append(Comparison(*configuration, len(y), len(x), median_y, median_x, change, p, verdict))
+    return comparisons
+
+
+def print_comparisons(comparisons, baseline, file=sys.stdout):
+    """Print the comparisons with the baseline as a table."""
+    line = 92*'-'
+    print(f"\n{'comparison with the baseline ' + str(baseline):^92}", file=file)
+    print(line, file=file)
+    print(f"{'#nodes':>8}{'#cores':>8}{'variant':>14}{'#steps':>14}{'median [s]':>20}{'change':>9}{'p-value':>10}{'':>2}{'verdict'}", file=file)
+    print(f"{'':>8}{'':>8}{'':>14}{'base/now':>14}{'base/now':>20}", file=file)
+    for c in comparisons:
+        steps = f"{c.n_baseline}/{c.n_current}"
+        medians = f"{c.median_baseline:.4g}/{c.median_current:.4g}"
+        print( f"{c.n_nodes:>8}{c.n_cores:>8}{c.variant or 'default':>14}{steps:>14}{medians:>20}"
+               f"{100*c.change:>8.1f}%{c.p_value:>10.2g}{'':>2}{c.verdict}"
+             , file=file
+             )
+    print(line, file=file)
+    n_regressions = sum(c.verdict == 'regression' for c in comparisons)
+    if n_regressions:
+        print(f"{n_regressions} regression(s).", file=file)
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module of.scanner
+=================
+
+Streaming, single pass scanner for the output of a strong scaling test run case.
+
+A run case directory ``<case>-NxMcores`` contains the OpenFOAM solver log ``<case>-NxMcores.log``
+and the slurm output file ``<case>-NxMcores.stdout``. Both files are read exactly once, in large
+binary chunks, and all information needed for post-processing is extracted with a single precompiled
+pattern per file. The memory used is independent of the file size (apart from the ExecutionTime
+series, which has one entry per timestep).
+"""
+
+import re
+import math
+from pathlib import Path
+from dataclasses import dataclass, field
+
+import click
+
+from of.profiling import read_case_profiling
+from of.counters import read_counters
+
+#===================================================================================================
+CHUNK_SIZE = 8 * 1024 * 1024
+"""Number of bytes read at once."""
+
+_NUMBER = rb'[-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?'
+
+# One alternative per kind of line we are interested in in the .log file. All alternatives are
+# anchored at the beginning of a line, and tried in a single pass over each chunk.
+LOG_PATTERN = re.compile(
+      rb'^(?:'
+    + rb'\w+:\s+Solving for (?P<field>\w+), Initial residual = \S+, Final residual = \S+, No Iterations (?P<iterations>\d+)'
+    + rb'|ExecutionTime = (?P<execution_time>' + _NUMBER + rb') s(?:\s+ClockTime = (?P<clock_time>' + _NUMBER + rb') s)?'
+    + rb'|Courant Number mean: (?P<courant_mean>' + _NUMBER + rb') max: (?P<courant_max>' + _NUMBER + rb')'
+    + rb')'
+    , re.MULTILINE
+)
+
+# "Mesh region0 size: 8000000" or "Mesh size: 8000000", in the .stdout file, and the decomposePar
+# output: the (indented) number of cells and of processor faces of every processor, and the
+# (unindented) total number of processor faces.
+STDOUT_PATTERN = re.compile(
+      rb'^(?:'
+    + rb'Mesh (?:\w+ )?size: (?P<n_cells>\d+)'
+    + rb'|[ \t]+Number of cells = (?P<processor_cells>\d+)'
+    + rb'|[ \t]+Number of processor faces = (?P<processor_faces>\d+)'
+    + rb'|Number of processor faces = (?P<total_processor_faces>\d+)'
+    + rb')'
+    , re.MULTILINE
+)
+
+
+#===================================================================================================
+@dataclass
+class CaseRecord:
+    """Everything post-processing needs to know about a single run case.
+
+    :param execution_times: OpenFOAM's ExecutionTime (cpu time since start) at every timestep.
+    :param clock_times: OpenFOAM's ClockTime (wall clock time since start) at every timestep.
+    :param n_cells: number of cells in the mesh, NAN if unknown.
+    :param completed: True if the .log file ends with the OpenFOAM end-of-run trailer.
+    :param iterations: linear solver statistics per field: ``{field: [total iterations, number of solves]}``.
+    :param courant_max: maximum Courant number encountered.
+    :param profiling: OpenFOAM's profiling of rank 0 at the end of the run (see :mod:`of.profiling`),
+        empty if the run was not profiled, or has not completed.
+    :param processor_cells: number of cells of every subdomain, from the decomposePar output.
+    :param processor_faces: number of processor faces of every subdomain, from the decomposePar output.
+    :param total_processor_faces: number of faces shared between subdomains, from the decomposePar output.
+    :param counters: hardware counters, summed over all ranks (see :func:`of.counters.read_counters`),
+        empty if they were not measured, or the run has not completed.
+    :param accounting: slurm accounting of the job of the run case (see :mod:`of.accounting`), empty
+        if it is not known (yet).
+    :param log_offset: number of bytes of the .log file that have been scanned.
+    :param stdout_offset: number of bytes of the .stdout file that have been scanned.
+    """
+    execution_times: list = field(default_factory=list)
+    clock_times: list = field(default_factory=list)
+    n_cells: float = float('NAN')
+    completed: bool = False
+    iterations: dict = field(default_factory=dict)
+    courant_max: float = float('NAN')
+    profiling: dict = field(default_factory=dict)
+    counters: dict = field(default_factory=dict)
+    accounting: dict = field(default_factory=dict)
+    processor_cells: list = field(default_factory=list)
+    processor_faces: list = field(default_factory=list)
+    total_processor_faces: int = 0
+    log_offset: int = 0
+    stdout_offset: int = 0
+
+    @property
+    def n_timesteps(self):
+        """Number of timesteps for which an ExecutionTime was recorded."""
+        return len(self.execution_times)
+
+    def mean_walltime_per_timestep(self):
+        """Mean walltime per timestep.
+
+        OpenFOAM's ExecutionTime is the elapsed time since the start. The mean of the differences
+        telescopes to ``(last - first) / (n - 1)``.
+        """
+        n = len(self.execution_times)
+        if n < 2:
+            return float('NAN')
+        return (self.execution_times[-1] - self.execution_times[0]) / (n - 1)
+
+    def mean_clocktime_per_timestep(self):
+        """Mean wall clock time per timestep, from the ClockTimes (see :meth:`mean_walltime_per_timestep`)."""
+        n = len(self.clock_times)
+        if n < 2:
+            return float('NAN')
+        return (self.clock_times[-1] - self.clock_times[0]) / (n - 1)
+
+    def clock_gap(self):
+        """Fraction of the wall clock time not spent computing: ``1 - ExecutionTime / ClockTime`` per timestep.
+
+        ExecutionTime is the cpu time of the (master) process, ClockTime the wall clock time. The gap is
+        time spent waiting, in I/O and in blocking communication.
+        """
+        return 1 - self.mean_walltime_per_timestep() / self.mean_clocktime_per_timestep()
+
+    def iterations_per_timestep(self):
+        """Mean number of linear solver iterations per timestep, per field (summed over all correctors)."""
+        n = self.n_timesteps
+        if n == 0:
+            return {}
+        return {field: total / n for field, (total, _) in self.iterations.items()}
+
+    def pressure_field(self):
+        """The name of the pressure field (``p_rgh`` or ``p``), or None if there is none."""
+        for name in ('p_rgh', 'p'):
+            if name in self.iterations:
+                return name
+        return None
+
+    def cell_imbalance(self):
+        """Load imbalance of the decomposition: max/average number of cells per subdomain - 1."""
+        if not self.processor_cells:
+            return float('NAN')
+        return max(self.processor_cells) * len(self.processor_cells) / sum(self.processor_cells) - 1
+
+    def processor_faces_per_cell(self):
+        """Communication surface of the decomposition: the number of faces shared between subdomains per cell."""
+        if not self.processor_cells:
+            return float('NAN')
+        return self.total_processor_faces / sum(self.processor_cells)
+
+    def time_per_pressure_iteration(self):
+        """Mean walltime per timestep divided by the mean number of pressure iterations per timestep."""
+        p = self.pressure_field()
+        if p is None:
+            return float('NAN')
+        return self.mean_walltime_per_timestep() / self.iterations_per_timestep()[p]
+
+
+#===================================================================================================
+def _scan(path, pattern, on_match, offset=0, chunk_size=CHUNK_SIZE):
+    """Scan the file at ``path`` from byte ``offset`` on, in chunks, calling ``on_match(m)`` for every match.
+
+    Only complete lines are matched. A trailing partial line (a line that is still being written) is
+    left for the next scan.
+
+    :return: the offset just past the last complete line, and the last two non-empty lines of the file
+        (the trailing partial line included).
+    """
+    tail = []
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        rest = b''
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            data = rest + chunk
+            end = data.rfind(b'\n') + 1
+            if end:
+                for m in pattern.finditer(data, 0, end):
+                    on_match(m)
+                offset += end
+                tail = _last_lines(data, end, tail)
+            rest = data[end:]
+    return offset, _last_lines(rest, len(rest), tail)
+
+
+def _last_lines(data, end, previous, n=2):
+    """Return the last ``n`` non-empty lines of ``data[:end]``, preceded by those in ``previous`` if there are less."""
+    lines = []
+    while len(lines) < n and end > 0:
+        start = data.rfind(b'\n', 0, end) + 1
+        line = data[start:end].strip()
+        if line:
+            lines.insert(0, line)
+        end = start - 1
+    if len(lines) < n:
+        lines = (previous + lines)[-n:]
+    return lines
+
+
+def is_end_of_run(tail):
+    """Test whether the last (non-empty) lines of a .log file are OpenFOAM's end-of-run trailer.
+
+    This is "End" for a serial run, and "End", "Finalising parallel run" for a parallel run.
+    """
+    if tail[-1:] == [b'End']:
+        return True
+    return tail[-2:] == [b'End', b'Finalising parallel run']
+
+
+#===================================================================================================
+def scan_log(path, record=None, offset=0, chunk_size=CHUNK_SIZE):
+    """Scan an OpenFOAM .log file and add what is found to ``record``.
+
+    :param Path path: the .log file.
+    :param CaseRecord record: the record to fill. If None, a new record is created.
+    :param int offset: start scanning at this byte offset (must be the start of a line).
+    :return: the record.
+    """
+    if record is None:
+        record = CaseRecord()
+    execution_times = record.execution_times
+    clock_times = record.clock_times
+    iterations = record.iterations
+
+    def on_match(m):
+        fld = m['field']
+        if fld is not None:
+            fld = fld.decode()
+            stats = iterations.get(fld)
+            if stats is None:
+                stats = iterations[fld] = [0, 0]
+            stats[0] += int(m['iterations'])
+            stats[1] += 1
+            return
+        execution_time = m['execution_time']
+        if execution_time is not None:
+            execution_times.append(float(execution_time))
+            clock_time = m['clock_time']
+            if clock_time is not None:
+                clock_times.append(float(clock_time))
+            return
+        courant_max = float(m['courant_max'])
+        if not courant_max <= record.courant_max: # also True if record.courant_max is NAN
+            record.courant_max = courant_max
+
+    record.log_offset, tail = _scan(path, LOG_PATTERN, on_match, offset=offset, chunk_size=chunk_size)
+    if tail:
+        record.completed = is_end_of_run(tail)
+    return record
+
+
+def scan_stdout(path, record=None, offset=0, chunk_size=CHUNK_SIZE):
+    """Scan the slurm .stdout file of a run case for the number of cells, and add it to ``record``.
+
+    We are looking for a line "Mesh region0 size: 8000000" or "Mesh size: 8000000". The first
+    occurrence is used. The decomposition statistics of decomposePar are also picked up.
+
+    :param Path path: the .stdout file.
+    :param CaseRecord record: the record to fill. If None, a new record is created.
+    :param int offset: start scanning at this byte offset (must be the start of a line).
+    :return: the record.
+    """
+    if record is None:
+        record = CaseRecord()
+
+    def on_match(m):
+        if m['n_cells']:
+            if math.isnan(record.n_cells):
+                record.n_cells = int(m['n_cells'])
+        elif m['processor_cells']:
+            record.processor_cells.append(int(m['processor_cells']))
+        elif m['processor_faces']:
+            record.processor_faces.append(int(m['processor_faces']))
+        else:
+            record.total_processor_faces = int(m['total_processor_faces'])
+
+    record.stdout_offset, _ = _scan(path, STDOUT_PATTERN, on_match, offset=offset, chunk_size=chunk_size)
+    return record
+
+
+#===================================================================================================
+def scan_case(run_case, record=None, verbosity=0):
+    """Scan the .log and .stdout file of a run case directory, each exactly once.
+
+    Missing files are reported and ignored, the corresponding record entries are left at their
+    default (NAN, empty list).
+
+    :param Path run_case: the run case directory ``<case>-NxMcores``.
+    :param CaseRecord record: a record from a previous scan of the same files. Scanning is resumed
+        at its ``log_offset`` and ``stdout_offset``. If None, the files are scanned from the start.
+    :return: a :class:`CaseRecord`.
+    """
+    run_case = Path(run_case)
+    if record is None:
+        record = CaseRecord()
+
+    log = run_case / (run_case.name + '.log')
+    if log.exists():
+        scan_log(log, record, offset=record.log_offset)
+    else:
+        click.secho(f".log file '{log}' not found. Ignoring it.", fg='red')
+
+    stdout = run_case / (run_case.name + '.stdout')
+    if stdout.exists():
+        scan_stdout(stdout, record, offset=record.stdout_offset)
+    else:
+        click.secho(f".stdout file '{stdout}' not found. Ignoring it.", fg='red')
+
+    if record.completed and not record.profiling:
+        record.profiling = read_case_profiling(run_case)
+    if record.completed and not record.counters:
+        record.counters = read_counters(run_case)
+
+    if verbosity > 2:
+        print(f"{run_case.name}: {record.n_timesteps} timesteps, {record.n_cells} cells, completed={record.completed}")
+    return record
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module of.staging
+=================
+
+Staging of an OpenFOAM case into a run case directory.
+
+Copying the whole case for every configuration of a sweep duplicates the mesh, which can take
+hundreds of MB per run case. The parts of the case that are only read by the run case
+(:data:`READ_ONLY`) can be linked instead of copied:
+
+* ``'copy'``: copy everything (this is what :func:`shutil.copytree` does),
+* ``'symlink'``: symbolic links to the read-only parts, copies of all the rest,
+* ``'hardlink'``: hard links to the read-only files, copies of all the rest.
+
+If the file system does not support links, the read-only parts are copied with a parallel file
+copier instead.
+"""
+
+import os
+import shutil
+import fnmatch
+from pathlib import Path
+
+#===================================================================================================
+STAGING_MODES = ('copy', 'symlink', 'hardlink')
+
+READ_ONLY = ('constant/polyMesh', 'constant/*Properties')
+"""Glob patterns (relative to the case directory) of the parts of a case that a run does not modify."""
+
+COPY_JOBS = 8
+"""Number of threads for copying files."""
+
+
+#===================================================================================================
+def is_read_only(relpath, link_mesh=True):
+    """Test whether the case entry ``relpath`` (relative to the case directory) may be linked."""
+    relpath = Path(relpath).as_posix()
+    for pattern in READ_ONLY:
+        if not link_mesh and pattern == 'constant/polyMesh':
+            continue
+        if fnmatch.fnmatch(relpath, pattern):
+            return True
+    return False
+
+
+def parallel_copy(pairs, jobs=COPY_JOBS):
+    """Copy files ``(src, dst)`` concurrently, preserving metadata.
+
+    Copying is dominated by file system latency (in particular the metadata operations on a parallel
+    file system), so threads are sufficient to overlap the copies.
+    """
+    import concurrent.futures
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        for _ in executor.map(_copy, pairs):
+            pass
+
+
+def _copy(pair):
+    src, dst = pair
+    # never copy into a link, that would overwrite the original
+    if os.path.islink(dst) or (os.path.exists(dst) and os.stat(dst).st_nlink > 1):
+        os.remove(dst)
+    shutil.copy2(src, dst)
+
+
+def _link(src, dst, mode):
+    """Link dst to src. Existing links are left alone, existing files replaced."""
+    if os.path.islink(dst) or (mode == 'hardlink' and os.path.exists(dst) and os.path.samefile(src, dst)):
+        return
+    if os.path.isdir(dst) and not os.path.islink(dst):
+        shutil.rmtree(dst)
+    elif os.path.lexists(dst):
+        os.remove(dst)
+    if mode == 'symlink':
+        os.symlink(src, dst, target_is_directory=os.path.isdir(src))
+    else:
+        os.link(src, dst)
+
+
+#===================================================================================================
+def stage_case(case, run_case, mode='copy', link_mesh=True, jobs=COPY_JOBS, verbosity=0):
+    """Stage an OpenFOAM case in a run case directory.
+
+    The run case directory may already exist. Links that are already there are kept, all other
+    files are (re)copied.
+
+    :param Path case: the OpenFOAM case directory.
+    :param Path run_case: the run case directory.
+    :param str mode: one of :data:`STAGING_MODES`.
+    :param bool link_mesh: if False, ``constant/polyMesh`` is always copied. This is necessary if the
+        run case modifies the mesh, e.g. ``renumberMesh -overwrite`` in a serial run.
+    :param int jobs: number of threads used for copying files.
+    """
+    case = Path(case).resolve()
+    run_case = Path(run_case)
+    if mode not in STAGING_MODES:
+        raise ValueError(f"Unknown staging mode '{mode}', expecting one of {STAGING_MODES}.")
+    if mode == 'copy' and not run_case.exists():
+        shutil.copytree(case, run_case)
+        return
+
+    copies = []
+    links = []
+    for root, dirs, files in os.walk(case):
+        rel = Path(root).relative_to(case)
+        if (run_case / rel).is_symlink():
+            (run_case / rel).unlink()
+        os.makedirs(run_case / rel, exist_ok=True)
+        for d in list(dirs):
+            if mode != 'copy' and is_read_only(rel / d, link_mesh):
+                if mode == 'symlink':
+                    links.append((case / rel / d, run_case / rel / d))
+                    dirs.remove(d)
+                else:
+                    # hard links to all files in the directory
+                    for sub_root, _, sub_files in os.walk(case / rel / d):
+                        sub_rel = Path(sub_root).relative_to(case)
+                        os.makedirs(run_case / sub_rel, exist_ok=True)
+                        links += [(case / sub_rel / f, run_case / sub_rel / f) for f in sub_files]
+                    dirs.remove(d)
+        for f in files:
+            pair = (case / rel / f, run_case / rel / f)
+            if mode != 'copy' and is_read_only(rel / f, link_mesh):
+                links.append(pair)
+            else:
+                copies.append(pair)
+
+    try:
+        for src, dst in links:
+            _link(src, dst, mode)
+    except OSError as x:
+        # No link support on this file system, copy the read-only parts.
+        if verbosity > 1:
+            print(f"  Linking failed ({x}), copying instead.")
+        for src, dst in links:
+            if os.path.islink(dst):
+                os.remove(dst)
+            if src.is_dir():
+                for sub_root, _, sub_files in os.walk(src):
+                    sub_rel = Path(sub_root).relative_to(case)
+                    os.makedirs(run_case / sub_rel, exist_ok=True)
+                    copies += [(case / sub_rel / f, run_case / sub_rel / f) for f in sub_files]
+            else:
+                copies.append((src, dst))
+    parallel_copy(copies, jobs=jobs)
+
+
+#===================================================================================================
+def remove_artefacts(case, run_case, verbosity=0):
+    """Remove everything from a run case directory that is not in the case directory.
+
+    These are the per-run artefacts: processor* directories, time directories, log files, job
+    scripts, postProcessing, ... The staged parts of the case are left alone.
+    """
+    case = Path(case)
+    for item in Path(run_case).iterdir():
+        if not (case / item.name).exists():
+            if verbosity > 1:
+                print(f"  Removing {item}")
+            if item.is_dir() and not item.is_symlink():
+                shutil.rmtree(item)
+            else:
+                item.unlink()
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module of.statistics
+====================
+
+Robust statistics of the walltime per timestep of a run case.
+
+The walltime of a timestep is the difference between successive ``ExecutionTime`` entries in the
+log. Not all timesteps are representative:
+
+* the first timesteps include page faults, MPI connection setup, and cache warmup. They are excluded
+  with ``warmup``,
+* timesteps that write fields are excluded with ``write_interval`` (see
+  :func:`of.tracker.write_interval`),
+* timesteps disturbed by other jobs on a shared interconnect are much slower than the others. They
+  are excluded as outliers: timesteps that are more than ``outlier_threshold`` scaled median absolute
+  deviations above the median. OpenFOAM prints the ExecutionTime with a limited precision, so the
+  walltimes of the timesteps are often quantized and their median absolute deviation is zero. It is
+  therefore floored at the resolution of the walltimes, and at a fraction :data:`MAD_FLOOR` of the
+  median.
+
+The spread of the remaining timesteps is reported as percentiles, standard deviation and a bootstrap
+confidence interval of their mean. Two runs are compared with the Mann-Whitney U test of their
+timesteps (see :func:`mann_whitney`), which makes no assumption on the (usually skewed) distribution
+of the walltimes. This module needs numpy.
+"""
+
+import math
+from collections import namedtuple
+
+import numpy as np
+
+#===================================================================================================
+OUTLIER_THRESHOLD = 5.0
+"""Timesteps more than this number of scaled median absolute deviations above the median are outliers."""
+
+MAD_FLOOR = 0.01
+"""Lower bound of the scaled median absolute deviation, relative to the median."""
+
+TimestepStatistics = namedtuple( 'TimestepStatistics'
+                               , [ 'n', 'n_excluded', 'mean', 'median', 'trimmed_mean'
+                                 , 'p5', 'p95', 'std', 'ci_low', 'ci_high'
+                                 ]
+                               )
+TimestepStatistics.__doc__ = """Statistics of the walltimes per timestep of a run case, in seconds.
+
+:param n: number of timesteps used.
+:param n_excluded: number of timesteps excluded as write timesteps or outliers (warmup timesteps are not counted).
+:param mean: mean.
+:param median: median.
+:param trimmed_mean: mean of the timesteps between the ``trim`` and ``1 - trim`` quantiles.
+:param p5: 5th percentile.
+:param p95: 95th percentile.
+:param std: standard deviation.
+:param ci_low: lower bound of the bootstrap confidence interval of the mean.
+:param ci_high: upper bound of the bootstrap confidence interval of the mean.
+"""
+
+NAN_STATISTICS = TimestepStatistics(0, 0, *8*[float('NAN')])
+
+
+#===================================================================================================
+def step_times(execution_times, warmup=0):
+    """The walltimes of the timesteps, from the (cumulative) ExecutionTimes, without the first ``warmup`` timesteps."""
+    return np.diff(np.asarray(execution_times, dtype=float))[warmup:]
+
+
+def resolution(times):
+    """The resolution of the walltimes: the smallest positive difference between two of them, or between
+    one of them and zero. Differences due to rounding errors are ignored. 0 if all walltimes are zero.
+    """
+    levels = np.unique(np.append(np.asarray(times, dtype=float), 0.))
+    gaps = np.diff(levels)
+    gaps = gaps[gaps > 1e-9 * levels[-1]]
+    return gaps.min() if len(gaps) else 0.
+
+
+def outliers(times, threshold=OUTLIER_THRESHOLD):
+    """Boolean mask of the timesteps that are outliers (only slow timesteps are outliers).
+
+    1.4826 scales the median absolute deviation to the standard deviation of normally distributed data.
+    The scaled median absolute deviation is at least the :func:`resolution` of the walltimes and
+    :data:`MAD_FLOOR` times the median.
+    """
+    median = np.median(times)
+    mad = 1.4826 * np.median(np.abs(times - median))
+    mad = max(mad, resolution(times), MAD_FLOOR * median)
+    return times > median + threshold * mad
+
+
+def write_steps(n, write_interval):
+    """Boolean mask of the timesteps that write fields, among the ``n`` walltimes of the timesteps.
+
+    The first ExecutionTime is that of timestep 1, so walltime ``i`` is that of timestep ``i + 2``.
+
+    :param int write_interval: the fields are written every ``write_interval`` timesteps, 0 if unknown.
+    """
+    if write_interval <= 0:
+        return np.zeros(n, dtype=bool)
+    return (np.arange(n) + 2) % write_interval == 0
+
+
+def select_times(times, warmup=0, exclude_outliers=True, outlier_threshold=OUTLIER_THRESHOLD, write_interval=0):
+    """The walltimes of the timesteps that are representative: without the first ``warmup`` timesteps,
+    without the timesteps that write fields (see :func:`write_steps`), and without the outliers if
+    ``exclude_outliers``.
+
+    :return: tuple (array with the walltimes, number of write timesteps and outliers excluded).
+    """
+    times = np.asarray(times, dtype=float)
+    writes = write_steps(len(times), write_interval)[warmup:]
+    times = times[warmup:]
+    n_excluded = int(writes.sum())
+    times = times[~writes]
+    if exclude_outliers and len(times) > 2:
+        mask = outliers(times, outlier_threshold)
+        n_excluded += int(mask.sum())
+        times = times[~mask]
+    return times, n_excluded
+
+
+def trimmed_mean(times, trim=0.1):
+    """Mean of ``times`` without the fraction ``trim`` of the smallest and the largest values."""
+    times = np.sort(times)
+    k = int(trim * len(times))
+    return times[k:len(times) - k].mean()
+
+
+def bootstrap_ci(times, confidence=0.95, n_resamples=1000, seed=0):
+    """Percentile bootstrap confidence interval of the mean of ``times``.
+
+    :param int seed: seed of the random number generator, so that post-processing the same logs
+        produces the same tables.
+    :return: tuple (low, high).
+    """
+    rng = np.random.default_rng(seed)
+    samples = rng.choice(times, size=(n_resamples, len(times)), replace=True)
+    means = samples.mean(axis=1)
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(means, [alpha, 1 - alpha])
+    return low, high
+
+
+#===================================================================================================
+def timestep_statistics( execution_times, warmup=0, exclude_outliers=True, outlier_threshold=OUTLIER_THRESHOLD
+                       , trim=0.1, confidence=0.95, n_resamples=1000, write_interval=0
+                       ):
+    """Statistics of the walltime per timestep.
+
+    :param list execution_times: the ExecutionTimes from a log file (see :class:`of.scanner.CaseRecord`).
+    :param int warmup: number of timesteps to exclude at the start.
+    :param bool exclude_outliers: exclude slow timesteps (e.g. interference) as outliers.
+    :param float outlier_threshold: see :func:`outliers`.
+    :param float trim: fraction of the timesteps trimmed at both ends for the trimmed mean.
+    :param float confidence: confidence level of the confidence interval.
+    :param int n_resamples: number of bootstrap resamples.
+    :param int write_interval: the fields are written every ``write_interval`` timesteps, 0 if unknown.
+    :return: :class:`TimestepStatistics`. All values are NaN if no timesteps remain.
+    """
+    times, n_excluded = select_times( step_times(execution_times), warmup, exclude_outliers, outlier_threshold
+                                    , write_interval
+                                    )
+    if len(times) == 0:
+        return NAN_STATISTICS
+
+    p5, median, p95 = np.percentile(times, [5, 50, 95])
+    ci_low, ci_high = bootstrap_ci(times, confidence, n_resamples)
+    return TimestepStatistics( n=len(times)
+                             , n_excluded=n_excluded
+                             , mean=times.mean()
+                             , median=median
+                             , trimmed_mean=trimmed_mean(times, trim)
+                             , p5=p5
+                             , p95=p95
+                             , std=times.std(ddof=1) if len(times) > 1 else 0.
+                             , ci_low=ci_low
+                             , ci_high=ci_high
+                             )
+
+
+def ranks(values):
+    """The ranks (1-based) of values, ties get the mean of their ranks.
+
+    :return: tuple (array with the ranks, array with the sizes of the groups of ties).
+    """
+    values = np.asarray(values, dtype=float)
+    order = np.argsort(values, kind='stable')
+    sorted_values = values[order]
+    # start of every group of equal values
+    starts = np.flatnonzero(np.concatenate([[True], sorted_values[1:] != sorted_values[:-1]]))
+    sizes = np.diff(np.append(starts, len(values)))
+    mean_ranks = starts + (sizes + 1) / 2
+    result = np.empty(len(values))
+    result[order] = np.repeat(mean_ranks, sizes)
+    return result, sizes
+
+
+def mann_whitney(x, y):
+    """One-sided Mann-Whitney U test of the hypothesis that the values of x tend to be larger than those of y.
+
+    The p-value is computed with the normal approximation of the distribution of U, with a correction for
+    ties and a continuity correction, which is accurate for 10 or more values in each sample.
+
+    :return: tuple (U statistic of x, p-value). The p-value is NAN if one of the samples is empty.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n1, n2 = len(x), len(y)
+    if n1 == 0 or n2 == 0:
+        return float('NAN'), float('NAN')
+    r, ties = ranks(np.concatenate([x, y]))
+    u = r[:n1].sum() - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - (ties**3 - ties).sum() / (n * (n - 1)))
+    if variance <= 0:
+        return u, 1.
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return u, 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def ratio_error(a, da, b, db):
+    """Error on a/b, given the errors da and db on a and b (first order error propagation)."""
+    return np.abs(a / b) * np.sqrt((da / a)**2 + (db / b)**2)
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module of.status
+================
+
+Determine the status of a run case from the tails of its .log and .stderr files.
+
+Only the last few KB of each file are read, so the cost is independent of the size of the log.
+"""
+
+import os
+import re
+import enum
+from pathlib import Path
+
+from of.scanner import is_end_of_run, _last_lines
+
+#===================================================================================================
+TAIL_SIZE = 16 * 1024
+"""Number of bytes read from the end of a file.
+
+OpenFOAM prints a stack trace after a fatal error, which easily takes a few KB.
+"""
+
+# slurmstepd: error: *** JOB 1234 ON r1c1cn1 CANCELLED AT 2022-10-18T12:00:00 DUE TO TIME LIMIT ***
+TIMED_OUT_PATTERN = re.compile(rb'CANCELLED AT \S+ DUE TO TIME LIMIT')
+
+CRASHED_PATTERN = re.compile(
+    rb'MPI_ABORT was invoked'
+    rb'|PMI_Abort'
+    rb'|BAD TERMINATION'
+    rb'|FOAM FATAL (?:IO )?ERROR'
+    rb'|FOAM (?:parallel run )?aborting'
+    rb'|Segmentation fault'
+    rb'|DUE TO (?:NODE FAILURE|OUT OF MEMORY)|oom-kill'
+)
+
+
+#===================================================================================================
+class RunStatus(enum.Enum):
+    """Status of a run case."""
+    NOT_STARTED = 'not started'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    CRASHED = 'crashed'
+    TIMED_OUT = 'timed out'
+
+    def __str__(self):
+        return self.value
+
+
+#===================================================================================================
+def read_tail(path, size=TAIL_SIZE):
+    """Read the last ``size`` bytes of a file.
+
+    :return: the bytes read, or None if the file does not exist.
+    """
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - size))
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+#===================================================================================================
+def run_status(run_case, verbosity=0):
+    """Determine the status of a run case from the tails of its .log and .stderr files.
+
+    * COMPLETED: the .log file ends with "End" (serial runs) or "End", "Finalising parallel run"
+      (parallel runs).
+    * TIMED_OUT: slurm cancelled the job because it reached its time limit (.stderr file).
+    * CRASHED: the .log or .stderr file reports a fatal OpenFOAM error, an MPI abort, a segmentation
+      fault, an out-of-memory kill or a node failure.
+    * RUNNING: there is a .log file, but none of the above applies.
+    * NOT_STARTED: there is no .log file, and none of the above applies.
+
+    :param Path run_case: the run case directory ``<case>-NxMcores``.
+    :return: a :class:`RunStatus`.
+    """
+    run_case = Path(run_case)
+    log_tail = read_tail(run_case / (run_case.name + '.log'))
+    stderr_tail = read_tail(run_case / (run_case.name + '.stderr')) or b''
+
+    if log_tail and is_end_of_run(_last_lines(log_tail, len(log_tail), [])):
+        status = RunStatus.COMPLETED
+    elif TIMED_OUT_PATTERN.search(stderr_tail):
+        status = RunStatus.TIMED_OUT
+    elif CRASHED_PATTERN.search(stderr_tail) or (log_tail and CRASHED_PATTERN.search(log_tail)):
+        status = RunStatus.CRASHED
+    elif log_tail is not None:
+        status = RunStatus.RUNNING
+    else:
+        status = RunStatus.NOT_STARTED
+
+    if verbosity > 3:
+        print(f"{run_case.name}: {status}")
+    return status
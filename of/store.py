@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module of.store
+===============
+
+A central SQLite database with the results of all post-processed scaling tests, to compare them
+across clusters, OpenFOAM versions, solvers, cases and meshes (see ``sst-compare``).
+
+Every sweep (results directory) is tagged with
+
+* ``cluster``, ``modules`` (the modules loaded by the job scripts, comma separated) and ``openfoam``
+  (the version of the OpenFOAM module, e.g. ``v2206-foss-2022a``), ``solver``: from the sweep
+  information that :func:`of.run_all` writes in ``<results>/<results.name>.sweep.json``
+  (see :func:`save_sweep_info`). Results directories without it get the cluster and modules of the
+  current cluster, and no solver,
+* ``case``, ``scaling`` (``strong`` or ``weak``) and ``mesh`` (the number of cells of the run case
+  with the fewest cores): from post-processing,
+* any extra tags given to ``sst-post --tag name=value``.
+
+Every run case is a row of the ``runs`` table with its timings, efficiency and accounting (see
+:mod:`of.accounting`), and the walltime of every timestep (a JSON list). Post-processing a results
+directory again replaces its rows. The serial run case is also a row of every launch strategy
+(``variant``), as it is their reference.
+
+The tags are kept in a separate, indexed table ``tags(sweep_id, name, value)``, so that filtering and
+grouping on any tag stays fast with many thousands of runs. The database is ``$SST_STORE``, or
+``~/.sst-results.sqlite`` if that is not set. Only the standard library is needed.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+from pathlib import Path
+
+#===================================================================================================
+STORE_VERSION = 1
+"""Increment this when the schema changes."""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sweeps
+    ( id INTEGER PRIMARY KEY
+    , results TEXT UNIQUE NOT NULL
+    , recorded REAL
+    );
+CREATE TABLE IF NOT EXISTS tags
+    ( sweep_id INTEGER NOT NULL REFERENCES sweeps(id) ON DELETE CASCADE
+    , name TEXT NOT NULL
+    , value TEXT NOT NULL
+    , PRIMARY KEY (sweep_id, name)
+    );
+CREATE INDEX IF NOT EXISTS tags_name_value ON tags(name, value, sweep_id);
+CREATE TABLE IF NOT EXISTS runs
+    ( id INTEGER PRIMARY KEY
+    , sweep_id INTEGER NOT NULL REFERENCES sweeps(id) ON DELETE CASCADE
+    , run_case TEXT NOT NULL
+    , variant TEXT NOT NULL
+    , n_nodes INTEGER
+    , n_cores INTEGER
+    , n_cells REAL
+    , n_timesteps INTEGER
+    , walltime REAL
+    , walltime_error REAL
+    , speedup REAL
+    , efficiency REAL
+    , energy_per_timestep REAL
+    , max_rss REAL
+    , cpu_efficiency REAL
+    , step_times TEXT
+    , UNIQUE (sweep_id, variant, run_case)
+    );
+CREATE INDEX IF NOT EXISTS runs_sweep ON runs(sweep_id, variant, n_cores);
+"""
+
+RUN_COLUMNS = ( 'run_case', 'variant', 'n_nodes', 'n_cores', 'n_cells', 'n_timesteps', 'walltime', 'walltime_error'
+              , 'speedup', 'efficiency', 'energy_per_timestep', 'max_rss', 'cpu_efficiency', 'step_times'
+              )
+"""The columns of the runs table filled by :func:`record_runs`, in this order."""
+
+METRICS = { 'efficiency': 'efficiency'
+          , 'walltime': 'walltime'
+          , 'speedup': 'speedup'
+          , 'energy': 'energy_per_timestep'
+          , 'memory': 'max_rss'
+          , 'cpu-efficiency': 'cpu_efficiency'
+          }
+"""The quantities that can be compared, and their column in the runs table."""
+
+
+def default_store():
+    """Path of the database: ``$SST_STORE``, or ``~/.sst-results.sqlite``."""
+    return Path(os.environ.get('SST_STORE', Path.home() / '.sst-results.sqlite'))
+
+
+def connect(path=None):
+    """Open (and if needed create) the database.
+
+    :param path: the database file. If None, :func:`default_store`.
+    :raises RuntimeError: if the database was created by an incompatible version.
+    """
+    connection = sqlite3.connect(str(path or default_store()), timeout=60)
+    connection.execute('PRAGMA foreign_keys = ON')
+    version = connection.execute('PRAGMA user_version').fetchone()[0]
+    if version == 0:
+        connection.executescript(SCHEMA)
+        connection.execute(f'PRAGMA user_version = {STORE_VERSION}')
+    elif version != STORE_VERSION:
+        connection.close()
+        raise RuntimeError(f"Results store '{path or default_store()}' has version {version}, expecting {STORE_VERSION}.")
+    return connection
+
+
+#===================================================================================================
+def sweep_info_path(results):
+    """Path of the sweep information file of a results directory."""
+    results = Path(results)
+    return results / (results.name + '.sweep.json')
+
+
+def save_sweep_info(results, cluster, modules, solver):
+    """Record the cluster, the modules and the solver of a sweep in its results directory."""
+    with open(sweep_info_path(results), mode='w') as f:
+        json.dump({'cluster': cluster, 'modules': list(modules), 'solver': solver}, f, indent=2)
+
+
+def load_sweep_info(results):
+    """The sweep information of a results directory (see :func:`save_sweep_info`), empty if there is none."""
+    try:
+        with open(sweep_info_path(results)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def sweep_tags(info, case, scaling, mesh):
+    """The tags of a sweep, from its sweep information (see :func:`load_sweep_info`) and its post-processing."""
+    modules = info.get('modules', [])
+    openfoam = next((m.split('/', 1)[1] for m in modules if m.startswith('OpenFOAM/')), '')
+    return { 'cluster': info.get('cluster', '')
+           , 'modules': ','.join(modules)
+           , 'openfoam': openfoam
+           , 'solver': info.get('solver', '')
+           , 'case': case
+           , 'scaling': scaling
+           , 'mesh': mesh
+           }
+
+
+def parse_tags(tags):
+    """Parse a list of ``'name=value'`` strings.
+
+    :raises ValueError: if a tag has no '=' or an empty name.
+    """
+    parsed = {}
+    for tag in tags:
+        name, sep, value = tag.partition('=')
+        if not sep or not name.strip():
+            raise ValueError(f"Invalid tag '{tag}', expecting 'name=value'.")
+        parsed[name.strip()] = value.strip()
+    return parsed
+
+
+def _value(x):
+    """A float for the database, None for NAN."""
+    x = float(x)
+    return None if x != x else x
+
+
+def record_runs(results, tags, runs, path=None):
+    """Add the run cases of a sweep to the database, in a single transaction.
+
+    The run cases replace those of the same sweep and variant that are already in the database.
+
+    :param results: the results directory of the sweep.
+    :param dict tags: the tags of the sweep (see :func:`sweep_tags`). They replace the tags of the same name.
+    :param list runs: a dict per run case, with the keys :data:`RUN_COLUMNS`. ``step_times`` is a list.
+    :param path: the database (see :func:`connect`).
+    """
+    connection = connect(path)
+    try:
+        with connection:
+            results = str(Path(results).resolve())
+            connection.execute('INSERT OR IGNORE INTO sweeps(results) VALUES (?)', (results,))
+            connection.execute('UPDATE sweeps SET recorded = ? WHERE results = ?', (time.time(), results))
+            sweep_id = connection.execute('SELECT id FROM sweeps WHERE results = ?', (results,)).fetchone()[0]
+            connection.executemany( 'INSERT OR REPLACE INTO tags(sweep_id, name, value) VALUES (?, ?, ?)'
+                                  , [(sweep_id, name, str(value)) for name, value in tags.items()]
+                                  )
+            rows = []
+            for run in runs:
+                row = [run[column] for column in RUN_COLUMNS]
+                row[2:4] = [int(x) for x in row[2:4]]
+                row[4:13] = [_value(x) for x in row[4:13]]
+                row[13] = json.dumps([float(x) for x in run['step_times']])
+                rows.append([sweep_id] + row)
+            # the run cases that are gone
+            connection.executemany( 'DELETE FROM runs WHERE sweep_id = ? AND variant = ?'
+                                  , {(sweep_id, run['variant']) for run in runs}
+                                  )
+            connection.executemany( f"INSERT INTO runs(sweep_id, {', '.join(RUN_COLUMNS)}) "
+                                    f"VALUES ({', '.join((len(RUN_COLUMNS) + 1) * '?')})"
+                                  , rows
+                                  )
+    finally:
+        connection.close()
+
+
+#===================================================================================================
+def _tag_name(name):
+    if not re.fullmatch(r'\w+', name):
+        raise ValueError(f"Invalid tag name '{name}'.")
+    return name
+
+
+def query(where=(), by=('cluster',), metric='efficiency', variant='', path=None):
+    """The mean of a metric per group of sweeps and number of cores.
+
+    :param dict where: ``{tag: pattern}``, only sweeps whose tags match the (sqlite GLOB) patterns.
+    :param list by: the tags that define the groups.
+    :param str metric: a key of :data:`METRICS`.
+    :param str variant: the launch strategy (and decomposition method) of the run cases, '' for the default.
+    :return: dict mapping the groups (tuples with the values of the ``by`` tags, '' for missing tags) to
+        lists of tuples ``(n_cores, mean, number of run cases)``, in increasing number of cores.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric '{metric}', expecting one of {', '.join(METRICS)}.")
+    joins = []
+    parameters = []
+    for i, name in enumerate(by):
+        joins.append(f"LEFT JOIN tags g{i} ON g{i}.sweep_id = runs.sweep_id AND g{i}.name = ?")
+        parameters.append(_tag_name(name))
+    for i, (name, pattern) in enumerate(dict(where).items()):
+        joins.append(f"JOIN tags f{i} ON f{i}.sweep_id = runs.sweep_id AND f{i}.name = ? AND f{i}.value GLOB ?")
+        parameters += [_tag_name(name), pattern]
+    groups = [f"COALESCE(g{i}.value, '')" for i in range(len(by))]
+    sql = ( f"SELECT {', '.join(groups + ['runs.n_cores', f'AVG(runs.{METRICS[metric]})', 'COUNT(*)'])} FROM runs "
+          + ' '.join(joins)
+          + f" WHERE runs.variant = ? AND runs.{METRICS[metric]} IS NOT NULL"
+          + f" GROUP BY {', '.join(groups + ['runs.n_cores'])}"
+          + f" ORDER BY {', '.join(groups + ['runs.n_cores'])}"
+          )
+    parameters.append(variant)
+    connection = connect(path)
+    try:
+        rows = connection.execute(sql, parameters).fetchall()
+    finally:
+        connection.close()
+    curves = {}
+    for row in rows:
+        curves.setdefault(tuple(row[:len(by)]), []).append(tuple(row[len(by):]))
+    return curves
+
+
+def list_sweeps(where=(), path=None):
+    """The sweeps in the database whose tags match (see :func:`query`).
+
+    :return: list of tuples ``(results directory, {tag: value}, number of run cases)``.
+    """
+    joins = []
+    parameters = []
+    for i, (name, pattern) in enumerate(dict(where).items()):
+        joins.append(f"JOIN tags f{i} ON f{i}.sweep_id = sweeps.id AND f{i}.name = ? AND f{i}.value GLOB ?")
+        parameters += [_tag_name(name), pattern]
+    connection = connect(path)
+    try:
+        sweeps = connection.execute( "SELECT sweeps.id, sweeps.results, (SELECT COUNT(*) FROM runs WHERE runs.sweep_id = sweeps.id) "
+                                     "FROM sweeps " + ' '.join(joins) + " ORDER BY sweeps.results"
+                                   , parameters
+                                   ).fetchall()
+        listed = []
+        for sweep_id, results, n_runs in sweeps:
+            tags = dict(connection.execute('SELECT name, value FROM tags WHERE sweep_id = ? ORDER BY name', (sweep_id,)))
+            listed.append((results, tags, n_runs))
+    finally:
+        connection.close()
+    return listed
+
+
+def load_step_times(where=(), exclude='', path=None):
+    """The walltimes of the timesteps of the run cases of the sweeps whose tags match (see :func:`query`).
+
+    :param exclude: a results directory whose run cases are left out.
+    :return: dict mapping the configurations ``(n_nodes, n_cores, variant)`` to a list with, for every
+        matching run case with that configuration, the list with the walltimes of its timesteps.
+    """
+    joins = []
+    parameters = []
+    for i, (name, pattern) in enumerate(dict(where).items()):
+        joins.append(f"JOIN tags f{i} ON f{i}.sweep_id = runs.sweep_id AND f{i}.name = ? AND f{i}.value GLOB ?")
+        parameters += [_tag_name(name), pattern]
+    parameters.append(str(Path(exclude).resolve()) if exclude else '')
+    connection = connect(path)
+    try:
+        rows = connection.execute( "SELECT runs.n_nodes, runs.n_cores, runs.variant, runs.step_times FROM runs "
+                                   "JOIN sweeps ON sweeps.id = runs.sweep_id " + ' '.join(joins)
+                                 + " WHERE sweeps.results != ?"
+                                 , parameters
+                                 ).fetchall()
+    finally:
+        connection.close()
+    times = {}
+    for n_nodes, n_cores, variant, step_times in rows:
+        times.setdefault((n_nodes, n_cores, variant), []).append(json.loads(step_times))
+    return times
+
+
+#===================================================================================================
+def print_comparison(curves, by, metric, file=sys.stdout):
+    """Print the curves of :func:`query` as a table, one column per group."""
+    n_cores = sorted({n for curve in curves.values() for n, _, _ in curve})
+    labels = ['/'.join(v or '-' for v in group) for group in curves]
+    width = max([12] + [len(label) + 2 for label in labels])
+    line = (8 + width * len(labels)) * '-'
+    print(f"\n{metric} by {'/'.join(by)}", file=file)
+    print(line, file=file)
+    print(f"{'#cores':>8}" + ''.join(f"{label:>{width}}" for label in labels), file=file)
+    values = [{n: mean for n, mean, _ in curve} for curve in curves.values()]
+    for n in n_cores:
+        print( f"{n:>8}" + ''.join(f"{v[n]:>{width}.4g}" if n in v else f"{'-':>{width}}" for v in values)
+             , file=file
+             )
+    print(line, file=file)
+
+
+def plot_comparison(curves, by, metric, path):
+    """Overlay the curves of :func:`query` in a single figure, saved as path."""
+    from of.post import import_pyplot
+    pyplot = import_pyplot()
+    fig, ax = pyplot.subplots()
+    for group, curve in curves.items():
+        ax.plot([c[0] for c in curve], [c[1] for c in curve], 'o-', label='/'.join(v or '-' for v in group))
+    ax.set_title(f"{metric} by {'/'.join(by)}")
+    ax.set_xlabel('# cores')
+    ax.set_ylabel(metric)
+    ax.set_xscale('log')
+    ax.legend()
+    fig.savefig(str(path), dpi=200)
+    pyplot.close(fig)
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module of.sweep
+===============
+
+The configurations (number of nodes, number of cores) of a scaling test.
+
+A sweep is specified by a string. Several specifications can be combined with ``'+'``, e.g.
+``'aligned+geometric:1.5'``, the result is the union of their configurations:
+
+* ``powers`` (the default): ``nc, nc/2, nc/4, ..., 1`` cores on a single node, where nc is the
+  maximum number of cores per node (integer division, so 28 cores gives 28, 14, 7, 3, 1),
+* ``geometric:<ratio>``: ``nc, nc/ratio, nc/ratio^2, ..., 1`` cores on a single node (rounded),
+  e.g. ``geometric:1.5`` gives 28, 19, 13, 9, 6, 4, 3, 2, 1 for nc = 28,
+* ``aligned``: core counts aligned with the hardware of the cluster (see :data:`TOPOLOGY`): powers of two
+  up to the cores sharing an L3 cache, multiples of those up to a NUMA domain, multiples of the
+  NUMA domain up to the node. This resolves the region where the memory bandwidth saturates,
+* ``list:<n>,<n>,...``: explicit core counts. Counts above nc run on ``ceil(n/nc)`` nodes, with
+  the same number of cores on every node (e.g. 100 cores on 64 core nodes is 2 x 50 cores),
+* ``adaptive[:<n>]``: a follow-up sweep of ``n`` (default 4) extra configurations, placed in the
+  intervals between the configurations already measured in the results directory where the
+  parallel efficiency drops most, or that are widest (see :func:`adaptive`).
+
+Except for ``list`` and ``adaptive``, the single node configurations are followed by 2, 4, ...
+max_nodes nodes with nc cores per node.
+"""
+
+import math
+from pathlib import Path
+from collections import namedtuple
+
+import click
+
+from of.launch import RUN_CASE_PATTERN
+from of.scanner import scan_log, scan_stdout
+
+#===================================================================================================
+Topology = namedtuple('Topology', ['cores', 'sockets', 'numa_domains', 'cores_per_l3'])
+Topology.__doc__ = """Hardware topology of a compute node.
+
+:param cores: number of cores.
+:param sockets: number of sockets.
+:param numa_domains: number of NUMA domains (memory controllers).
+:param cores_per_l3: number of cores sharing an L3 cache (a CCX on AMD processors).
+"""
+
+TOPOLOGY = {
+    'leibniz' : Topology( 28, 2, 2, 14) # 2x Intel Xeon E5-2680v4
+  , 'vaughan' : Topology( 64, 2, 2,  4) # 2x AMD EPYC 7452
+  , 'dodrio'  : Topology(128, 2, 8,  4) # 2x AMD EPYC 7H12, NPS4
+}
+
+ADAPTIVE_RUNS = 4
+"""Default number of extra configurations of an adaptive sweep."""
+
+GAP_WEIGHT = 0.05
+"""Weight of the width of an interval (per factor 2 in the number of cores) relative to the drop of the
+parallel efficiency over the interval, when choosing where to refine an adaptive sweep."""
+
+
+#===================================================================================================
+def powers(max_cores_per_node):
+    """Core counts ``nc, nc//2, nc//4, ..., 1``, in increasing order."""
+    n_tasks = [max_cores_per_node]
+    while n_tasks[0] != 1:
+        n_tasks.insert(0, n_tasks[0] // 2)
+    return n_tasks
+
+
+def geometric(max_cores_per_node, ratio):
+    """Core counts ``nc, nc/ratio, nc/ratio^2, ..., 1`` (rounded, and all different), in increasing order."""
+    if ratio <= 1:
+        raise ValueError(f"The ratio of a geometric sweep must be > 1, got {ratio}.")
+    n_tasks = [max_cores_per_node]
+    while n_tasks[0] != 1:
+        n_tasks.insert(0, max(1, min(n_tasks[0] - 1, int(n_tasks[0] / ratio + 0.5))))
+    return n_tasks
+
+
+def aligned(max_cores_per_node, topology):
+    """Core counts aligned with the hardware topology, up to max_cores_per_node, in increasing order."""
+    numa = topology.cores // topology.numa_domains
+    n_tasks = {max_cores_per_node}
+    n = 1
+    while n < topology.cores_per_l3:
+        n_tasks.add(n)
+        n *= 2
+    n = topology.cores_per_l3
+    while n < numa:
+        n_tasks.add(n)
+        n *= 2
+    n_tasks.update(k * numa for k in range(1, topology.numa_domains + 1))
+    return sorted(n for n in n_tasks if n <= max_cores_per_node)
+
+
+def multi_node(max_nodes, max_cores_per_node):
+    """Configurations with 2, 4, ... max_nodes nodes, using max_cores_per_node cores per node."""
+    configurations = []
+    n_nodes = 1
+    while n_nodes < max_nodes:
+        n_nodes *= 2
+        configurations.append((n_nodes, n_nodes * max_cores_per_node))
+    return configurations
+
+
+def configuration(n_tasks, max_cores_per_node):
+    """The configuration ``(n_nodes, n_tasks)`` for n_tasks cores, using as few nodes as possible.
+
+    :raises ValueError: if the cores cannot be distributed evenly over the nodes.
+    """
+    n_nodes = math.ceil(n_tasks / max_cores_per_node)
+    if n_tasks % n_nodes:
+        raise ValueError(f"{n_tasks} cores cannot be distributed evenly over {n_nodes} nodes.")
+    return (n_nodes, n_tasks)
+
+
+#===================================================================================================
+def measured_efficiencies(results, case_name):
+    """Parallel efficiency of the (default launch strategy) run cases of a case in a results directory.
+
+    The efficiency is the throughput (cells per second per core) of a run case, relative to that of
+    the run case with the fewest cores. For a strong scaling test, that is the usual parallel
+    efficiency, for a weak scaling test (see :mod:`of.weak`) the weak scaling efficiency.
+
+    :return: dict mapping the configurations ``(n_nodes, n_tasks)`` with timings to their efficiency.
+    """
+    throughput = {}
+    for item in Path(results).glob(f'{case_name}-*'):
+        m = RUN_CASE_PATTERN.match(item.name)
+        if not m or m[1] != case_name or m[4] or not (item / f'{item.name}.log').exists():
+            continue
+        n_nodes, n_tasks = int(m[2]), int(m[2]) * int(m[3])
+        walltime = scan_log(item / f'{item.name}.log').mean_walltime_per_timestep()
+        n_cells = float('NAN')
+        if (item / f'{item.name}.stdout').exists():
+            n_cells = scan_stdout(item / f'{item.name}.stdout').n_cells
+        if math.isnan(n_cells):
+            n_cells = 1.
+        if not math.isnan(walltime) and walltime > 0:
+            throughput[(n_nodes, n_tasks)] = n_cells / (walltime * n_tasks)
+    if not throughput:
+        return {}
+    reference = throughput[min(throughput, key=lambda c: c[1])]
+    return {c: throughput[c] / reference for c in sorted(throughput, key=lambda c: c[1])}
+
+
+def adaptive(results, case_name, max_cores_per_node, n_runs=ADAPTIVE_RUNS):
+    """Extra configurations refining a sweep whose run cases have been run.
+
+    Every interval between successive measured core counts a and b is scored with the drop of the
+    parallel efficiency over the interval plus :data:`GAP_WEIGHT` times ``log2(b/a)``. The n_runs
+    intervals with the highest score get an extra configuration at the geometric mean of a and b
+    (rounded to whole nodes above a node). Intervals that cannot be refined are skipped.
+
+    :return: list of configurations ``(n_nodes, n_tasks)``.
+    """
+    efficiencies = measured_efficiencies(results, case_name)
+    if len(efficiencies) < 2:
+        raise ValueError(f"An adaptive sweep needs at least two measured run cases of '{case_name}' in '{results}'.")
+    measured = list(efficiencies)
+    intervals = []
+    for (ca, ea), (cb, eb) in zip(efficiencies.items(), list(efficiencies.items())[1:]):
+        score = abs(ea - eb) + GAP_WEIGHT * math.log2(cb[1] / ca[1])
+        intervals.append((score, ca[1], cb[1]))
+
+    configurations = []
+    for score, a, b in sorted(intervals, reverse=True):
+        if len(configurations) == n_runs:
+            break
+        n = round(math.sqrt(a * b))
+        if n > max_cores_per_node:
+            n = round(n / max_cores_per_node) * max_cores_per_node
+        c = configuration(n, max_cores_per_node)
+        if a < n < b and c not in measured and c not in configurations:
+            click.echo(f"Adaptive sweep: {n} cores, between {a} and {b} cores (score {score:.3f}).")
+            configurations.append(c)
+    return sorted(configurations, key=lambda c: c[1])
+
+
+#===================================================================================================
+def sweep(spec, max_nodes, max_cores_per_node, cluster, results=None, case_name=''):
+    """The configurations of a sweep specification (see the module documentation).
+
+    :param str spec: the sweep specification, e.g. ``'powers'``, ``'aligned+list:96'``.
+    :param int max_nodes: maximum number of nodes.
+    :param int max_cores_per_node: maximum number of cores per node used.
+    :param str cluster: the cluster, a key of :data:`TOPOLOGY`.
+    :param results: results directory of a previous sweep (for ``adaptive``).
+    :param str case_name: name of the case (for ``adaptive``).
+    :return: list of configurations ``(n_nodes, n_tasks)``, in increasing number of cores.
+    :raises ValueError: for invalid specifications.
+    """
+    configurations = set()
+    for part in (spec or 'powers').split('+'):
+        kind, _, argument = part.strip().partition(':')
+        if kind == 'adaptive':
+            configurations.update(adaptive(results, case_name, max_cores_per_node, int(argument or ADAPTIVE_RUNS)))
+            continue
+        if kind == 'list':
+            try:
+                n_tasks = [int(n) for n in argument.split(',') if n]
+            except ValueError:
+                raise ValueError(f"Invalid sweep '{part}': expecting 'list:<n>,<n>,...'.")
+            configurations.update(configuration(n, max_cores_per_node) for n in n_tasks)
+            continue
+        if kind == 'powers':
+            n_tasks = powers(max_cores_per_node)
+        elif kind == 'geometric':
+            try:
+                n_tasks = geometric(max_cores_per_node, float(argument))
+            except ValueError as x:
+                raise ValueError(f"Invalid sweep '{part}': {x}")
+        elif kind == 'aligned':
+            n_tasks = aligned(max_cores_per_node, TOPOLOGY[cluster])
+        else:
+            raise ValueError(f"Invalid sweep '{part}': expecting powers, geometric:<ratio>, aligned, list:<n>,... or adaptive[:<n>].")
+        configurations.update((1, n) for n in n_tasks)
+        configurations.update(multi_node(max_nodes, max_cores_per_node))
+    return sorted(configurations, key=lambda c: (c[1], c[0]))
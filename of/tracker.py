@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module of.tracker
+=================
+
+Track the jobs of a submitted sweep until they have finished, and post-process the results.
+
+:func:`of.sbatch` records the job id of every submitted run case in ``<results>/<results.name>.jobs.json``
+(array tasks as ``<array job id>_<task id>``). The tracker then
+
+* polls the states of all jobs with a single ``squeue`` call (and a single ``sacct`` call for the jobs
+  that have left the queue). The interval between polls starts at ``poll`` seconds and doubles
+  (up to ``max_poll``) as long as nothing changes,
+* meanwhile reads the new part of the .log file of every run case (see :func:`of.scanner.scan_log`),
+  for the number of timesteps done, the current walltime per timestep, and the estimated time to
+  completion (ETA),
+* prints a table with the progress of all run cases after every poll, and
+* post-processes the results (see :func:`of.post.postprocess`) when all jobs have finished.
+
+The slurm commands run as asyncio subprocesses, and the logs are read in a worker thread, so both
+proceed concurrently.
+"""
+
+import re
+import sys
+import json
+import math
+import time
+import asyncio
+from pathlib import Path
+from collections import namedtuple
+
+import click
+
+from of.scanner import CaseRecord, scan_log
+from of.status import RunStatus, run_status
+
+#===================================================================================================
+TERMINAL_STATES = ( 'COMPLETED', 'FAILED', 'CANCELLED', 'TIMEOUT', 'OUT_OF_MEMORY', 'NODE_FAIL'
+                  , 'PREEMPTED', 'BOOT_FAIL', 'DEADLINE'
+                  )
+"""Slurm job states of jobs that have finished."""
+
+STATUS_STATES = { RunStatus.COMPLETED: 'COMPLETED'
+                , RunStatus.CRASHED: 'FAILED'
+                , RunStatus.TIMED_OUT: 'TIMEOUT'
+                }
+"""The job states of finished run cases that slurm does not know anymore, from their :class:`of.status.RunStatus`."""
+
+STEP_WINDOW = 10
+"""Number of timesteps over which the current walltime per timestep is averaged."""
+
+_ARRAY_RANGE = re.compile(r'(\d+)_\[([^\]]*)\]')
+_CONTROL_DICT_ENTRY = r'^\s*{}\s+([^;]+);'
+
+Progress = namedtuple('Progress', ['run_case', 'job_id', 'state', 'steps', 'total_steps', 'seconds_per_step', 'eta'])
+Progress.__doc__ = """Progress of a run case.
+
+:param run_case: name of the run case.
+:param job_id: slurm job id.
+:param state: slurm job state, 'UNKNOWN' if slurm does not know the job (anymore).
+:param steps: number of timesteps done.
+:param total_steps: number of timesteps of the run (0 if unknown).
+:param seconds_per_step: walltime per timestep of the last :data:`STEP_WINDOW` timesteps (NAN if unknown).
+:param eta: estimated time to completion in seconds (NAN if unknown).
+"""
+
+
+#===================================================================================================
+def jobs_path(results):
+    """Path of the file with the job ids of a results directory."""
+    results = Path(results)
+    return results / (results.name + '.jobs.json')
+
+
+def load_jobs(results):
+    """The job ids of the run cases of a results directory, by run case name. Empty if there are none."""
+    try:
+        with open(jobs_path(results)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def record_jobs(results, jobs):
+    """Add the job ids ``{run case name: job id}`` to the job ids of a results directory."""
+    all_jobs = load_jobs(results)
+    all_jobs.update(jobs)
+    with open(jobs_path(results), mode='w') as f:
+        json.dump(all_jobs, f, indent=2)
+
+
+def parse_sbatch(output):
+    """The job id from the output of ``sbatch --parsable`` (``<job id>[;<cluster>]``), or '' if there is none."""
+    m = re.search(r'^(\d+)', output.strip())
+    return m[1] if m else ''
+
+
+#===================================================================================================
+def _expand_range(ranges):
+    """Task ids in a slurm array range, e.g. ``'1-3,7%2'`` gives 1, 2, 3, 7."""
+    ids = []
+    for part in ranges.split('%')[0].split(','):
+        first, _, last = part.partition('-')
+        ids += range(int(first), int(last or first) + 1)
+    return ids
+
+
+def parse_states(output):
+    """Parse the output of ``squeue --format=%i|%T`` or ``sacct --parsable2 --format=JobID,State``.
+
+    Pending array tasks that are shown as a range (``123_[4-9]``) are expanded. Job steps
+    (``123.batch``) are ignored. ``CANCELLED by 1234`` is ``CANCELLED``.
+
+    :return: dict mapping job ids to states.
+    """
+    states = {}
+    for line in output.splitlines():
+        fields = line.strip().split('|')
+        if len(fields) < 2 or not fields[0] or '.' in fields[0]:
+            continue
+        job_id, state = fields[0], fields[1].split()[0] if fields[1].split() else ''
+        m = _ARRAY_RANGE.fullmatch(job_id)
+        if m:
+            for task in _expand_range(m[2]):
+                states[f"{m[1]}_{task}"] = state
+        else:
+            states[job_id] = state
+    return states
+
+
+async def run_command(*cmd):
+    """Run a command as an asyncio subprocess.
+
+    :return: its standard output, '' if it fails or does not exist.
+    """
+    try:
+        process = await asyncio.create_subprocess_exec( *cmd
+                                                      , stdout=asyncio.subprocess.PIPE
+                                                      , stderr=asyncio.subprocess.PIPE
+                                                      )
+    except FileNotFoundError:
+        return ''
+    stdout, _ = await process.communicate()
+    if process.returncode:
+        return ''
+    return stdout.decode(errors='replace')
+
+
+async def query_states(job_ids):
+    """The states of a list of jobs, with a single squeue call, and a single sacct call for the jobs not in the queue.
+
+    :return: dict mapping the job ids to their states, 'UNKNOWN' for jobs that slurm does not know.
+    """
+    jobs = ','.join(sorted({job_id.split('_')[0] for job_id in job_ids}))
+    states = parse_states(await run_command('squeue', '--noheader', '--array', '--format=%i|%T', f'--jobs={jobs}'))
+    missing = [job_id for job_id in job_ids if job_id not in states]
+    if missing:
+        jobs = ','.join(sorted({job_id.split('_')[0] for job_id in missing}))
+        states.update(parse_states(await run_command( 'sacct', '--noheader', '--parsable2', '--format=JobID,State'
+                                                    , f'--jobs={jobs}'
+                                                    )))
+    return {job_id: states.get(job_id, 'UNKNOWN') for job_id in job_ids}
+
+
+def next_interval(interval, changed, poll, max_poll):
+    """The interval until the next poll: back to ``poll`` if something changed, otherwise doubled, up to ``max_poll``."""
+    if changed:
+        return poll
+    return min(2 * interval, max_poll)
+
+
+#===================================================================================================
+def total_timesteps(run_case):
+    """The number of timesteps of a run case, from ``startTime``, ``endTime`` and ``deltaT`` in its controlDict.
+
+    :return: the number of timesteps, 0 if it cannot be determined.
+    """
+    try:
+        text = (Path(run_case) / 'system/controlDict').read_text(errors='replace')
+        values = {}
+        for key in ('startTime', 'endTime', 'deltaT'):
+            values[key] = float(re.search(_CONTROL_DICT_ENTRY.format(key), text, re.MULTILINE)[1])
+    except (OSError, TypeError, ValueError):
+        return 0
+    if values['deltaT'] <= 0:
+        return 0
+    return round((values['endTime'] - values['startTime']) / values['deltaT'])
+
+
+def write_interval(run_case):
+    """The number of timesteps between two writes of the fields, from ``writeControl``, ``writeInterval``
+    and ``deltaT`` in the controlDict of a run case.
+
+    :return: the number of timesteps, 0 if it cannot be determined (e.g. ``adjustableRunTime``).
+    """
+    try:
+        text = (Path(run_case) / 'system/controlDict').read_text(errors='replace')
+        control = re.search(_CONTROL_DICT_ENTRY.format('writeControl'), text, re.MULTILINE)[1].strip()
+        interval = float(re.search(_CONTROL_DICT_ENTRY.format('writeInterval'), text, re.MULTILINE)[1])
+        if control == 'timeStep':
+            return max(round(interval), 0)
+        if control == 'runTime':
+            delta_t = float(re.search(_CONTROL_DICT_ENTRY.format('deltaT'), text, re.MULTILINE)[1])
+            return max(round(interval / delta_t), 0) if delta_t > 0 else 0
+    except (OSError, TypeError, ValueError):
+        pass
+    return 0
+
+
+def scan_new_lines(results, name, record):
+    """Read the new part of the .log file of a run case into ``record`` (see :func:`of.scanner.scan_log`)."""
+    log = Path(results) / name / f'{name}.log'
+    if log.exists():
+        scan_log(log, record, offset=record.log_offset)
+
+
+def update_progress(results, name, job_id, state, record):
+    """The progress of a run case, from its job state and the record of its .log file (see :func:`scan_new_lines`).
+
+    If slurm does not know the job (state 'UNKNOWN'), the state is derived from the run case's files
+    (see :data:`STATUS_STATES`).
+
+    :return: :class:`Progress`.
+    """
+    run_case = Path(results) / name
+    times = record.execution_times
+    steps = len(times)
+    seconds_per_step = float('NAN')
+    if steps > 1:
+        window = times[-STEP_WINDOW - 1:]
+        seconds_per_step = (window[-1] - window[0]) / (len(window) - 1)
+    total_steps = total_timesteps(run_case)
+    if state == 'UNKNOWN':
+        state = STATUS_STATES.get(run_status(run_case), state)
+    eta = float('NAN')
+    if state in TERMINAL_STATES:
+        eta = 0.
+    elif total_steps and not math.isnan(seconds_per_step):
+        eta = max(total_steps - steps, 0) * seconds_per_step
+    return Progress(name, job_id, state, steps, total_steps, seconds_per_step, eta)
+
+
+def _duration(seconds):
+    if math.isnan(seconds):
+        return '-'
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02}:{seconds % 60:02}"
+
+
+def print_progress(progress, file=sys.stdout):
+    """Print a table with the progress of all run cases."""
+    line = 92*'-'
+    print(f"\n{time.strftime('%Y-%m-%d %H:%M:%S')}", file=file)
+    print(line, file=file)
+    print(f"{'run case':<32}{'job id':>12}{'state':>12}{'steps':>14}{'s/step':>10}{'ETA':>12}", file=file)
+    for p in progress:
+        steps = f"{p.steps}/{p.total_steps}" if p.total_steps else f"{p.steps}"
+        print(f"{p.run_case:<32}{p.job_id:>12}{p.state:>12}{steps:>14}{p.seconds_per_step:>10.3f}{_duration(p.eta):>12}", file=file)
+    print(line, file=file)
+
+
+#===================================================================================================
+async def track_async( results, poll=10., max_poll=300., postprocess=True, max_polls=-1, verbosity=0
+                     , file=sys.stdout
+                     ):
+    """Track the jobs of a results directory until they have all finished (see the module documentation).
+
+    :param results: the results directory of a sweep.
+    :param float poll: initial interval between polls, in seconds.
+    :param float max_poll: maximum interval between polls, in seconds.
+    :param bool postprocess: post-process the results when all jobs have finished.
+    :param int max_polls: stop tracking after this number of polls. -1 means track until all jobs have finished.
+    :return: the :class:`Progress` of all run cases after the last poll.
+    """
+    results = Path(results)
+    jobs = load_jobs(results)
+    if not jobs:
+        click.secho(f"No submitted jobs recorded in '{jobs_path(results)}'.", fg='red')
+        return []
+    records = {name: CaseRecord() for name in jobs}
+    loop = asyncio.get_running_loop()
+    states = {}
+    interval = poll
+    polls = 0
+    while True:
+        polls += 1
+        # query slurm while the logs are read
+        query = asyncio.ensure_future(query_states(list(jobs.values())))
+        await loop.run_in_executor(None, lambda: [scan_new_lines(results, name, records[name]) for name in jobs])
+        new_states = await query
+        progress = [ update_progress(results, name, job_id, new_states[job_id], records[name])
+                     for name, job_id in jobs.items()
+                   ]
+        changed = new_states != states
+        states = new_states
+        print_progress(progress, file=file)
+        if all(p.state in TERMINAL_STATES for p in progress):
+            click.secho("All jobs have finished.", fg='green')
+            break
+        if polls == max_polls:
+            return progress
+        await asyncio.sleep(interval)
+        interval = next_interval(interval, changed, poll, max_poll)
+
+    if postprocess:
+        from of.post import postprocess as post
+        post(case='', results=results, clean=False, verbosity=verbosity)
+    return progress
+
+
+def track(results, poll=10., max_poll=300., postprocess=True, max_polls=-1, verbosity=0, file=sys.stdout):
+    """Track the jobs of a results directory (see :func:`track_async`)."""
+    return asyncio.run(track_async( results, poll=poll, max_poll=max_poll, postprocess=postprocess
+                                  , max_polls=max_polls, verbosity=verbosity, file=file
+                                  ))
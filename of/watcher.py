@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module of.watcher
+=================
+
+Stop a benchmark run as soon as its walltime per timestep is known accurately enough.
+
+The watcher is started by the job script (see :func:`of.watched`) in the background,
+next to the solver. It follows the solver's .log file as it grows, and keeps the walltimes of the
+last ``window`` timesteps (differences of successive ExecutionTimes, after ``warmup`` timesteps).
+As soon as the relative width of the (normal approximation) confidence interval of their mean is
+below ``rel_width``, it sets ``stopAt`` to ``noWriteNow`` (or ``writeNow``) in ``system/controlDict``.
+OpenFOAM re-reads the controlDict (``runTimeModifiable yes``), finishes the current timestep and
+ends the run normally, so the .log file looks like that of any completed run.
+
+The job may run with the Python of the OpenFOAM module environment, therefore this module uses
+only the standard library, and is run as a script::
+
+    python3 .../of/watcher.py <case>.log --rel-width 0.02
+"""
+
+import os
+import re
+import sys
+import time
+import math
+import argparse
+import statistics
+
+#===================================================================================================
+EXECUTION_TIME = re.compile(rb'^ExecutionTime = ([-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?) s', re.MULTILINE)
+END = re.compile(rb'^(?:End|Finalising parallel run)\s*$', re.MULTILINE)
+STOP_AT = re.compile(r'^(\s*stopAt\s+)\w+(\s*;)', re.MULTILINE)
+
+Z95 = 1.96
+"""Quantile of the normal distribution for a 95% confidence interval."""
+
+
+#===================================================================================================
+def relative_ci_width(step_times, z=Z95):
+    """Width of the confidence interval of the mean of step_times, relative to the mean."""
+    n = len(step_times)
+    if n < 2:
+        return math.inf
+    mean = statistics.mean(step_times)
+    if mean <= 0:
+        return math.inf
+    return 2 * z * statistics.stdev(step_times) / math.sqrt(n) / mean
+
+
+def is_stable(step_times, rel_width, min_steps=20, window=100):
+    """Test whether the mean walltime per timestep of the last ``window`` timesteps is known within rel_width.
+
+    :param list step_times: walltimes of the timesteps (without the warmup timesteps).
+    :param float rel_width: maximum relative width of the 95% confidence interval.
+    :param int min_steps: never stable with fewer timesteps.
+    """
+    if len(step_times) < min_steps:
+        return False
+    return relative_ci_width(step_times[-window:]) <= rel_width
+
+
+def stop_run(control_dict, write=False):
+    """Make OpenFOAM stop after the current timestep by setting ``stopAt`` in its controlDict.
+
+    The new controlDict is written to a temporary file in the same directory, which then replaces it
+    atomically, so that a solver with ``runTimeModifiable`` never reads a half written file. The new
+    file is opened for writing once more, and closed unchanged, because OpenFOAM's inotify file
+    monitoring only reacts to files that are closed after writing, not to renames.
+    """
+    with open(control_dict) as f:
+        text = f.read()
+    value = 'writeNow' if write else 'noWriteNow'
+    if STOP_AT.search(text):
+        text = STOP_AT.sub(rf'\g<1>{value}\g<2>', text, count=1)
+    else:
+        text += f"\nstopAt          {value};\n"
+    tmp = f"{control_dict}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(text)
+    os.replace(tmp, control_dict)
+    open(control_dict, 'a').close()
+
+
+#===================================================================================================
+def watch( log, control_dict='system/controlDict', rel_width=0.02, warmup=0, min_steps=20, window=100
+         , write=False, poll=5.0, max_polls=-1
+         ):
+    """Follow a growing solver log and stop the run when the walltime per timestep is stable.
+
+    :param log: path of the solver .log file. It need not exist yet.
+    :param control_dict: path of the controlDict of the run.
+    :param float poll: seconds between reads of the log file.
+    :param int max_polls: stop watching after this number of polls. -1 means watch until the run ends.
+    :return: the number of timesteps after which the run was stopped, or 0 if the run ended by
+        itself or the watcher gave up.
+
+    See :func:`is_stable` for the other parameters.
+    """
+    offset = 0
+    rest = b''
+    execution_times = []
+    polls = 0
+    while polls != max_polls:
+        polls += 1
+        if os.path.exists(log):
+            with open(log, 'rb') as f:
+                f.seek(offset)
+                data = rest + f.read()
+            offset += len(data) - len(rest)
+            # only complete lines
+            end = data.rfind(b'\n') + 1
+            data, rest = data[:end], data[end:]
+            execution_times += [float(m[1]) for m in EXECUTION_TIME.finditer(data)]
+            if END.search(data):
+                return 0
+            step_times = [b - a for a, b in zip(execution_times[warmup:], execution_times[warmup + 1:])]
+            if is_stable(step_times, rel_width, min_steps, window):
+                stop_run(control_dict, write)
+                print( f"Watcher: stopping the run after {len(execution_times)} timesteps, relative width of the "
+                       f"confidence interval = {relative_ci_width(step_times[-window:]):.4f}", flush=True
+                     )
+                return len(execution_times)
+        time.sleep(poll)
+    return 0
+
+
+#===================================================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('log', help='the solver .log file')
+    parser.add_argument('--control-dict', default='system/controlDict')
+    parser.add_argument('--rel-width', type=float, default=0.02
+                       , help='maximum relative width of the 95%% confidence interval of the walltime per timestep')
+    parser.add_argument('--warmup', type=int, default=0, help='number of timesteps to ignore at the start')
+    parser.add_argument('--min-steps', type=int, default=20)
+    parser.add_argument('--window', type=int, default=100)
+    parser.add_argument('--write', action='store_true', help='write the fields when stopping')
+    parser.add_argument('--poll', type=float, default=5.0, help='seconds between reads of the log file')
+    args = parser.parse_args(argv)
+    watch( args.log, control_dict=args.control_dict, rel_width=args.rel_width, warmup=args.warmup
+         , min_steps=args.min_steps, window=args.window, write=args.write, poll=args.poll
+         )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
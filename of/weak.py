@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+"""
+Module of.weak
+==============
+
+Weak scaling: the mesh grows with the number of cores, so that the number of cells per core stays
+the same.
+
+The mesh must be generated by ``blockMesh``. For every run case, the cell counts of the blocks in
+the case's ``blockMeshDict`` are scaled by the same refinement ratio, such that the total number
+of cells is (approximately) ``cells_per_core * n_cores``. Only the directions in which the mesh
+has more than one cell are refined, so two-dimensional cases stay two-dimensional, and blocks that
+share a face keep matching cell counts.
+
+The job script sets the scaled block counts with ``foamDictionary`` and runs ``blockMesh`` itself,
+before the decomposition. That is also how weak scaling works on dodrio, where large meshes cannot
+be generated in the case directory beforehand: every run case is meshed on its compute node(s).
+"""
+
+import re
+from pathlib import Path
+
+#===================================================================================================
+BLOCK_MESH_DICTS = ('system/blockMeshDict', 'constant/polyMesh/blockMeshDict')
+"""Locations of the blockMeshDict, relative to the case directory, in order of preference."""
+
+_COMMENT = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+_BLOCKS = re.compile(r'^\s*blocks\s*\(', re.MULTILINE)
+_HEX = re.compile(r'(hex\s*\([^()]*\)\s*(?:\w+\s*)?)\(\s*(\S+)\s+(\S+)\s+(\S+)\s*\)')
+
+
+#===================================================================================================
+def find_block_mesh_dict(case):
+    """The path of the blockMeshDict of a case, relative to the case directory.
+
+    :raises FileNotFoundError: if the case has no blockMeshDict.
+    """
+    for relpath in BLOCK_MESH_DICTS:
+        if (Path(case) / relpath).exists():
+            return relpath
+    raise FileNotFoundError(f"Weak scaling needs a blockMeshDict in '{case}' (one of {BLOCK_MESH_DICTS}).")
+
+
+def blocks_entry(text):
+    """The value of the ``blocks`` entry of a blockMeshDict (a list, including the parentheses), without comments."""
+    text = _COMMENT.sub(' ', text)
+    m = _BLOCKS.search(text)
+    if not m:
+        raise ValueError("No 'blocks' entry in the blockMeshDict.")
+    start = m.end() - 1
+    depth = 0
+    for i in range(start, len(text)):
+        if text[i] == '(':
+            depth += 1
+        elif text[i] == ')':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    raise ValueError("Unbalanced parentheses in the 'blocks' entry of the blockMeshDict.")
+
+
+def block_counts(blocks):
+    """The cell counts ``(nx, ny, nz)`` of every block in a ``blocks`` entry.
+
+    :raises ValueError: if a cell count is not an integer (e.g. a ``$variable``).
+    """
+    counts = []
+    for m in _HEX.finditer(blocks):
+        try:
+            counts.append(tuple(int(n) for n in m.group(2, 3, 4)))
+        except ValueError:
+            raise ValueError(f"Cannot scale the block '{m[0]}': the cell counts must be integers.")
+    if not counts:
+        raise ValueError("No hex blocks in the 'blocks' entry of the blockMeshDict.")
+    return counts
+
+
+def n_cells(counts):
+    """Total number of cells of blocks with cell counts ``counts``."""
+    return sum(nx * ny * nz for nx, ny, nz in counts)
+
+
+def scaled_blocks(blocks, target_cells):
+    """Scale the cell counts of a ``blocks`` entry to get approximately ``target_cells`` cells.
+
+    :return: tuple (the scaled ``blocks`` entry, its number of cells).
+    """
+    counts = block_counts(blocks)
+    refined = [d for d in range(3) if any(c[d] > 1 for c in counts)]
+    ratio = (target_cells / n_cells(counts)) ** (1 / max(len(refined), 1))
+
+    def scale(m):
+        c = [int(n) for n in m.group(2, 3, 4)]
+        c = [max(1, round(n * ratio)) if d in refined else n for d, n in enumerate(c)]
+        return f"{m[1]}({c[0]} {c[1]} {c[2]})"
+
+    scaled = _HEX.sub(scale, blocks)
+    return scaled, n_cells(block_counts(scaled))
+
+
+#===================================================================================================
+def weak_commands(block_mesh_dict, n_cores, cells_per_core):
+    """Job script lines generating the mesh of a weak scaling run case.
+
+    :param str block_mesh_dict: absolute path of the blockMeshDict of the original case.
+    :param int n_cores: number of cores of the run case.
+    :param int cells_per_core: target number of cells per core.
+    """
+    path = Path(block_mesh_dict)
+    relpath = next(p for p in BLOCK_MESH_DICTS if path.as_posix().endswith(p))
+    blocks = blocks_entry(path.read_text())
+    scaled, total = scaled_blocks(blocks, cells_per_core * n_cores)
+    scaled = ' '.join(scaled.split())
+    return [f"# Weak scaling: {total} cells, {total / n_cores:.0f} cells per core"
+           ,f"foamDictionary -entry blocks -set '{scaled}' {relpath}"
+           , "blockMesh"
+           ]
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+"""Fixtures and helpers shared by the tests of the of package."""
+
+import pytest
+
+
+def make_run_case(tmp_path, name='cavity-1x2cores', n_timesteps=5, completed=True):
+    """Write a run case directory with a .log and a .stdout file, as a (completed) job would."""
+    run_case = tmp_path / name
+    run_case.mkdir()
+    lines = ["Create time", ""]
+    for i in range(n_timesteps):
+        lines += [ f"Time = {0.005*(i+1)}"
+                 , ""
+                 , "Courant Number mean: 0.2 max: 0.8"
+                 , "smoothSolver:  Solving for Ux, Initial residual = 1, Final residual = 8.9e-06, No Iterations 19"
+                 , "DICPCG:  Solving for p, Initial residual = 1, Final residual = 0.049, No Iterations 12"
+                 , "DICPCG:  Solving for p, Initial residual = 0.59, Final residual = 2.6e-07, No Iterations 35"
+                 ,f"ExecutionTime = {2.0*i + 1} s  ClockTime = {2*i + 2} s"
+                 , ""
+                 ]
+    if completed:
+        lines += ["End", "", "Finalising parallel run", ""]
+    (run_case / f"{name}.log").write_text('\n'.join(lines))
+    (run_case / f"{name}.stdout").write_text("JOB ID = 1\nMesh size: 8000\nMesh region0 size: 9000\n")
+    return run_case
+
+
+@pytest.fixture
+def write_run_case():
+    """The function that writes a run case: ``write_run_case(tmp_path, name, n_timesteps, completed)``
+    (see :func:`make_run_case`)."""
+    return make_run_case
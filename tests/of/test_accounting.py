@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for of.accounting, against canned sacct output."""
+
+import sys
+sys.path.insert(0,'.')
+
+import os
+import math
+
+import pytest
+
+import of
+from of.scanner import CaseRecord
+from of.accounting import parse_duration, parse_size, parse_sacct, update_accounting, cpu_efficiency, core_hours, energy_per_timestep
+
+# sacct --noheader --parsable2 --format=JobID,State,Elapsed,TotalCPU,AveCPU,MaxRSS,ConsumedEnergyRaw,AllocCPUS
+SACCT = """\
+1000_0|COMPLETED|00:10:00|02:30:00|||180000|16
+1000_0.batch|COMPLETED|00:10:00|00:05:00|00:05:00|8388608K|20000|16
+1000_0.extern|COMPLETED|00:10:00|00:00:00|00:00:00|1024K|0|16
+1000_0.0|COMPLETED|00:09:00|02:25:00|00:09:03|1.5G|160000|16
+1000_1|RUNNING|00:01:00|00:00:00|||0|32
+1000_1.0|RUNNING|00:01:00|00:00:00|||0|32
+1001|CANCELLED by 42|1-01:00:00|00:00:00|||0|8
+1001.batch|CANCELLED|1-01:00:00|00:00:00|00:00:00|2G|500|8
+"""
+
+
+def test_parse():
+    assert parse_duration('1-01:02:03') == 90123
+    assert parse_duration('02:30.500') == 150.5
+    assert math.isnan(parse_duration(''))
+    assert parse_size('1234K') == 1234 * 1024
+    assert parse_size('1.5G') == 1.5 * 1024**3
+    assert parse_size('0') == 0
+    assert math.isnan(parse_size(''))
+
+    jobs = parse_sacct(SACCT)
+    assert set(jobs) == {'1000_0', '1000_1', '1001'}
+    a = jobs['1000_0']
+    assert a['state'] == 'COMPLETED'
+    assert a['elapsed'] == 600
+    assert a['alloc_cpus'] == 16
+    assert a['energy'] == 180000
+    # the solver step, not the batch step with the serial pre-processing
+    assert a['max_rss'] == 1.5 * 1024**3
+    assert a['ave_cpu'] == 543
+    assert cpu_efficiency(a) == pytest.approx(9000 / (600 * 16))
+    assert core_hours(a) == pytest.approx(16 / 6)
+    assert energy_per_timestep(a, 0.5) == pytest.approx(150)
+    # no numbered steps: the batch step, and the energy of the steps
+    a = jobs['1001']
+    assert a['state'] == 'CANCELLED'
+    assert a['max_rss'] == 2 * 1024**3
+    assert a['energy'] == 500
+    assert math.isnan(jobs['1000_1']['energy'])
+
+
+def test_update_accounting(tmp_path, monkeypatch):
+    bin = tmp_path / 'bin'
+    bin.mkdir()
+    sacct = bin / 'sacct'
+    sacct.write_text(f"#!{sys.executable}\nimport sys\nsys.stdout.write({SACCT!r})\n")
+    sacct.chmod(0o755)
+    monkeypatch.setenv('PATH', str(bin) + os.pathsep + os.environ['PATH'])
+
+    names = ['cavity-1x16cores', 'cavity-1x32cores', 'cavity-1x8cores', 'cavity-1x4cores', 'cavity-1x2cores']
+    run_cases = [tmp_path / name for name in names]
+    records = [CaseRecord() for _ in names]
+    records[4].accounting = {'state': 'COMPLETED'}
+    # the last two were packed in a single job
+    jobs = dict(zip(names, ['1000_0', '1000_1', '1001', '1002', '1002']))
+    cache = {name: {'record': {}} for name in names}
+    assert update_accounting(run_cases, records, jobs, cache) == 2
+    assert records[0].accounting['energy'] == 180000
+    assert cache[names[0]]['record']['accounting'] is records[0].accounting
+    assert not records[1].accounting # still running
+    assert records[2].accounting['state'] == 'CANCELLED'
+    assert not records[3].accounting
+
+# ==============================================================================
+# The code below is for debugging a particular test in eclipse/pydev.
+# (otherwise all tests are normally run with pytest)
+# Make sure that you run this code with the project directory as CWD, and
+# that the source directory is on the path
+# ==============================================================================
+if __name__ == "__main__":
+    the_test_you_want_to_debug = test_parse
+
+    print("__main__ running", the_test_you_want_to_debug)
+    the_test_you_want_to_debug()
+    print('-*# finished #*-')
+
+# eof
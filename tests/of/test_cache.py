@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for of.cache."""
+
+import sys
+sys.path.insert(0,'.')
+
+import os
+
+from of.scanner import scan_case
+from of.cache import scan_case_cached, load_cache, save_cache
+
+
+def test_scan_case_cached(tmp_path, write_run_case):
+    run_case = write_run_case(tmp_path, n_timesteps=3, completed=False)
+    log = run_case / (run_case.name + '.log')
+
+    record, entry = scan_case_cached(run_case)
+    assert record.n_timesteps == 3
+    save_cache(tmp_path, {run_case.name: entry})
+    entry = load_cache(tmp_path)[run_case.name]
+
+    # unchanged: the cached record is returned
+    cached, entry2 = scan_case_cached(run_case, entry)
+    assert entry2 is entry
+    assert cached == record
+
+    # grown: the scan resumes at the offset of the previous scan
+    with open(log, 'a') as f:
+        f.write("\nExecutionTime = 11 s  ClockTime = 12 s\n\nEnd\n")
+    resumed, entry = scan_case_cached(run_case, entry)
+    assert resumed.execution_times == [1.0, 3.0, 5.0, 11.0]
+    assert resumed.completed
+    assert resumed == scan_case(run_case)
+
+    # rewritten in place (same inode) with more data: scanned from scratch
+    inode = os.stat(log).st_ino
+    with open(log, 'w') as f:
+        f.write("ExecutionTime = 2 s  ClockTime = 2 s\n" * 10)
+    assert os.stat(log).st_ino == inode
+    rewritten, entry = scan_case_cached(run_case, entry)
+    assert rewritten.execution_times == 10*[2.0]
+
+    # replaced: scanned from scratch
+    os.remove(log)
+    log.write_text("ExecutionTime = 1 s  ClockTime = 1 s\n")
+    replaced, entry = scan_case_cached(run_case, entry)
+    assert replaced.execution_times == [1.0]
+
+# ==============================================================================
+# The code below is for debugging a particular test in eclipse/pydev.
+# (otherwise all tests are normally run with pytest)
+# Make sure that you run this code with the project directory as CWD, and
+# that the source directory is on the path
+# ==============================================================================
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    from conftest import make_run_case
+    the_test_you_want_to_debug = test_scan_case_cached
+
+    print("__main__ running", the_test_you_want_to_debug)
+    with tempfile.TemporaryDirectory() as d:
+        the_test_you_want_to_debug(Path(d), make_run_case)
+    print('-*# finished #*-')
+
+# eof
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for of.counters, against canned perf and likwid output."""
+
+import sys
+sys.path.insert(0,'.')
+
+import os
+import math
+import subprocess
+
+import of
+from of.counters import parse_perf, parse_likwid, read_counters, ipc, bandwidth, counter_commands
+
+PERF = """\
+# started on Tue Mar  5 10:12:01 2024
+
+8000000000,,cycles:u,2000000000,100.00,,
+12000000000,,instructions:u,2000000000,100.00,1.50,insn per cycle
+50000000,,LLC-load-misses:u,2000000000,100.00,,
+2000.00,msec,task-clock:u,2000000000,100.00,1.000,CPUs utilized
+"""
+
+PERF_NOT_SUPPORTED = """\
+4000000000,,cycles,1000000000,100.00,,
+6000000000,,instructions,1000000000,100.00,1.50,insn per cycle
+<not supported>,,LLC-load-misses,0,100.00,,
+1000.00,msec,task-clock,1000000000,100.00,1.000,CPUs utilized
+"""
+
+LIKWID = """\
+STRUCT,Info,3
+CPU name:,AMD EPYC 7H12 64-Core Processor
+TABLE,Region 0,Group 1 Raw,MEM,6
+Event,Counter,HWThread 3
+Runtime (RDTSC) [s],TSC,2.0
+INSTR_RETIRED_ANY,FIXC0,3000000000
+CPU_CLK_UNHALTED_CORE,FIXC1,4000000000
+TABLE,Region 0,Group 1 Metric,MEM,4
+Metric,HWThread 3
+Runtime (RDTSC) [s],2.0
+IPC,0.75
+Memory bandwidth [MBytes/s],5000
+Memory data volume [GBytes],10
+"""
+
+# a node with 2 sockets: the memory data volume is reported by the first hardware thread of each socket
+LIKWID_NODE = """\
+TABLE,Region 0,Group 1 Raw,MEM,6
+Event,Counter,HWThread 0,HWThread 1,HWThread 64,HWThread 65
+Runtime (RDTSC) [s],TSC,2.0,2.0,2.0,2.0
+INSTR_RETIRED_ANY,FIXC0,1000000000,1000000000,1000000000,1000000000
+CPU_CLK_UNHALTED_CORE,FIXC1,2000000000,2000000000,2000000000,2000000000
+TABLE,Region 0,Group 1 Metric,MEM,4
+Metric,HWThread 0,HWThread 1,HWThread 64,HWThread 65
+Runtime (RDTSC) [s],2.0,2.0,2.0,2.0
+Memory data volume [GBytes],10,0,6,0
+"""
+
+
+def test_parse_perf():
+    c = parse_perf(PERF)
+    assert c.cycles == 8e9
+    assert c.instructions == 12e9
+    assert c.bytes == 50e6 * 64
+    assert c.seconds == 2.0
+    c = parse_perf(PERF_NOT_SUPPORTED)
+    assert c.instructions / c.cycles == 1.5
+    assert math.isnan(c.bytes)
+
+
+def test_parse_likwid():
+    c = parse_likwid(LIKWID)
+    assert c.cycles == 4e9
+    assert c.instructions == 3e9
+    assert c.bytes == 10e9
+    assert c.seconds == 2.0
+
+
+def test_read_counters(tmp_path):
+    (tmp_path / 'counters').mkdir()
+    for rank in range(2):
+        (tmp_path / f'counters/perf.{rank}.csv').write_text(PERF)
+    counters = read_counters(tmp_path)
+    assert counters['ranks'] == 2
+    assert ipc(counters) == 1.5
+    assert bandwidth(counters) == 2 * 50e6 * 64 / 2.0 * 1e-9
+    assert read_counters(tmp_path / 'nothing') == {}
+
+
+def test_read_counters_likwid(tmp_path):
+    # one file per node, the memory traffic of a socket is counted once
+    (tmp_path / 'counters').mkdir()
+    for node in ('node1', 'node2'):
+        (tmp_path / f'counters/likwid.{node}.csv').write_text(LIKWID_NODE)
+    counters = read_counters(tmp_path)
+    assert counters['ranks'] == 2
+    assert counters['bytes'] == 2 * 16e9
+    assert ipc(counters) == 0.5
+    assert bandwidth(counters) == 16.
+
+
+def test_counter_wrapper(tmp_path, monkeypatch):
+    # likwid-perfctr is only started by the first rank on a node, and measures the whole node
+    (tmp_path / 'bin').mkdir()
+    fake = tmp_path / 'bin/likwid-perfctr'
+    fake.write_text('#!/bin/bash\necho "likwid $*" >> calls\n')
+    fake.chmod(0o755)
+    monkeypatch.setenv('PATH', str(tmp_path / 'bin') + os.pathsep + os.environ['PATH'])
+    script = '\n'.join(counter_commands('likwid'))
+    for local_rank in range(2):
+        subprocess.run(['bash', '-c', f"{script}\nSLURM_LOCALID={local_rank} counters/wrap.sh echo solver >> calls"], cwd=tmp_path)
+    calls = (tmp_path / 'calls').read_text().splitlines()
+    assert calls[0].startswith('likwid -c N -g MEM')
+    assert calls[1] == 'solver'
+
+
+def test_jobscript_counters():
+    options = of.RunOptions(counters='perf')
+    script = of.jobscript(1, 4, 4, 1, 'cavity-1x4cores', 'icoFoam', 0, options=options)
+    assert "counters/wrap.sh icoFoam -parallel >& cavity-1x4cores.log" in script
+    assert "perf stat -x," in script
+
+# ==============================================================================
+# The code below is for debugging a particular test in eclipse/pydev.
+# (otherwise all tests are normally run with pytest)
+# Make sure that you run this code with the project directory as CWD, and
+# that the source directory is on the path
+# ==============================================================================
+if __name__ == "__main__":
+    the_test_you_want_to_debug = test_parse_perf
+
+    print("__main__ running", the_test_you_want_to_debug)
+    the_test_you_want_to_debug()
+    print('-*# finished #*-')
+
+# eof
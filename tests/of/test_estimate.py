@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for of.estimate."""
+
+import sys
+sys.path.insert(0,'.')
+
+import dataclasses
+
+import pytest
+
+import of
+from of.cache import save_cache
+from of.scanner import CaseRecord
+from of.estimate import estimate_walltimes, predict_seconds_per_step, measured_timings, results_directories
+
+
+def write_sweep(results, timings, n_cells=1000, n_steps=100):
+    """Write the post-processing cache of a sweep with the given walltimes per timestep by number of cores."""
+    results.mkdir()
+    run_cases = {}
+    for n_tasks, seconds in timings.items():
+        record = CaseRecord( execution_times=[i * seconds for i in range(1, n_steps + 1)]
+                           , n_cells=n_cells, completed=True
+                           )
+        run_cases[f"cavity-1x{n_tasks}cores"] = {'stats': {}, 'record': dataclasses.asdict(record)}
+    # run cases of other launch strategies are ignored
+    run_cases["cavity-1x2cores-cyclic"] = run_cases["cavity-1x1cores"]
+    save_cache(results, run_cases)
+
+
+def test_estimate_walltimes(tmp_path):
+    case = tmp_path / 'cavity'
+    case.mkdir()
+    write_sweep(tmp_path / 'cavity-strong-scaling-test-64.4', {1: 8., 2: 4., 4: 2.})
+    directories = results_directories(case, tmp_path / 'cavity-strong-scaling-test-64.64')
+    timings = measured_timings(directories, 'cavity')
+    assert timings == {1: 8., 2: 4., 4: 2.}
+    # Amdahl fit of perfect scaling
+    assert predict_seconds_per_step(timings, 8) == pytest.approx(1.)
+    assert predict_seconds_per_step({4: 2.}, 8) == pytest.approx(1.)
+    assert predict_seconds_per_step({4: 2.}, 8, weak=True) == 2.
+
+    options = of.RunOptions(timesteps=900, warmup=100)
+    walltimes = estimate_walltimes(case, tmp_path / 'cavity-strong-scaling-test-64.64', [1, 8], options)
+    # overhead + margin * 1000 timesteps, rounded up to minutes
+    assert walltimes[1] == pytest.approx(0.25 + 1.5 * 1000 * 8 / 3600, abs=1/60)
+    assert walltimes[8] < walltimes[1]
+    options = options._replace(walltimes=walltimes)
+    assert of.run_case_walltime(1, 8, options) == walltimes[8]
+    assert of.run_case_walltime(1, 16, options) == 1
+    assert estimate_walltimes(case, tmp_path, [1], of.RunOptions(cells_per_core=1000)) == {}
+
+
+def test_estimate_walltimes_early_stop(tmp_path):
+    # the earlier run cases were stopped early, after 10 of the 1000 timesteps of the case
+    case = tmp_path / 'cavity'
+    (case / 'system').mkdir(parents=True)
+    write_sweep(tmp_path / 'cavity-strong-scaling-test-64.4', {1: 8., 2: 4.}, n_steps=10)
+    walltimes = estimate_walltimes(case, tmp_path / 'cavity-strong-scaling-test-64.64', [1], of.RunOptions())
+    # without a controlDict the number of timesteps is unknown
+    assert walltimes == {}
+    (case / 'system/controlDict').write_text("startTime 0;\nendTime 0.5;\ndeltaT 0.0005;\n")
+    walltimes = estimate_walltimes(case, tmp_path / 'cavity-strong-scaling-test-64.64', [1], of.RunOptions())
+    assert walltimes[1] == pytest.approx(0.25 + 1.5 * 1000 * 8 / 3600, abs=1/60)
+
+# ==============================================================================
+# The code below is for debugging a particular test in eclipse/pydev.
+# (otherwise all tests are normally run with pytest)
+# Make sure that you run this code with the project directory as CWD, and
+# that the source directory is on the path
+# ==============================================================================
+if __name__ == "__main__":
+    the_test_you_want_to_debug = test_estimate_walltimes
+
+    print("__main__ running", the_test_you_want_to_debug)
+    the_test_you_want_to_debug()
+    print('-*# finished #*-')
+
+# eof
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for of.launch."""
+
+import sys
+sys.path.insert(0,'.')
+
+import pytest
+
+import of
+from of.launch import launch, applies, combine, run_case_name, RUN_CASE_PATTERN
+from of.decomposition import box_factors
+
+
+def test_launch():
+    assert launch('', 8, 8).driver == ''
+    assert launch('cyclic.bind-cores', 8, 8).driver == "srun --ntasks 8 --distribution block:cyclic:cyclic --cpu-bind=cores"
+    assert launch('dist-block-block', 8, 8).driver == "srun --ntasks 8 --distribution block:block"
+    assert launch('hybrid', 32, 16).driver == "mympirun --hybrid 16"
+    how = launch('bind-cores.omp4', 16, 8)
+    assert how.n_ranks == 4
+    assert how.driver == "srun --ntasks 4 --cpus-per-task 4 --cpu-bind=cores"
+    assert "export OMP_NUM_THREADS=4" in how.environment
+    with pytest.raises(ValueError):
+        launch('hybrid.bind-cores', 8, 8)
+    with pytest.raises(ValueError):
+        launch('spread', 8, 8)
+
+
+def test_applies():
+    assert applies('', 1)
+    assert not applies('cyclic', 1)
+    assert applies('cyclic', 2)
+    assert not applies('omp2', 2)
+    assert applies('omp2', 4)
+
+
+def test_run_case_name():
+    for strategy in ('', 'cyclic.bind-cores', 'omp2'):
+        m = RUN_CASE_PATTERN.match(run_case_name('cavity', 2, 128, strategy))
+        assert (m[1], m[2], m[3], m[4] or '') == ('cavity', '2', '64', strategy)
+
+
+def test_jobscript_strategy():
+    script = of.jobscript(1, 8, 8, 1, 'cavity-1x8cores-bind-cores.omp2', 'icoFoam', 0, strategy='bind-cores.omp2')
+    assert "foamDictionary -entry numberOfSubdomains -set 4 system/decomposeParDict" in script
+    assert "srun --ntasks 4 --cpus-per-task 2 --cpu-bind=cores icoFoam -parallel" in script
+
+
+def test_jobscript_decomposition_method():
+    assert box_factors(64) == (4, 4, 4)
+    assert box_factors(12) == (3, 2, 2)
+    assert box_factors(7) == (7, 1, 1)
+    assert combine(['', 'cyclic'], ['scotch', 'simple']) == ['scotch', 'simple', 'cyclic.scotch', 'cyclic.simple']
+    script = of.jobscript(1, 8, 8, 1, 'cavity-1x8cores-hierarchical', 'icoFoam', 0, strategy='hierarchical')
+    assert "foamDictionary -entry method -set hierarchical system/decomposeParDict" in script
+    assert 'foamDictionary -entry hierarchicalCoeffs -set "{ n (2 2 2); order xyz; }" system/decomposeParDict' in script
+    assert script.index("-entry method") < script.index("decomposePar\n")
+
+# ==============================================================================
+# The code below is for debugging a particular test in eclipse/pydev.
+# (otherwise all tests are normally run with pytest)
+# Make sure that you run this code with the project directory as CWD, and
+# that the source directory is on the path
+# ==============================================================================
+if __name__ == "__main__":
+    the_test_you_want_to_debug = test_launch
+
+    print("__main__ running", the_test_you_want_to_debug)
+    the_test_you_want_to_debug()
+    print('-*# finished #*-')
+
+# eof
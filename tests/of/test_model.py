@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for of.model."""
+
+import sys
+sys.path.insert(0,'.')
+
+import io
+
+import pytest
+import numpy as np
+
+from of.model import fit, predict, serial_fraction, efficiency, gustafson_speedup, recommend
+
+
+N_CORES = np.array([1, 2, 4, 8, 16, 32, 64, 128])
+
+
+def test_amdahl():
+    walltimes = 0.1 + 9.9 / N_CORES
+    m = fit('amdahl', N_CORES, walltimes, 0.01 * walltimes)
+    assert m.params == pytest.approx([0.1, 9.9])
+    s, ds = serial_fraction(m)
+    assert s == pytest.approx(0.01)
+    assert ds < 1e-6
+    walltime, error = predict(m, 256)
+    assert walltime[0] == pytest.approx(0.1 + 9.9 / 256)
+    assert efficiency(m, 100)[0] == pytest.approx(1 / (0.01 * 99 + 1))
+    # Gustafson: p - s_p*(p - 1)
+    s_p = 0.1 / (0.1 + 9.9 / 100)
+    assert gustafson_speedup(m, 100)[0] == pytest.approx(100 - s_p * 99)
+    # a near zero error does not dominate the fit
+    noisy = walltimes * (1 + 0.005 * np.cos(N_CORES))
+    errors = 0.01 * noisy
+    reference = fit('amdahl', N_CORES, noisy, errors)
+    errors[0] = 1e-12
+    assert fit('amdahl', N_CORES, noisy, errors).params == pytest.approx(reference.params)
+    # too few points
+    assert fit('amdahl', N_CORES[:2], walltimes[:2], 0.01 * walltimes[:2]) is None
+
+
+def test_communication():
+    rng = np.random.default_rng(0)
+    walltimes = (0.02 + 10 / N_CORES + 0.01 * np.log2(N_CORES)) * (1 + 0.001 * rng.standard_normal(len(N_CORES)))
+    errors = np.full(len(N_CORES), float('NAN'))
+    m = fit('communication', N_CORES, walltimes, errors)
+    assert m.params == pytest.approx([0.02, 10, 0.01], rel=0.1)
+    assert m.dof == 5
+    candidates = np.array([1, 16, 64, 256, 1024])
+    # the fastest core count with an efficiency >= 0.5
+    assert recommend(m, candidates, 0.5) == 64
+    assert recommend(m, candidates, 0.01) == 1024
+    # nothing is efficient enough: the most efficient
+    assert recommend(m, candidates[1:], 1.0) == 16
+
+
+def test_print_scaling_models():
+    # a partial single node sweep on 64 core nodes
+    from of.post import print_scaling_models
+    n_cores = np.array([1, 2, 4, 8, 16])
+    walltimes = 0.1 + 9.9 / n_cores
+    output = io.StringIO()
+    print_scaling_models(np.ones(5, dtype=int), n_cores, walltimes, 0.01 * walltimes, 64, file=output)
+    rows = {int(line.split()[1].rstrip('*')): int(line.split()[0]) for line in output.getvalue().splitlines()
+            if line.split() and line.split()[0].isdigit()}
+    assert rows == {1: 1, 2: 1, 4: 1, 8: 1, 16: 1, 64: 1, 128: 2, 256: 4}
+
+# ==============================================================================
+# The code below is for debugging a particular test in eclipse/pydev.
+# (otherwise all tests are normally run with pytest)
+# Make sure that you run this code with the project directory as CWD, and
+# that the source directory is on the path
+# ==============================================================================
+if __name__ == "__main__":
+    the_test_you_want_to_debug = test_amdahl
+
+    print("__main__ running", the_test_you_want_to_debug)
+    the_test_you_want_to_debug()
+    print('-*# finished #*-')
+
+# eof
@@ -5,6 +5,11 @@
 import sys
 sys.path.insert(0,'.')
 
+import shutil
+import subprocess
+
+import pytest
+
 import of
 
 
@@ -17,6 +22,94 @@ def test_walltime():
     hours = 1.5
     assert of.walltime(hours) == f"1:30:00"
 
+def test_map_run_cases(tmp_path, write_run_case):
+    """Parallel scanning returns the same records, in the same order, as serial scanning."""
+    run_cases = [ write_run_case(tmp_path, f'cavity-1x{n}cores', n_timesteps=n+1)
+                  for n in (4, 1, 2, 8)
+                ]
+    serial = of.map_run_cases(run_cases, jobs=1)
+    parallel = of.map_run_cases(run_cases, jobs=3)
+    assert parallel == serial
+    assert [r.n_timesteps for r in parallel] == [5, 2, 3, 9]
+
+def test_array_jobscript():
+    script = of.array_jobscript( n_nodes=1, n_tasks=[1, 2, 4], max_tasks_per_node=4, walltime=1
+                               , case_names=['cavity-1x1cores', 'cavity-1x2cores', 'cavity-1x4cores']
+                               , openfoam_solver='icoFoam', job_name='cavity-1nodes-array', throttle=2
+                               )
+    assert "#SBATCH --array=0-2%2" in script
+    assert "RUN_CASES=(cavity-1x1cores cavity-1x2cores cavity-1x4cores)" in script
+    for i in range(3):
+        assert f"\n{i})\n" in script
+    assert "icoFoam -parallel >& cavity-1x4cores.log" in script
+
+def test_pack():
+    n_tasks = [1, 2, 4, 8, 16, 32, 64]
+    groups = of.pack(n_tasks, 64)
+    assert groups == [ [(6, 0)]
+                     , [(5, 0), (4, 32), (3, 48), (2, 56), (1, 60), (0, 62)]
+                     ]
+    assert of.walltime_hours("1:30:00") == 1.5
+
+def test_packed_jobscript(monkeypatch):
+    script = of.packed_jobscript( n_tasks=[1, 2], max_tasks_per_node=4, walltime=1
+                                , case_names=['cavity-1x1cores', 'cavity-1x2cores']
+                                , openfoam_solver='icoFoam', job_name='cavity-packed', concurrent=True
+                                )
+    # the serial renumberMesh is pinned too
+    assert "taskset -c 2 renumberMesh -overwrite" in script
+    assert "--cpu-bind=map_cpu:0,1 icoFoam -parallel" in script
+    monkeypatch.setattr(of, 'VSC_INSTITUTE_CLUSTER', 'dodrio')
+    with pytest.raises(ValueError):
+        of.pinned_driver(2, 0)
+
+def test_jobscript_decomposition_cache():
+    options = of.RunOptions(decomposition_cache='/scratch/.decomposition-cache')
+    script = of.jobscript(1, 4, 4, 1, 'cavity-1x4cores', 'icoFoam', 0, options=options)
+    assert "DECOMPOSITION=/scratch/.decomposition-cache/4-" in script
+    assert script.index("\n        decomposePar\n") > script.index("if [ -f $DECOMPOSITION/complete ]")
+    # serial runs are not decomposed
+    script = of.jobscript(1, 1, 4, 1, 'cavity-1x1cores', 'icoFoam', 0, options=options)
+    assert "DECOMPOSITION" not in script
+
+
+
+def test_cached_decomposition(tmp_path):
+    from of.decomposition import cached_decomposition
+    cache = tmp_path / 'cache'
+
+    def run(commands):
+        case = tmp_path / 'case'
+        shutil.rmtree(case, ignore_errors=True)
+        (case / 'system').mkdir(parents=True)
+        (case / 'system/decomposeParDict').write_text("numberOfSubdomains 2;\n")
+        script = '\n'.join(cached_decomposition(str(cache), 2, commands))
+        subprocess.run(['bash', '-c', script], cwd=case, capture_output=True)
+        return case
+
+    # a failed decomposition is not cached
+    run(["mkdir -p processor0 processor1", "false", "echo renumbered"])
+    assert not list(cache.glob('*/complete'))
+    case = run(["mkdir -p processor0 processor1", "echo mesh > processor0/points"])
+    assert len(list(cache.glob('*/complete'))) == 1
+    # a hit copies the cache, rewriting a file in place does not change the cache
+    case = run(["false"])
+    with open(case / 'processor0/points', 'w') as f:
+        f.write('renumbered')
+    assert (next(cache.glob('*/processor0/points'))).read_text() == 'mesh\n'
+
+
+def test_benchmark_mode():
+    options = of.RunOptions(timesteps=20, warmup=5, seconds_per_step=36.)
+    script = of.jobscript(1, 4, 4, 1, 'cavity-1x4cores', 'icoFoam', 0, options=options)
+    assert "$START_TIME + 25 * $DELTA_T" in script
+    assert "foamDictionary -entry writeInterval -set 26 system/controlDict" in script
+    assert script.index("system/controlDict") < script.index("icoFoam -parallel")
+    # 2 * 25 steps * 36 s / 4 tasks = 450 s, plus the overhead
+    assert of.run_case_walltime(1, 4, options) == of.BENCHMARK_OVERHEAD + 0.125
+    assert of.run_case_walltime(1, 4, options._replace(seconds_per_step=0.)) == 1
+    assert "controlDict" not in of.jobscript(1, 4, 4, 1, 'cavity-1x4cores', 'icoFoam', 0)
+
 # ==============================================================================
 # The code below is for debugging a particular test in eclipse/pydev.
 # (otherwise all tests are normally run with pytest)
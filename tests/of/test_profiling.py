@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for of.profiling."""
+
+import sys
+sys.path.insert(0,'.')
+
+import of
+from of.profiling import parse_profiling, read_case_profiling, self_times_by_category, hot_spot, category
+from of.scanner import scan_case
+
+PROFILING = """\
+FoamFile
+{
+    version     2.0;
+    format      ascii;
+    class       dictionary;
+    location    "0.1/uniform";
+    object      profiling;
+}
+
+profiling
+{
+    trigger0
+    {
+        id              0;
+        description     "application::main";
+        calls           1;
+        totalTime       10;
+        childTime       7;
+        onStack         1;
+    }
+
+    trigger1
+    {
+        id              1;
+        parentId        0;
+        description     "fvMatrix::solve_p";
+        calls           20;
+        totalTime       5;
+        childTime       0;
+        onStack         0;
+    }
+
+    trigger2
+    {
+        id              2;
+        parentId        0;
+        description     "fvMatrix::solve_Ux";
+        calls           20;
+        totalTime       1.5;
+        childTime       0;
+        onStack         0;
+    }
+
+    trigger3
+    {
+        id              3;
+        parentId        0;
+        description     "objectRegistry::writeObject";
+        calls           1;
+        totalTime       0.5;
+        childTime       0;
+        onStack         0;
+    }
+}
+"""
+
+
+def test_parse_profiling():
+    profile = parse_profiling(PROFILING)
+    assert profile['application::main'] == [1, 10., 3.]
+    assert profile['fvMatrix::solve_p'] == [20, 5., 5.]
+    assert self_times_by_category(profile) == {'I/O': 0.5, 'MPI': 0., 'solve': 6.5, 'assembly': 3.}
+    assert hot_spot(profile) == 'fvMatrix::solve_p'
+
+
+def test_category():
+    for description in ('functionObjects::write', 'fvMesh::readUpdate', 'timeWrite', 'objectRegistry::writeObject'):
+        assert category(description) == 'I/O', description
+    for description in ('globalMeshData::syncData', 'Pstream::reduce', 'processorFvPatch::gatherList'):
+        assert category(description) == 'MPI', description
+    # thread and async functions are not I/O nor MPI
+    for description in ('fileOperation::threadPool', 'Foam::asyncFunction', 'threadedSpread'):
+        assert category(description) == 'assembly', description
+    assert category('fvMatrix::solve_U') == 'solve'
+
+
+def test_read_case_profiling(tmp_path, write_run_case):
+    run_case = write_run_case(tmp_path, 'cavity-1x2cores')
+    for t in ('0.05', '0.1'):
+        (run_case / f'processor0/{t}/uniform').mkdir(parents=True)
+    (run_case / 'processor0/0.05/uniform/profiling').write_text("profiling {}")
+    (run_case / 'processor0/0.1/uniform/profiling').write_text(PROFILING)
+    # the latest time
+    assert read_case_profiling(run_case) == parse_profiling(PROFILING)
+    # picked up by the scanner of completed runs
+    assert scan_case(run_case).profiling == parse_profiling(PROFILING)
+
+
+def test_jobscript_profile():
+    options = of.RunOptions(profile=True, timesteps=20)
+    script = of.jobscript(1, 4, 4, 1, 'cavity-1x4cores', 'icoFoam', 0, options=options)
+    assert 'foamDictionary -entry profiling -set "{ active true;' in script
+    # the fields and the profiling are written after the last timestep
+    assert "foamDictionary -entry writeInterval -set 20 system/controlDict" in script
+
+# ==============================================================================
+# The code below is for debugging a particular test in eclipse/pydev.
+# (otherwise all tests are normally run with pytest)
+# Make sure that you run this code with the project directory as CWD, and
+# that the source directory is on the path
+# ==============================================================================
+if __name__ == "__main__":
+    the_test_you_want_to_debug = test_parse_profiling
+
+    print("__main__ running", the_test_you_want_to_debug)
+    the_test_you_want_to_debug()
+    print('-*# finished #*-')
+
+# eof
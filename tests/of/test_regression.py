@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for of.regression."""
+
+import sys
+sys.path.insert(0,'.')
+
+import io
+
+import numpy as np
+import pytest
+
+import of
+from of.store import record_runs
+from of.regression import baseline_step_times, compare, pooled_times, print_comparisons
+
+
+def timesteps(median, n=50, seed=0):
+    rng = np.random.default_rng(seed)
+    return median * rng.normal(1., 0.01, n)
+
+
+def write_run_case(results, name, times):
+    run_case = results / name
+    run_case.mkdir(parents=True)
+    execution_times = np.cumsum(times)
+    (run_case / f"{name}.log").write_text(''.join(f"ExecutionTime = {t:.6f} s\n" for t in execution_times) + "End\n")
+    (run_case / f"{name}.stdout").write_text("Mesh size: 1000\n")
+
+
+def test_compare():
+    baseline = {(1, 1, ''): [timesteps(1.)], (1, 2, ''): [timesteps(0.5)], (1, 4, ''): [timesteps(0.25)], (1, 8, ''): [timesteps(0.2)]}
+    current = { (1, 1, ''): [timesteps(1., seed=1)], (1, 2, ''): [timesteps(0.56, seed=1)], (1, 4, ''): [timesteps(0.2, seed=1)]
+              , (1, 8, ''): [timesteps(0.202, seed=1)], (2, 16, ''): [timesteps(0.1)]
+              }
+    comparisons = compare(current, baseline)
+    assert [(c.n_cores, c.verdict) for c in comparisons] == [(1, 'ok'), (2, 'regression'), (4, 'improvement'), (8, 'ok')]
+    assert comparisons[1].change == pytest.approx(0.12, abs=0.01)
+    assert comparisons[1].p_value < 1e-6
+    # below the threshold
+    assert compare(current, baseline, threshold=0.15)[1].verdict == 'ok'
+    output = io.StringIO()
+    print_comparisons(comparisons, 'base', file=output)
+    assert '1 regression(s).' in output.getvalue()
+
+
+def test_pooled_times():
+    # every run case has slow warmup timesteps, which must not leak into the pooled timesteps
+    runs = [np.concatenate([[5., 5.], timesteps(1., n=20, seed=seed)]) for seed in range(3)]
+    pooled = pooled_times(runs, warmup=2, exclude_outliers=False)
+    assert len(pooled) == 60
+    assert pooled.max() < 1.1
+    assert len(pooled_times([])) == 0
+
+
+def test_baseline(tmp_path):
+    base = tmp_path / 'cavity-strong-scaling-test-64.64'
+    write_run_case(base, 'cavity-1x1cores', timesteps(1.))
+    write_run_case(base, 'cavity-1x2cores', timesteps(0.5))
+    write_run_case(base, 'cavity-1x2cores-cyclic', timesteps(0.6))
+    write_run_case(base, 'pitzDaily-1x2cores', timesteps(0.1))
+    times = baseline_step_times(str(base), 'cavity', tmp_path / 'current')
+    assert sorted(times) == [(1, 1, ''), (1, 2, ''), (1, 2, 'cyclic')]
+    assert len(times[(1, 2, 'cyclic')]) == 1
+    assert np.median(times[(1, 2, 'cyclic')][0]) == pytest.approx(0.6, rel=0.01)
+
+    db = tmp_path / 'store.sqlite'
+    run = { 'run_case': 'cavity-1x2cores', 'variant': '', 'n_nodes': 1, 'n_cores': 2, 'n_cells': 1000, 'n_timesteps': 3
+          , 'walltime': 0.5, 'walltime_error': 0., 'speedup': 2., 'efficiency': 1., 'energy_per_timestep': float('NAN')
+          , 'max_rss': float('NAN'), 'cpu_efficiency': float('NAN'), 'step_times': [0.5, 0.5, 0.5]
+          }
+    record_runs(tmp_path / 'old', {'case': 'cavity', 'stack': 'old'}, [run], path=db)
+    record_runs(tmp_path / 'older', {'case': 'cavity', 'stack': 'old'}, [dict(run, step_times=[0.4])], path=db)
+    record_runs(tmp_path / 'other', {'case': 'pitzDaily', 'stack': 'old'}, [dict(run, step_times=[0.1])], path=db)
+    # the current sweep is not its own baseline
+    record_runs(tmp_path / 'current', {'case': 'cavity', 'stack': 'old'}, [dict(run, step_times=[9.])], path=db)
+    times = baseline_step_times('stack=old', 'cavity', tmp_path / 'current', store=db)
+    assert sorted(t.tolist() for t in times[(1, 2, '')]) == [[0.4], [0.5, 0.5, 0.5]]
+    with pytest.raises(ValueError):
+        baseline_step_times(str(tmp_path / 'missing'), 'cavity', tmp_path / 'current', store=db)
+
+
+def test_postprocess_without_run_cases(tmp_path):
+    results = tmp_path / 'cavity-strong-scaling-test-64.64'
+    results.mkdir()
+    (tmp_path / 'base').mkdir()
+    d = of.postprocess('cavity', results, clean=False, verbosity=0, record=False, baseline=str(tmp_path / 'base'))
+    assert d['comparisons'] == []
+
+
+def test_postprocess_strategies(tmp_path):
+    # the serial run case is the reference of every strategy, but it is compared with the baseline once
+    results = tmp_path / 'cavity-strong-scaling-test-64.64'
+    write_run_case(results, 'cavity-1x1cores', timesteps(1.))
+    for strategy in ('', '-cyclic', '-scotch'):
+        write_run_case(results, f'cavity-1x2cores{strategy}', timesteps(0.5))
+    d = of.postprocess('cavity', results, clean=False, verbosity=0, record=False, baseline=str(results))
+    serial = [c for c in d['comparisons'] if c.n_cores == 1]
+    assert len(serial) == 1
+    assert serial[0].n_current == serial[0].n_baseline
+    assert len(d['comparisons']) == 4
+
+# ==============================================================================
+# The code below is for debugging a particular test in eclipse/pydev.
+# (otherwise all tests are normally run with pytest)
+# Make sure that you run this code with the project directory as CWD, and
+# that the source directory is on the path
+# ==============================================================================
+if __name__ == "__main__":
+    the_test_you_want_to_debug = test_compare
+
+    print("__main__ running", the_test_you_want_to_debug)
+    the_test_you_want_to_debug()
+    print('-*# finished #*-')
+
+# eof
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for of.scanner."""
+
+import sys
+sys.path.insert(0,'.')
+
+import math
+
+from of.scanner import scan_case, scan_log
+
+
+def test_scan_case(tmp_path, write_run_case):
+    run_case = write_run_case(tmp_path)
+    record = scan_case(run_case)
+    assert record.execution_times == [1.0, 3.0, 5.0, 7.0, 9.0]
+    assert record.clock_times == [2.0, 4.0, 6.0, 8.0, 10.0]
+    assert record.mean_walltime_per_timestep() == 2.0
+    assert record.n_cells == 8000
+    assert record.completed
+    assert record.iterations == {'Ux': [5*19, 5], 'p': [5*47, 10]}
+    assert record.courant_max == 0.8
+
+
+def test_solver_breakdown(tmp_path, write_run_case):
+    record = scan_case(write_run_case(tmp_path))
+    assert record.iterations_per_timestep() == {'Ux': 19, 'p': 47}
+    assert record.pressure_field() == 'p'
+    assert record.time_per_pressure_iteration() == 2.0 / 47
+    # ExecutionTime and ClockTime increase at the same rate
+    assert record.clock_gap() == 0.
+
+
+DECOMPOSE_PAR = """
+Processor 0
+    Number of cells = 4100
+    Number of faces shared with processor 1 = 400
+    Number of processor patches = 1
+    Number of processor faces = 400
+    Number of boundary faces = 2000
+
+Processor 1
+    Number of cells = 3900
+    Number of faces shared with processor 0 = 400
+    Number of processor patches = 1
+    Number of processor faces = 400
+    Number of boundary faces = 2000
+
+Number of processor faces = 400
+Max number of cells = 4100 (2.5% above average 4000)
+Max number of processor patches = 1 (0% above average 1)
+Max number of faces between processors = 400 (0% above average 400)
+"""
+
+
+def test_scan_decomposition(tmp_path, write_run_case):
+    run_case = write_run_case(tmp_path)
+    with open(run_case / (run_case.name + '.stdout'), 'a') as f:
+        f.write(DECOMPOSE_PAR)
+    record = scan_case(run_case)
+    assert record.n_cells == 8000
+    assert record.processor_cells == [4100, 3900]
+    assert record.processor_faces == [400, 400]
+    assert record.total_processor_faces == 400
+    assert abs(record.cell_imbalance() - 0.025) < 1e-12
+    assert record.processor_faces_per_cell() == 400 / 8000
+
+
+def test_scan_log_small_chunks(tmp_path, write_run_case):
+    """Results must not depend on where the chunk boundaries fall."""
+    run_case = write_run_case(tmp_path)
+    log = run_case / (run_case.name + '.log')
+    expected = scan_log(log)
+    for chunk_size in (1, 7, 64):
+        record = scan_log(log, chunk_size=chunk_size)
+        assert record == expected
+
+
+def test_scan_case_incomplete(tmp_path, write_run_case):
+    run_case = write_run_case(tmp_path, n_timesteps=1, completed=False)
+    record = scan_case(run_case)
+    assert not record.completed
+    assert math.isnan(record.mean_walltime_per_timestep())
+
+# ==============================================================================
+# The code below is for debugging a particular test in eclipse/pydev.
+# (otherwise all tests are normally run with pytest)
+# Make sure that you run this code with the project directory as CWD, and
+# that the source directory is on the path
+# ==============================================================================
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    from conftest import make_run_case
+    the_test_you_want_to_debug = test_scan_case
+
+    print("__main__ running", the_test_you_want_to_debug)
+    with tempfile.TemporaryDirectory() as d:
+        the_test_you_want_to_debug(Path(d), make_run_case)
+    print('-*# finished #*-')
+
+# eof
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for of.staging."""
+
+import sys
+sys.path.insert(0,'.')
+
+import os
+
+from of.staging import stage_case, remove_artefacts
+
+
+def make_case(tmp_path):
+    case = tmp_path / 'cavity'
+    for d in ('0', 'system', 'constant/polyMesh'):
+        (case / d).mkdir(parents=True)
+    (case / '0/U').write_text('U')
+    (case / 'system/controlDict').write_text('controlDict')
+    (case / 'constant/transportProperties').write_text('nu 0.01;')
+    (case / 'constant/polyMesh/points').write_text('points')
+    return case
+
+
+def test_stage_case(tmp_path):
+    case = make_case(tmp_path)
+    for mode in ('copy', 'symlink', 'hardlink'):
+        run_case = tmp_path / f'cavity-{mode}'
+        stage_case(case, run_case, mode=mode)
+        for f in ('0/U', 'system/controlDict', 'constant/transportProperties', 'constant/polyMesh/points'):
+            assert (run_case / f).read_text() == (case / f).read_text()
+        # mutable files are always copied
+        assert os.stat(run_case / 'system/controlDict').st_nlink == 1
+        assert not (run_case / 'system/controlDict').is_symlink()
+
+    assert (tmp_path / 'cavity-symlink/constant/polyMesh').is_symlink()
+    assert os.path.samefile(tmp_path / 'cavity-hardlink/constant/polyMesh/points', case / 'constant/polyMesh/points')
+    assert not os.path.samefile(tmp_path / 'cavity-copy/constant/polyMesh/points', case / 'constant/polyMesh/points')
+
+    # serial runs modify the mesh, it must be copied
+    run_case = tmp_path / 'cavity-serial'
+    stage_case(case, run_case, mode='symlink', link_mesh=False)
+    assert not (run_case / 'constant/polyMesh').is_symlink()
+    assert (run_case / 'constant/transportProperties').is_symlink()
+
+
+def test_remove_artefacts(tmp_path):
+    case = make_case(tmp_path)
+    run_case = tmp_path / 'cavity-1x2cores'
+    stage_case(case, run_case, mode='symlink')
+    (run_case / 'processor0').mkdir()
+    (run_case / 'cavity-1x2cores.log').write_text('log')
+    (run_case / 'system/controlDict').write_text('modified')
+    remove_artefacts(case, run_case)
+    stage_case(case, run_case, mode='symlink')
+    assert sorted(p.name for p in run_case.iterdir()) == ['0', 'constant', 'system']
+    assert (run_case / 'constant/polyMesh').is_symlink()
+    assert (run_case / 'system/controlDict').read_text() == 'controlDict'
+
+# ==============================================================================
+# The code below is for debugging a particular test in eclipse/pydev.
+# (otherwise all tests are normally run with pytest)
+# Make sure that you run this code with the project directory as CWD, and
+# that the source directory is on the path
+# ==============================================================================
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    the_test_you_want_to_debug = test_stage_case
+
+    print("__main__ running", the_test_you_want_to_debug)
+    with tempfile.TemporaryDirectory() as d:
+        the_test_you_want_to_debug(Path(d))
+    print('-*# finished #*-')
+
+# eof
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+"""Startup time benchmark for of and its command line interfaces.
+
+Job generation runs on (loaded) login nodes and must not pay for importing numpy, matplotlib, or the
+modules only needed for tracking jobs (asyncio) and the results store (sqlite3).
+The imports are measured with ``python -X importtime``.
+"""
+
+import sys
+sys.path.insert(0,'.')
+
+import os
+import subprocess
+
+MAX_IMPORT_TIME = 1.0
+"""Generous upper bound (in seconds) for the cumulative import time of package of."""
+
+
+def importtime(statement):
+    """Run ``statement`` in a fresh interpreter with ``-X importtime``.
+
+    :return: dict mapping the imported modules to their cumulative import time in seconds.
+    """
+    p = subprocess.run( [sys.executable, '-X', 'importtime', '-c', statement]
+                      , stderr=subprocess.PIPE, universal_newlines=True, check=True
+                      , env=dict(os.environ, PYTHONPATH=os.getcwd())
+                      )
+    times = {}
+    for line in p.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if line.startswith('import time:') and not line.endswith('imported package'):
+            _, cumulative, module = line[len('import time:'):].split('|')
+            times[module.strip()] = int(cumulative) * 1e-6
+    return times
+
+
+HEAVY = ('numpy', 'matplotlib', 'asyncio', 'sqlite3', 'concurrent')
+"""Packages that job generation must not import."""
+
+
+def test_startup_run():
+    for statement in ('import of', 'import of.cli_sst_run'):
+        times = importtime(statement)
+        heavy = [module for module in times if module.split('.')[0] in HEAVY]
+        assert not heavy, f"'{statement}' imports {heavy}"
+        lazy = [module for module in ('of.tracker', 'of.store', 'of.launch') if module in times]
+        assert not lazy, f"'{statement}' imports {lazy}"
+        print(f"{statement}: {times['of']:.3f} s")
+        assert times['of'] < MAX_IMPORT_TIME
+
+
+def test_startup_post():
+    """numpy is imported when post-processing is requested, matplotlib only when a plot is made."""
+    times = importtime('import of; of.postprocess')
+    assert 'numpy' in times
+    assert 'matplotlib' not in times
+
+# ==============================================================================
+# The code below is for debugging a particular test in eclipse/pydev.
+# (otherwise all tests are normally run with pytest)
+# Make sure that you run this code with the project directory as CWD, and
+# that the source directory is on the path
+# ==============================================================================
+if __name__ == "__main__":
+    the_test_you_want_to_debug = test_startup_run
+
+    print("__main__ running", the_test_you_want_to_debug)
+    the_test_you_want_to_debug()
+    print('-*# finished #*-')
+
+# eof
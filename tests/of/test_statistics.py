@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for of.statistics."""
+
+import sys
+sys.path.insert(0,'.')
+
+import math
+
+import numpy as np
+
+from of.statistics import timestep_statistics, ratio_error, ranks, mann_whitney, write_steps
+
+
+def test_timestep_statistics():
+    rng = np.random.default_rng(1)
+    # 5 slow warmup steps, 200 regular steps, a slow write step every 50 steps
+    times = np.concatenate([np.full(5, 3.0), rng.normal(1.0, 0.01, 200)])
+    times[5::50] += 2.0
+    execution_times = np.concatenate([[0.], np.cumsum(times)])
+
+    stats = timestep_statistics(execution_times, warmup=5)
+    assert stats.n == 196
+    assert stats.n_excluded == 4
+    assert abs(stats.mean - 1.0) < 0.005
+    assert stats.ci_low < stats.mean < stats.ci_high
+    assert stats.p5 < stats.median < stats.p95
+    assert abs(stats.trimmed_mean - stats.median) < 0.005
+    # reproducible
+    assert timestep_statistics(execution_times, warmup=5) == stats
+
+    # the outliers bias the mean if they are not excluded
+    biased = timestep_statistics(execution_times, warmup=0, exclude_outliers=False)
+    assert biased.n == 205
+    assert biased.mean > stats.mean + 0.05
+
+
+def test_timestep_statistics_quantized():
+    # ExecutionTimes printed with 2 decimals: most timesteps take 0.1 s, some 0.11 s, one is disturbed
+    rng = np.random.default_rng(2)
+    times = 0.1 + 0.01 * (rng.random(100) < 0.3)
+    times[50] = 0.5
+    execution_times = np.round(np.concatenate([[0.], np.cumsum(times)]), 2)
+
+    stats = timestep_statistics(execution_times)
+    # only the disturbed timestep is an outlier, not all timesteps slower than the median
+    assert stats.n_excluded == 1
+    assert stats.n == 99
+    assert abs(stats.mean - 0.103) < 0.003
+    assert stats.ci_high - stats.ci_low > 0
+
+
+def test_write_steps():
+    # timesteps 5, 10, 15, ... write: walltimes 3, 8, 13, ...
+    assert np.flatnonzero(write_steps(20, 5)).tolist() == [3, 8, 13, 18]
+    assert not write_steps(20, 0).any()
+    times = np.full(21, 1.0)
+    times[3::5] = 1.5
+    execution_times = np.concatenate([[0.], np.cumsum(times)])
+    stats = timestep_statistics(execution_times, warmup=2, exclude_outliers=False, write_interval=5)
+    assert stats.n == 15
+    assert stats.n_excluded == 4
+    assert stats.mean == 1.0
+
+
+def test_timestep_statistics_empty():
+    stats = timestep_statistics([1.0, 3.0], warmup=1)
+    assert stats.n == 0
+    assert math.isnan(stats.mean)
+
+
+def test_ratio_error():
+    # relative errors add in quadrature
+    assert abs(ratio_error(8., 0.3, 2., 0.1) - 4*math.sqrt((0.3/8)**2 + (0.1/2)**2)) < 1e-12
+
+
+def test_mann_whitney():
+    r, ties = ranks([3., 1., 3., 2.])
+    assert r.tolist() == [3.5, 1., 3.5, 2.]
+    assert sorted(ties.tolist()) == [1, 1, 2]
+    x, y = np.arange(11., 21.), np.arange(1., 11.)
+    u, p = mann_whitney(x, y)
+    # z = (100 - 50 - 0.5) / sqrt(10*10/12*21)
+    assert u == 100
+    assert abs(p - 0.5 * math.erfc(49.5 / math.sqrt(175) / math.sqrt(2))) < 1e-12
+    assert mann_whitney(y, x)[1] > 0.999
+    # identical samples: no evidence either way
+    assert mann_whitney(np.ones(20), np.ones(20))[1] == 1.
+    assert math.isnan(mann_whitney([], y)[1])
+
+# ==============================================================================
+# The code below is for debugging a particular test in eclipse/pydev.
+# (otherwise all tests are normally run with pytest)
+# Make sure that you run this code with the project directory as CWD, and
+# that the source directory is on the path
+# ==============================================================================
+if __name__ == "__main__":
+    the_test_you_want_to_debug = test_timestep_statistics
+
+    print("__main__ running", the_test_you_want_to_debug)
+    the_test_you_want_to_debug()
+    print('-*# finished #*-')
+
+# eof
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for of.status."""
+
+import sys
+sys.path.insert(0,'.')
+
+from of.status import RunStatus, run_status
+
+
+def make_run_case(tmp_path, log=None, stderr=None, name='cavity-1x4cores'):
+    run_case = tmp_path / name
+    run_case.mkdir()
+    if log is not None:
+        (run_case / f"{name}.log").write_text(log)
+    if stderr is not None:
+        (run_case / f"{name}.stderr").write_text(stderr)
+    return run_case
+
+
+def test_run_status(tmp_path):
+    big = 100000 * "ExecutionTime = 1 s  ClockTime = 1 s\n\n"
+    cases = {
+        'not_started': (None, None, RunStatus.NOT_STARTED)
+      , 'running'    : (big, '', RunStatus.RUNNING)
+      , 'serial'     : (big + "End\n\n", None, RunStatus.COMPLETED)
+      , 'parallel'   : (big + "End\n\nFinalising parallel run\n", '', RunStatus.COMPLETED)
+      , 'timed_out'  : (big, "slurmstepd: error: *** JOB 42 ON cn1 CANCELLED AT 2022-10-18T12:00:00 DUE TO TIME LIMIT ***\n", RunStatus.TIMED_OUT)
+      , 'mpi_abort'  : (big, "MPI_ABORT was invoked on rank 3 in communicator MPI_COMM_WORLD\n", RunStatus.CRASHED)
+      , 'fatal'      : (big + "--> FOAM FATAL ERROR:\nMaximum number of iterations exceeded\n\nFOAM parallel run aborting\n", '', RunStatus.CRASHED)
+    }
+    for name, (log, stderr, expected) in cases.items():
+        run_case = make_run_case(tmp_path, log, stderr, name=f"{name}-1x4cores")
+        assert run_status(run_case) is expected, name
+
+# ==============================================================================
+# The code below is for debugging a particular test in eclipse/pydev.
+# (otherwise all tests are normally run with pytest)
+# Make sure that you run this code with the project directory as CWD, and
+# that the source directory is on the path
+# ==============================================================================
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    the_test_you_want_to_debug = test_run_status
+
+    print("__main__ running", the_test_you_want_to_debug)
+    with tempfile.TemporaryDirectory() as d:
+        the_test_you_want_to_debug(Path(d))
+    print('-*# finished #*-')
+
+# eof
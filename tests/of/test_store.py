@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for of.store."""
+
+import sys
+sys.path.insert(0,'.')
+
+import io
+
+import pytest
+
+import of
+from of.store import ( save_sweep_info, load_sweep_info, sweep_tags, parse_tags, record_runs, query, list_sweeps
+                     , print_comparison
+                     )
+
+
+def runs(efficiencies, variant=''):
+    return [ { 'run_case': f"cavity-1x{n}cores", 'variant': variant, 'n_nodes': 1, 'n_cores': n
+             , 'n_cells': 1e6, 'n_timesteps': 3, 'walltime': 1 / (n * e), 'walltime_error': float('NAN')
+             , 'speedup': n * e, 'efficiency': e, 'energy_per_timestep': float('NAN'), 'max_rss': 1e9 / n
+             , 'cpu_efficiency': 0.9, 'step_times': [0.1, 0.2, 0.1]
+             }
+             for n, e in efficiencies.items()
+           ]
+
+
+def test_tags(tmp_path):
+    assert load_sweep_info(tmp_path) == {}
+    save_sweep_info(tmp_path, 'dodrio', of.MODULES['dodrio'], 'simpleFoam')
+    tags = sweep_tags(load_sweep_info(tmp_path), 'cavity', 'strong', 1000000)
+    assert tags['openfoam'] == 'v2206-foss-2022a'
+    assert tags['modules'] == 'cluster/dodrio/cpu_rome,OpenFOAM/v2206-foss-2022a,vsc-mympirun'
+    assert tags['solver'] == 'simpleFoam'
+    assert parse_tags(['os = rhel8', 'note=a=b']) == {'os': 'rhel8', 'note': 'a=b'}
+    with pytest.raises(ValueError):
+        parse_tags(['rhel8'])
+
+
+def test_record_and_query(tmp_path):
+    db = tmp_path / 'store.sqlite'
+    record_runs(tmp_path / 'a', {'cluster': 'vaughan', 'openfoam': 'v2012', 'case': 'cavity'}, runs({1: 1., 2: 0.9, 4: 0.8}), path=db)
+    record_runs(tmp_path / 'b', {'cluster': 'dodrio', 'openfoam': 'v2206', 'case': 'cavity'}, runs({1: 1., 2: 0.7}), path=db)
+    record_runs(tmp_path / 'c', {'cluster': 'dodrio', 'openfoam': 'v2206', 'case': 'pitzDaily'}, runs({1: 1., 2: 0.5}), path=db)
+    record_runs(tmp_path / 'b', {'cluster': 'dodrio'}, runs({1: 1., 2: 0.2}, variant='cyclic'), path=db)
+
+    curves = query({'case': 'cav*'}, by=['cluster'], path=db)
+    assert curves == {('dodrio',): [(1, 1., 1), (2, 0.7, 1)], ('vaughan',): [(1, 1., 1), (2, 0.9, 1), (4, 0.8, 1)]}
+    curves = query({'cluster': 'dodrio'}, by=['case', 'os'], metric='memory', path=db)
+    assert curves[('cavity', '')] == [(1, 1e9, 1), (2, 5e8, 1)]
+    curves = query(by=['openfoam'], path=db)
+    assert curves[('v2206',)] == [(1, 1., 2), (2, pytest.approx(0.6), 2)]
+    assert query({'cluster': 'dodrio'}, variant='cyclic', path=db)[('dodrio',)][1] == (2, 0.2, 1)
+
+    # post-processing again replaces the run cases, and the tags of the same name
+    record_runs(tmp_path / 'a', {'cluster': 'vaughan', 'os': 'rhel8'}, runs({1: 1., 2: 0.95}), path=db)
+    assert query({'os': 'rhel8'}, path=db) == {('vaughan',): [(1, 1., 1), (2, 0.95, 1)]}
+    listed = list_sweeps({'cluster': 'vaughan'}, path=db)
+    assert listed == [(str(tmp_path / 'a'), {'case': 'cavity', 'cluster': 'vaughan', 'openfoam': 'v2012', 'os': 'rhel8'}, 2)]
+
+    output = io.StringIO()
+    print_comparison(query(by=['cluster'], path=db), ['cluster'], 'efficiency', file=output)
+    assert 'dodrio' in output.getvalue() and 'vaughan' in output.getvalue()
+    with pytest.raises(ValueError):
+        query(by=['cluster; DROP TABLE runs'], path=db)
+
+# ==============================================================================
+# The code below is for debugging a particular test in eclipse/pydev.
+# (otherwise all tests are normally run with pytest)
+# Make sure that you run this code with the project directory as CWD, and
+# that the source directory is on the path
+# ==============================================================================
+if __name__ == "__main__":
+    the_test_you_want_to_debug = test_record_and_query
+
+    print("__main__ running", the_test_you_want_to_debug)
+    the_test_you_want_to_debug()
+    print('-*# finished #*-')
+
+# eof
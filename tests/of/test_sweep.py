@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for of.sweep."""
+
+import sys
+sys.path.insert(0,'.')
+
+import pytest
+
+import of
+from of.sweep import sweep, powers, geometric, aligned, adaptive, measured_efficiencies, TOPOLOGY
+
+
+def test_sweep():
+    assert powers(28) == [1, 3, 7, 14, 28]
+    assert geometric(28, 1.5) == [1, 2, 3, 4, 6, 9, 13, 19, 28]
+    assert aligned(28, TOPOLOGY['leibniz']) == [1, 2, 4, 8, 14, 28]
+    assert aligned(128, TOPOLOGY['dodrio'])[4:] == [16, 32, 48, 64, 80, 96, 112, 128]
+    assert aligned(24, TOPOLOGY['dodrio']) == [1, 2, 4, 8, 16, 24]
+    for cluster, topology in TOPOLOGY.items():
+        assert topology.cores == of.NCORESPERNODE[cluster]
+    # the default is the original sweep
+    assert sweep('', 4, 28, 'leibniz') == [(1, 1), (1, 3), (1, 7), (1, 14), (1, 28), (2, 56), (4, 112)]
+    assert sweep('list:1,7,28,84', 4, 28, 'leibniz') == [(1, 1), (1, 7), (1, 28), (3, 84)]
+    assert sweep('powers+list:5', 1, 8, 'vaughan') == [(1, 1), (1, 2), (1, 4), (1, 5), (1, 8)]
+    for spec in ('triangular', 'geometric:1', 'list:a,b', 'list:90'):
+        with pytest.raises(ValueError):
+            sweep(spec, 4, 28, 'leibniz')
+
+
+
+def test_partial_nodes(monkeypatch):
+    # 100 cores on 64 core nodes: 50 tasks per node
+    assert sweep('list:100', 2, 64, 'vaughan') == [(2, 100)]
+    monkeypatch.setattr(of, 'VSC_INSTITUTE_CLUSTER', 'dodrio')
+    script = of.jobscript(2, 100, 64, 1, 'cavity-2x50cores', 'icoFoam', 0)
+    assert "mympirun --hybrid 50 icoFoam -parallel" in script
+    script = of.array_jobscript( n_nodes=2, n_tasks=[100, 128], max_tasks_per_node=64, walltime=1
+                               , case_names=['cavity-2x50cores', 'cavity-2x64cores']
+                               , openfoam_solver='icoFoam', job_name='cavity-2nodes-array'
+                               )
+    assert "mympirun --hybrid 50 icoFoam -parallel" in script
+    assert "mympirun --hybrid 64 icoFoam -parallel" in script
+
+def write_run_case(results, n_nodes, n_tasks, walltime_per_step, n_cells=1000):
+    name = f"cavity-{n_nodes}x{n_tasks//n_nodes}cores"
+    (results / name).mkdir()
+    times = '\n'.join(f"ExecutionTime = {i * walltime_per_step:g} s" for i in range(1, 11))
+    (results / name / f"{name}.log").write_text(times + '\nEnd\n')
+    (results / name / f"{name}.stdout").write_text(f"Mesh size: {n_cells}\n")
+
+
+def test_adaptive(tmp_path):
+    # perfect scaling up to 4 cores, then the memory bandwidth saturates
+    for n_tasks, walltime in ((1, 8.), (2, 4.), (4, 2.), (8, 2.), (16, 1.8)):
+        write_run_case(tmp_path, 1, n_tasks, walltime)
+    efficiencies = measured_efficiencies(tmp_path, 'cavity')
+    assert efficiencies[(1, 4)] == pytest.approx(1.)
+    assert efficiencies[(1, 8)] == pytest.approx(0.5)
+    # the steepest drop first, then the widest interval with the largest drop
+    assert adaptive(tmp_path, 'cavity', 16, n_runs=1) == [(1, 6)]
+    assert adaptive(tmp_path, 'cavity', 16, n_runs=2) == [(1, 6), (1, 11)]
+    assert sweep('adaptive:2', 1, 16, 'vaughan', results=tmp_path, case_name='cavity') == [(1, 6), (1, 11)]
+    with pytest.raises(ValueError):
+        adaptive(tmp_path, 'channel', 16)
+
+# ==============================================================================
+# The code below is for debugging a particular test in eclipse/pydev.
+# (otherwise all tests are normally run with pytest)
+# Make sure that you run this code with the project directory as CWD, and
+# that the source directory is on the path
+# ==============================================================================
+if __name__ == "__main__":
+    the_test_you_want_to_debug = test_sweep
+
+    print("__main__ running", the_test_you_want_to_debug)
+    the_test_you_want_to_debug()
+    print('-*# finished #*-')
+
+# eof
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for of.tracker, with stand-ins for sbatch, squeue and sacct."""
+
+import sys
+sys.path.insert(0,'.')
+
+import io
+import os
+import json
+
+import pytest
+
+import of
+from of.tracker import parse_states, next_interval, load_jobs, track, total_timesteps, write_interval
+
+# The stand-ins keep the jobs in a json file: {"next_id": ..., "jobs": {job id: state}}.
+FAKE_SLURM = {
+  'sbatch': """
+script = open(sys.argv[-1]).read()
+m = re.search(r'#SBATCH --array=0-(\\d+)', script)
+job_id = str(slurm['next_id'])
+slurm['next_id'] += 1
+for task in ([f"_{i}" for i in range(int(m[1]) + 1)] if m else ['']):
+    slurm['jobs'][job_id + task] = 'PENDING'
+print(job_id)
+"""
+, 'squeue': """
+for job_id, state in slurm['jobs'].items():
+    if job_id.split('_')[0] in jobs and state in ('PENDING', 'RUNNING'):
+        print(f"{job_id}|{state}")
+"""
+, 'sacct': """
+for job_id, state in slurm['jobs'].items():
+    if job_id.split('_')[0] in jobs:
+        print(f"{job_id}|{state}")
+        print(f"{job_id}.batch|{state}")
+"""
+}
+
+CONTROL_DICT = """\
+startTime       0;
+stopAt          endTime;
+endTime         0.1;
+deltaT          0.005;
+"""
+
+
+@pytest.fixture
+def slurm(tmp_path, monkeypatch):
+    """Put the stand-ins on the PATH, and return the path of their state file."""
+    bin = tmp_path / 'bin'
+    bin.mkdir()
+    state = tmp_path / 'slurm.json'
+    state.write_text(json.dumps({'next_id': 1000, 'jobs': {}}))
+    for command, body in FAKE_SLURM.items():
+        path = bin / command
+        path.write_text( f"#!{sys.executable}\nimport sys, re, json\n"
+                         f"slurm = json.load(open({str(state)!r}))\n"
+                          "jobs = [a.split('=')[1] for a in sys.argv if a.startswith('--jobs=')]\n"
+                          "jobs = jobs[0].split(',') if jobs else []\n"
+                       + body
+                       + f"json.dump(slurm, open({str(state)!r}, 'w'))\n"
+                       )
+        path.chmod(0o755)
+    monkeypatch.setenv('PATH', str(bin) + os.pathsep + os.environ['PATH'])
+    return state
+
+
+def set_states(state, states):
+    """Set the states of jobs, None removes a job."""
+    slurm = json.loads(state.read_text())
+    slurm['jobs'].update(states)
+    slurm['jobs'] = {job_id: state for job_id, state in slurm['jobs'].items() if state}
+    state.write_text(json.dumps(slurm))
+
+
+def write_log(run_case, n_steps, end=False):
+    lines = [f"ExecutionTime = {0.5 * i:g} s  ClockTime = {i} s" for i in range(1, n_steps + 1)]
+    lines += ["End", "Finalising parallel run"] if end else []
+    (run_case / f"{run_case.name}.log").write_text('\n'.join(lines) + '\n')
+
+
+def test_parse_states():
+    states = parse_states("12_[3-4,7%2]|PENDING\n12_1|RUNNING\n12_1.batch|RUNNING\n13|CANCELLED by 42\n")
+    assert states == {'12_3': 'PENDING', '12_4': 'PENDING', '12_7': 'PENDING', '12_1': 'RUNNING', '13': 'CANCELLED'}
+    assert next_interval(10, False, 10, 300) == 20
+    assert next_interval(160, False, 10, 300) == 300
+    assert next_interval(300, True, 10, 300) == 10
+
+
+def test_track(tmp_path, slurm):
+    case = tmp_path / 'cavity'
+    (case / 'system').mkdir(parents=True)
+    (case / 'system/controlDict').write_text(CONTROL_DICT)
+    (case / 'system/decomposeParDict').write_text("numberOfSubdomains 2;\n")
+    results = tmp_path / 'results'
+    of.run_all(case, 'icoFoam', destination=results, max_cores_per_node=2, submit=True, array=True)
+    jobs = load_jobs(results)
+    assert jobs == {'cavity-1x1cores': '1000_0', 'cavity-1x2cores': '1000_1'}
+    assert total_timesteps(results / 'cavity-1x2cores') == 20
+    assert write_interval(results / 'cavity-1x2cores') == 0
+    control_dict = results / 'cavity-1x1cores/system/controlDict'
+    control_dict.write_text(CONTROL_DICT + "writeControl    runTime;\nwriteInterval   0.05;\n")
+    assert write_interval(results / 'cavity-1x1cores') == 10
+
+    set_states(slurm, {'1000_0': 'COMPLETED', '1000_1': 'RUNNING'})
+    write_log(results / 'cavity-1x1cores', 20, end=True)
+    write_log(results / 'cavity-1x2cores', 5)
+    output = io.StringIO()
+    progress = track(results, poll=0, max_polls=1, postprocess=False, file=output)
+    assert [p.state for p in progress] == ['COMPLETED', 'RUNNING']
+    assert progress[1].steps == 5
+    assert progress[1].seconds_per_step == pytest.approx(0.5)
+    assert progress[1].eta == pytest.approx(15 * 0.5)
+    assert '5/20' in output.getvalue()
+
+    # the job has left the queue, and sacct has forgotten it: its log says it completed
+    set_states(slurm, {'1000_1': None})
+    write_log(results / 'cavity-1x2cores', 20, end=True)
+    progress = track(results, poll=0, max_polls=3, postprocess=False, file=io.StringIO())
+    assert [p.state for p in progress] == ['COMPLETED', 'COMPLETED']
+
+# ==============================================================================
+# The code below is for debugging a particular test in eclipse/pydev.
+# (otherwise all tests are normally run with pytest)
+# Make sure that you run this code with the project directory as CWD, and
+# that the source directory is on the path
+# ==============================================================================
+if __name__ == "__main__":
+    the_test_you_want_to_debug = test_parse_states
+
+    print("__main__ running", the_test_you_want_to_debug)
+    the_test_you_want_to_debug()
+    print('-*# finished #*-')
+
+# eof
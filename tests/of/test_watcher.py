@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for of.watcher."""
+
+import sys
+sys.path.insert(0,'.')
+
+import os
+
+import of
+from of.watcher import watch, is_stable, stop_run
+
+
+def write_log(log, step_times, completed=False):
+    t = 0.
+    lines = []
+    for dt in step_times:
+        t += dt
+        lines += [f"Time = {t}", "", f"ExecutionTime = {t} s  ClockTime = {int(t)} s", ""]
+    if completed:
+        lines += ["End", ""]
+    log.write_text('\n'.join(lines))
+
+
+def test_is_stable():
+    assert not is_stable([1.0]*19, 0.02)
+    assert is_stable([1.0]*20, 0.02)
+    assert not is_stable([1.0, 2.0]*10, 0.02)
+    # only the last window timesteps count
+    assert is_stable([1.0, 2.0]*10 + [1.0]*20, 0.02, window=20)
+
+
+def test_stop_run(tmp_path):
+    control_dict = tmp_path / 'controlDict'
+    control_dict.write_text("startFrom       startTime;\nstopAt          endTime;\nendTime         0.5;\n")
+    inode = os.stat(control_dict).st_ino
+    stop_run(control_dict)
+    assert "stopAt          noWriteNow;" in control_dict.read_text()
+    assert "endTime         0.5;" in control_dict.read_text()
+    # replaced, not rewritten in place
+    assert os.stat(control_dict).st_ino != inode
+    assert [p.name for p in tmp_path.iterdir()] == ['controlDict']
+
+
+def test_watch(tmp_path):
+    control_dict = tmp_path / 'controlDict'
+    control_dict.write_text("stopAt          endTime;\n")
+    log = tmp_path / 'cavity-1x4cores.log'
+    # the warmup timesteps are slow, the others are stable
+    write_log(log, [5.0]*3 + [1.0]*30)
+    assert watch(log, control_dict, warmup=3, poll=0, max_polls=1) == 33
+    assert "noWriteNow" in control_dict.read_text()
+
+    # a completed run is not stopped
+    control_dict.write_text("stopAt          endTime;\n")
+    write_log(log, [1.0]*30, completed=True)
+    assert watch(log, control_dict, poll=0, max_polls=1) == 0
+    assert "endTime" in control_dict.read_text()
+
+
+def test_jobscript_early_stop():
+    options = of.RunOptions(early_stop=0.02, warmup=5)
+    script = of.jobscript(1, 4, 4, 1, 'cavity-1x4cores', 'icoFoam', 0, options=options)
+    assert "watcher.py cavity-1x4cores.log --rel-width 0.02 --warmup 5 &" in script
+    assert script.index("watcher.py") < script.index("icoFoam -parallel") < script.index("kill $WATCHER_PID")
+    assert "watcher" not in of.jobscript(1, 4, 4, 1, 'cavity-1x4cores', 'icoFoam', 0)
+
+# ==============================================================================
+# The code below is for debugging a particular test in eclipse/pydev.
+# (otherwise all tests are normally run with pytest)
+# Make sure that you run this code with the project directory as CWD, and
+# that the source directory is on the path
+# ==============================================================================
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    the_test_you_want_to_debug = test_watch
+
+    print("__main__ running", the_test_you_want_to_debug)
+    with tempfile.TemporaryDirectory() as d:
+        the_test_you_want_to_debug(Path(d))
+    print('-*# finished #*-')
+
+# eof
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for of.weak."""
+
+import sys
+sys.path.insert(0,'.')
+
+import pytest
+import numpy as np
+
+import of
+from of.weak import blocks_entry, block_counts, scaled_blocks, weak_commands, find_block_mesh_dict
+
+BLOCK_MESH_DICT = """\
+FoamFile
+{
+    version     2.0;
+    format      ascii;
+    class       dictionary;
+    object      blockMeshDict;
+}
+
+scale   0.1;
+
+vertices
+(
+    (0 0 0) (1 0 0) (1 1 0) (0 1 0)
+    (0 0 0.1) (1 0 0.1) (1 1 0.1) (0 1 0.1)
+    (2 0 0) (2 1 0) (2 0 0.1) (2 1 0.1)
+);
+
+blocks
+(
+    hex (0 1 2 3 4 5 6 7) (20 20 1) simpleGrading (1 1 1)
+    // a second block, sharing a face with the first one
+    hex (1 8 9 2 5 10 11 6) right (10 20 1) simpleGrading (1 1 1)
+);
+
+edges
+(
+);
+"""
+
+
+def test_scaled_blocks():
+    blocks = blocks_entry(BLOCK_MESH_DICT)
+    assert 'second block' not in blocks
+    assert block_counts(blocks) == [(20, 20, 1), (10, 20, 1)]
+    scaled, total = scaled_blocks(blocks, 4 * 600)
+    # two-dimensional: only x and y are refined, by a factor 2
+    assert block_counts(scaled) == [(40, 40, 1), (20, 40, 1)]
+    assert total == 2400
+    assert 'right (20 40 1)' in scaled
+    with pytest.raises(ValueError):
+        block_counts("( hex (0 1 2 3 4 5 6 7) ($nx 20 1) simpleGrading (1 1 1) )")
+
+
+def test_weak_commands(tmp_path):
+    (tmp_path / 'system').mkdir()
+    (tmp_path / 'system/blockMeshDict').write_text(BLOCK_MESH_DICT)
+    assert find_block_mesh_dict(tmp_path) == 'system/blockMeshDict'
+    options = of.RunOptions(cells_per_core=150, block_mesh_dict=str(tmp_path / 'system/blockMeshDict'))
+    script = of.jobscript(1, 4, 4, 1, 'cavity-1x4cores', 'icoFoam', 0, options=options)
+    assert ("foamDictionary -entry blocks -set '( hex (0 1 2 3 4 5 6 7) (20 20 1) simpleGrading (1 1 1) "
+            "hex (1 8 9 2 5 10 11 6) right (10 20 1) simpleGrading (1 1 1) )' system/blockMeshDict") in script
+    assert script.index("blockMesh\n") < script.index("decomposePar")
+    assert weak_commands(options.block_mesh_dict, 1, 150)[0] == "# Weak scaling: 150 cells, 150 cells per core"
+    with pytest.raises(FileNotFoundError):
+        find_block_mesh_dict(tmp_path / 'system')
+
+
+def test_weak_efficiency():
+    from of.post import is_weak_scaling, weak_efficiency
+    assert not is_weak_scaling(np.array([600., 600., float('NAN')]))
+    assert is_weak_scaling(np.array([600., 1200., 2400.]))
+    efficiency, errors = weak_efficiency( np.array([1.0, 1.25, 1.0]), np.array([0.01, 0.01, 0.01])
+                                        , np.array([600., 600., 300.])
+                                        )
+    assert efficiency == pytest.approx([1.0, 0.8, 0.5])
+    assert errors[0] == 0 and errors[1] > 0
+
+# ==============================================================================
+# The code below is for debugging a particular test in eclipse/pydev.
+# (otherwise all tests are normally run with pytest)
+# Make sure that you run this code with the project directory as CWD, and
+# that the source directory is on the path
+# ==============================================================================
+if __name__ == "__main__":
+    the_test_you_want_to_debug = test_scaled_blocks
+
+    print("__main__ running", the_test_you_want_to_debug)
+    the_test_you_want_to_debug()
+    print('-*# finished #*-')
+
+# eof